@@ -1,17 +1,22 @@
+import asyncio
 import os
 import streamlit as st
 from dotenv import load_dotenv
-from src.document_processing.pdf_processor import PDFProcessor
-from src.document_processing.docx_processor import DocxProcessor
-from src.embedding.embedder import DocumentEmbedder
-from src.retrieval.retriever import DocumentRetriever
-from src.generation.answer_generator import AnswerGenerator
+from src.embedding.index_cache import get_default_cache, hash_file_content
 from src.translation.translator import DocumentTranslator
+from src.generation.answer_cache import get_default_answer_cache
 from src.utils.config import Config
 from src.utils.logger import setup_logger
+from src.utils.metrics import get_default_metrics, start_metrics_server
+from src.pipeline.registry import get_default_registry, start_warm_up
+from src.utils.conversation import ConversationHistory, ConversationTurn, UploadedDocument
 from src.ui.components import (
     render_chat_history, 
     render_document_manager, 
+    render_search_scope,
+    render_index_cache,
+    render_answer_cache,
+    render_metrics,
     render_feedback_system,
     render_export_options,
     render_analytics
@@ -23,6 +28,13 @@ load_dotenv()
 # Initialize logger
 logger = setup_logger()
 
+# Expose /metrics for Prometheus when METRICS_PORT is set
+start_metrics_server()
+
+# Load the shared models in the background so the first question does not wait for them
+if Config.WARMUP_ON_START:
+    start_warm_up()
+
 def main():
     st.set_page_config(
         page_title="ClarityAI - Document Intelligence",
@@ -39,6 +51,8 @@ def main():
         st.session_state.processed = False
     if 'vector_store' not in st.session_state:
         st.session_state.vector_store = None
+    if 'index_manager' not in st.session_state:
+        st.session_state.index_manager = None
     if 'retriever' not in st.session_state:
         st.session_state.retriever = None
     if 'answer_generator' not in st.session_state:
@@ -46,13 +60,16 @@ def main():
     if 'translator' not in st.session_state:
         st.session_state.translator = DocumentTranslator()
     if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+        # Compact turns, older ones spilled to disk past CHAT_MEMORY_CAP_MB
+        st.session_state.chat_history = ConversationHistory()
     if 'uploaded_files' not in st.session_state:
         st.session_state.uploaded_files = []
     if 'feedback' not in st.session_state:
         st.session_state.feedback = None
     if 'last_question' not in st.session_state:
         st.session_state.last_question = ""
+    if 'uploader_key' not in st.session_state:
+        st.session_state.uploader_key = 0
     
     # Sidebar for settings and document management
     with st.sidebar:
@@ -64,21 +81,41 @@ def main():
         with st.expander("Advanced Settings"):
             temperature = st.slider("Temperature", 0.0, 1.0, 0.1, 0.05)
             max_tokens = st.slider("Max Tokens", 100, 4000, 1000, 100)
+            context_token_budget = st.slider("Context Token Budget", 500, 8000, Config.CONTEXT_TOKEN_BUDGET, 250)
             chunk_size = st.slider("Chunk Size", 200, 2000, 1000, 100)
             chunk_overlap = st.slider("Chunk Overlap", 0, 500, 200, 10)
+            ingest_workers = st.slider("Ingest Workers", 1, os.cpu_count() or 1, min(Config.INGEST_WORKERS, os.cpu_count() or 1), 1)
         
         # Update config based on user input
         Config.TEMPERATURE = temperature
         Config.MAX_TOKENS = max_tokens
+        Config.CONTEXT_TOKEN_BUDGET = context_token_budget
         Config.CHUNK_SIZE = chunk_size
         Config.CHUNK_OVERLAP = chunk_overlap
+        Config.INGEST_WORKERS = ingest_workers
         
         # Document management
         render_document_manager(st.session_state.uploaded_files, remove_selected_files)
         
+        # Limit questions to some documents or pages
+        search_scope = render_search_scope(st.session_state.index_manager)
+        
+        # Index cache management
+        if Config.INDEX_CACHE_ENABLED:
+            with st.expander("Index Cache"):
+                render_index_cache(get_default_cache())
+        
+        if Config.ANSWER_CACHE_ENABLED:
+            with st.expander("Answer Cache"):
+                render_answer_cache(get_default_answer_cache())
+        
+        if Config.METRICS_ENABLED:
+            with st.expander("Performance"):
+                render_metrics(get_default_metrics())
+        
         # Clear conversation button
         if st.button("Clear Conversation", type="secondary"):
-            st.session_state.chat_history = []
+            st.session_state.chat_history.clear()
             st.success("Conversation cleared!")
         
         # Export options
@@ -95,50 +132,107 @@ def main():
         "Upload documents", 
         type=["pdf", "docx"], 
         accept_multiple_files=True,
-        help="Upload one or more PDF or Word documents to process"
+        help="Upload one or more PDF or Word documents to process",
+        key=f"uploader_{st.session_state.uploader_key}"
     )
     
     # Process button
     if uploaded_files and st.button("Process Documents"):
         with st.spinner("Processing documents..."):
             try:
-                # Initialize components
-                pdf_processor = PDFProcessor()
-                docx_processor = DocxProcessor()
-                embedder = DocumentEmbedder(model_name="all-MiniLM-L6-v2")
+                # Ingestion pulls in langchain, FAISS and the embedding model, so load it on first use
+                from src.document_processing.parallel_ingest import ParallelIngestor
+                if Config.RETRIEVAL_SERVER_URL:
+                    from src.retrieval.retrieval_client import RemoteIndexManager, RemoteRetriever
+                else:
+                    from src.embedding.index_manager import VectorIndexManager
+                    from src.retrieval.retriever import DocumentRetriever
                 
-                # Process documents
-                documents = []
+                # Rebuild the index from scratch only when chunking settings changed
+                registry = get_default_registry()
+                index_manager = st.session_state.index_manager
+                if index_manager is None or not index_manager.matches_settings():
+                    if index_manager is not None:
+                        index_manager.close()  # Release the old index's files on the retrieval server
+                    if Config.RETRIEVAL_SERVER_URL:
+                        # The retrieval server owns the model and the index, shared with other app processes
+                        index_manager = RemoteIndexManager()
+                    else:
+                        # The embedding model itself is loaded once and shared by all sessions
+                        index_manager = VectorIndexManager(registry.embedder())
+                    st.session_state.uploaded_files = []
+                
+                # Only process files that are not indexed yet
+                index_manager.embedder.reset_embedding_cache_stats()
+                new_files = []
+                pending_files = []
+                file_names = {}
                 for file in uploaded_files:
+                    content_hash = hash_file_content(file.getbuffer())
+                    if index_manager.has_file(content_hash) or content_hash in file_names:
+                        continue
+                    
+                    new_files.append(UploadedDocument(file.name, file.size, content_hash))
+                    file_names[content_hash] = file.name
+                    
+                    # Reuse a cached index when the same file was processed before
+                    if index_manager.add_cached_file(content_hash, file.name):
+                        continue
+                    
                     # Save uploaded file temporarily
                     temp_path = os.path.join("temp", file.name)
                     os.makedirs("temp", exist_ok=True)
                     with open(temp_path, "wb") as f:
                         f.write(file.getbuffer())
-                    
-                    # Process based on file type
-                    if file.name.endswith('.pdf'):
-                        docs = pdf_processor.process_pdf(temp_path)
-                    elif file.name.endswith('.docx'):
-                        docs = docx_processor.process_docx(temp_path)
-                    
-                    documents.extend(docs)
+                    pending_files.append((content_hash, temp_path))
                 
-                # Create embeddings and vector store
-                vector_store = embedder.create_vector_store(documents)
+                # Extract and chunk in worker processes while finished files are embedded
+                ingestor = ParallelIngestor()
+                try:
+                    for content_hash, docs in ingestor.iter_documents(pending_files):
+                        index_manager.add_file(content_hash, file_names[content_hash], docs)
+                finally:
+                    for _, temp_path in pending_files:
+                        if os.path.exists(temp_path):
+                            os.remove(temp_path)
+                
+                vector_store = index_manager.vector_store
                 
                 # Initialize retriever and answer generator
-                retriever = DocumentRetriever(vector_store)
-                answer_generator = AnswerGenerator(model_name=model_name)
+                if Config.RETRIEVAL_SERVER_URL:
+                    retriever = RemoteRetriever(index_manager, model_name=model_name)
+                else:
+                    lexical_index = index_manager.lexical_index if Config.HYBRID_RETRIEVAL_ENABLED else None
+                    retriever = DocumentRetriever(
+                        vector_store, model_name=model_name, lexical_index=lexical_index, index_manager=index_manager
+                    )
+                answer_generator = registry.answer_generator(model_name)
                 
                 # Store in session state
+                st.session_state.index_manager = index_manager
                 st.session_state.vector_store = vector_store
                 st.session_state.retriever = retriever
                 st.session_state.answer_generator = answer_generator
-                st.session_state.uploaded_files = uploaded_files
+                st.session_state.uploaded_files = st.session_state.uploaded_files + new_files
                 st.session_state.processed = True
                 
-                st.success(f"Successfully processed {len(uploaded_files)} documents!")
+                # A fresh uploader key drops the uploaded buffers on the next rerun; only their metadata is kept
+                st.session_state.uploader_key += 1
+                
+                st.success(f"Successfully processed {len(new_files)} new documents!")
+                
+                cache_stats = index_manager.embedder.embedding_cache_stats()
+                if cache_stats and cache_stats['hits'] + cache_stats['misses'] > 0:
+                    st.caption(
+                        f"Embedding cache: {cache_stats['hits']} chunks reused, "
+                        f"{cache_stats['misses']} newly embedded ({cache_stats['hit_rate']:.0%} hit rate)"
+                    )
+
+                if index_manager.index_recall is not None:
+                    st.caption(
+                        f"Search index: {index_manager.index_type} over {index_manager.num_chunks} chunks, "
+                        f"recall@{Config.ANN_RECALL_K} {index_manager.index_recall:.1%} against exact search"
+                    )
                 
             except Exception as e:
                 st.error(f"Error processing documents: {str(e)}")
@@ -147,7 +241,11 @@ def main():
     # Chat history display
     if st.session_state.chat_history:
         st.subheader("Conversation History")
-        render_chat_history(st.session_state.chat_history)
+        index_manager = st.session_state.index_manager
+        render_chat_history(
+            st.session_state.chat_history,
+            resolve_sources=index_manager.get_documents if index_manager is not None else None
+        )
     
     # Question answering section
     if st.session_state.processed:
@@ -161,46 +259,67 @@ def main():
         
         # Only generate answer if question is not empty and different from last question
         if question and question != st.session_state.last_question:
-            with st.spinner("Generating answer..."):
-                try:
-                    # Update last question
-                    st.session_state.last_question = question
-                    
-                    # Add user question to chat history
-                    st.session_state.chat_history.append({"role": "user", "content": question})
-                    
-                    # Translate question if needed
-                    if language == "German":
-                        translated_question = st.session_state.translator.translate(question, "en")
-                    else:
-                        translated_question = question
+            try:
+                # Update last question
+                st.session_state.last_question = question
+                
+                # Add user question to chat history
+                st.session_state.chat_history.append(ConversationTurn("user", question))
+                
+                with st.spinner("Searching documents..."):
+                    from src.pipeline.question_pipeline import QuestionPipeline
                     
-                    # Retrieve relevant documents
-                    relevant_docs = st.session_state.retriever.get_relevant_documents(translated_question)
+                    # Translate the question if needed, overlapping retrieval with translation
+                    index_manager = st.session_state.index_manager
+                    pipeline = QuestionPipeline(
+                        st.session_state.retriever,
+                        st.session_state.answer_generator,
+                        st.session_state.translator,
+                        answer_cache=get_default_answer_cache() if Config.ANSWER_CACHE_ENABLED else None,
+                        embeddings=index_manager.embedder.embeddings,
+                        document_fingerprint=index_manager.fingerprint(search_scope),
+                        scope=search_scope
+                    )
+                    translated_question, relevant_docs = asyncio.run(pipeline.retrieve(question, language))
                     
-                    # Generate answer
-                    answer = st.session_state.answer_generator.generate_answer(
+                    # Reuse the answer to an equivalent question over the same documents
+                    question_embedding = pipeline.embed_question(translated_question)
+                    cached = pipeline.lookup_answer(translated_question, question_embedding)
+                
+                st.markdown("**ClarityAI:**")
+                answer_placeholder = st.empty()
+                if cached is not None:
+                    answer = cached["answer"]
+                    answer_placeholder.markdown(answer)
+                else:
+                    # Stream the answer into the main panel as it is generated
+                    answer_parts = []
+                    for token in st.session_state.answer_generator.stream_answer(
                         question=translated_question,
                         documents=relevant_docs
-                    )
-                    
-                    # Translate answer if needed
-                    if language == "German":
-                        answer = st.session_state.translator.translate(answer, "de")
-                    
-                    # Add AI response to chat history
-                    st.session_state.chat_history.append({
-                        "role": "assistant", 
-                        "content": answer,
-                        "sources": relevant_docs
-                    })
-                    
-                    # Rerun to update the chat history display
-                    st.rerun()
-                    
-                except Exception as e:
-                    st.error(f"Error generating answer: {str(e)}")
-                    logger.error(f"Error generating answer: {str(e)}")
+                    ):
+                        answer_parts.append(token)
+                        answer_placeholder.markdown("".join(answer_parts) + "▌")
+                    answer = "".join(answer_parts)
+                    answer_placeholder.markdown(answer)
+                    pipeline.store_answer(translated_question, answer, question_embedding)
+                
+                # Translate answer if needed
+                if language == "German":
+                    with st.spinner("Translating answer..."):
+                        answer = st.session_state.translator.translate(answer, "de", "en")
+                    answer_placeholder.markdown(answer)
+                
+                # Add AI response to chat history
+                # Sources are kept as chunk IDs into the index, not copies of the documents
+                st.session_state.chat_history.append(ConversationTurn.answer(answer, relevant_docs))
+                
+                # Rerun to update the chat history display
+                st.rerun()
+                
+            except Exception as e:
+                st.error(f"Error generating answer: {str(e)}")
+                logger.error(f"Error generating answer: {str(e)}")
     else:
         st.info("Please upload and process documents to begin asking questions.")
 
@@ -209,6 +328,12 @@ def remove_selected_files(selected_files):
     if not selected_files:
         return
     
+    # Delete the removed files' chunks from the live vector store
+    index_manager = st.session_state.index_manager
+    if index_manager is not None:
+        for file in selected_files:
+            index_manager.remove_file(file.content_hash)
+    
     # Remove files from session state
     remaining_files = [f for f in st.session_state.uploaded_files if f not in selected_files]
     st.session_state.uploaded_files = remaining_files
@@ -216,6 +341,9 @@ def remove_selected_files(selected_files):
     # If no files remain, reset processing state
     if not remaining_files:
         st.session_state.processed = False
+        if index_manager is not None:
+            index_manager.close()
+        st.session_state.index_manager = None
         st.session_state.vector_store = None
         st.session_state.retriever = None
         st.session_state.answer_generator = None
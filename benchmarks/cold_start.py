@@ -0,0 +1,87 @@
+"""Profile the cold start of the Streamlit app module.
+
+Imports app.py in fresh interpreters and reports wall time, peak RSS and which
+heavy libraries got loaded on the way. Thresholds turn it into a regression
+check that exits non-zero when startup gets slower or bigger:
+
+    python -m benchmarks.cold_start --repeats 5 --max-seconds 3 --max-rss-mb 400
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Libraries that should only load once documents are processed or a panel is opened
+HEAVY_MODULES = (
+    "torch", "sentence_transformers", "faiss", "langchain_community", "langchain_openai",
+    "pandas", "matplotlib", "seaborn", "wordcloud", "fpdf", "deep_translator"
+)
+
+# Runs in the child; prints one JSON line with the measurements
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+seconds = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+loaded = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{"seconds": seconds, "rss_mb": rss_kb / 1024, "loaded": loaded}}))
+"""
+
+def run_once() -> Dict:
+    """Import the app in a new interpreter and return its measurements."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(limit: int) -> List[Tuple[float, str]]:
+    """Top cumulative import times (seconds) from -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(entries, reverse=True)[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Show the slowest N imports (0 to skip)")
+    parser.add_argument("--max-seconds", type=float, help="Fail if the median import time exceeds this")
+    parser.add_argument("--max-rss-mb", type=float, help="Fail if the median peak RSS exceeds this")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.repeats)]
+    seconds = statistics.median(run["seconds"] for run in runs)
+    rss_mb = statistics.median(run["rss_mb"] for run in runs)
+    loaded = runs[-1]["loaded"]
+
+    print(f"import app: median {seconds:.3f}s, min {min(run['seconds'] for run in runs):.3f}s over {len(runs)} runs")
+    print(f"Peak RSS: median {rss_mb:.1f} MB")
+    print(f"Heavy modules loaded at startup: {', '.join(loaded) or 'none'}")
+
+    if args.top:
+        print(f"{'cumulative s':>13}  module")
+        for cumulative, name in slowest_imports(args.top):
+            print(f"{cumulative:>13.3f}  {name}")
+
+    failures = []
+    if args.max_seconds is not None and seconds > args.max_seconds:
+        failures.append(f"import time {seconds:.3f}s exceeds {args.max_seconds}s")
+    if args.max_rss_mb is not None and rss_mb > args.max_rss_mb:
+        failures.append(f"peak RSS {rss_mb:.1f} MB exceeds {args.max_rss_mb} MB")
+    if failures:
+        raise SystemExit("Cold start regression: " + "; ".join(failures))
+
+if __name__ == "__main__":
+    main()
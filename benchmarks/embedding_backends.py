@@ -0,0 +1,86 @@
+"""Compare the PyTorch and quantized ONNX embedding backends.
+
+Reports throughput for both backends and the cosine drift of the ONNX vectors
+relative to the PyTorch ones.
+
+    python -m benchmarks.embedding_backends --files docs/contract.pdf --threads 8
+
+Needs the optional ONNX dependencies: pip install -r requirements-onnx.txt
+"""
+
+import argparse
+import time
+from typing import List
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from src.document_processing.parallel_ingest import process_file
+from src.embedding.onnx_embeddings import OnnxEmbeddings
+from src.utils.config import Config
+
+def load_texts(files: List[str], limit: int) -> List[str]:
+    """Chunk the given files, or fall back to synthetic sentences."""
+    texts = []
+    for file_path in files:
+        texts.extend(doc.page_content for doc in process_file(
+            file_path, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP, Config.PDF_STREAMING
+        ))
+    if not texts:
+        texts = [
+            f"Clause {i}: the supplier shall deliver the goods within {i % 30 + 1} days of the order date."
+            for i in range(limit)
+        ]
+    return texts[:limit]
+
+def time_backend(embeddings, texts: List[str], repeats: int):
+    """Return (vectors, best wall time in seconds) over several runs."""
+    embeddings.embed_documents(texts[:8])  # warm-up
+    best = float("inf")
+    vectors = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+        best = min(best, time.perf_counter() - start)
+    return vectors, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", nargs="*", default=[], help="PDF/DOCX files to take chunks from")
+    parser.add_argument("--limit", type=int, default=512, help="Maximum number of chunks to embed")
+    parser.add_argument("--batch-size", type=int, default=Config.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--threads", type=int, default=Config.EMBEDDING_THREADS)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-quantize", action="store_true", help="Run the fp32 ONNX model")
+    args = parser.parse_args()
+
+    texts = load_texts(args.files, args.limit)
+    print(f"Embedding {len(texts)} chunks with {Config.EMBEDDING_MODEL}")
+
+    torch_embeddings = HuggingFaceEmbeddings(
+        model_name=Config.EMBEDDING_MODEL,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'batch_size': args.batch_size}
+    )
+    onnx_embeddings = OnnxEmbeddings(
+        model_name=Config.EMBEDDING_MODEL,
+        batch_size=args.batch_size,
+        num_threads=args.threads,
+        quantize=not args.no_quantize
+    )
+
+    torch_vectors, torch_time = time_backend(torch_embeddings, texts, args.repeats)
+    onnx_vectors, onnx_time = time_backend(onnx_embeddings, texts, args.repeats)
+
+    # Cosine similarity between matching vectors
+    torch_norm = torch_vectors / np.linalg.norm(torch_vectors, axis=1, keepdims=True)
+    onnx_norm = onnx_vectors / np.linalg.norm(onnx_vectors, axis=1, keepdims=True)
+    cosine = (torch_norm * onnx_norm).sum(axis=1)
+
+    print(f"{'backend':<10}{'seconds':>10}{'chunks/s':>12}")
+    print(f"{'torch':<10}{torch_time:>10.3f}{len(texts) / torch_time:>12.1f}")
+    print(f"{'onnx':<10}{onnx_time:>10.3f}{len(texts) / onnx_time:>12.1f}")
+    print(f"Speedup: {torch_time / onnx_time:.2f}x")
+    print(f"Cosine similarity to torch: mean {cosine.mean():.5f}, min {cosine.min():.5f}")
+    print(f"Cosine drift (1 - similarity): mean {1 - cosine.mean():.5f}, max {1 - cosine.min():.5f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Measure conversation export time and peak memory.
+
+Exports a synthetic conversation in every format, both into one buffer and
+as a stream of chunks, and reports wall time and the peak Python heap
+allocation measured with tracemalloc:
+
+    python -m benchmarks.export_engine --turns 5000 --formats Text CSV PDF
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+from src.utils.analytics import ConversationAnalytics
+from src.utils.export import EXPORT_FORMATS, ConversationExporter
+
+SAMPLE_QUESTION = "What does the contract say about the payment schedule and late fees?"
+SAMPLE_ANSWER = (
+    "The contract requires payment within 30 days of the invoice date. Late payments "
+    "accrue a fee of 1.5% per month on the outstanding balance, and the supplier may "
+    "suspend deliveries after 60 days. "
+)
+
+def make_history(turns: int, answer_repeats: int) -> List[Dict]:
+    """A conversation of the given number of question/answer turns."""
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"{SAMPLE_QUESTION} ({i})"})
+        history.append({"role": "assistant", "content": SAMPLE_ANSWER * answer_repeats, "sources": []})
+    return history
+
+def measure(func: Callable[[], int]) -> Tuple[float, float, int]:
+    """Run func and return (seconds, peak MB allocated, bytes produced)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / (1024 * 1024), size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=5000)
+    parser.add_argument("--answer-repeats", type=int, default=3, help="Length of each answer, in sample paragraphs")
+    parser.add_argument("--formats", nargs="*", default=list(EXPORT_FORMATS), choices=list(EXPORT_FORMATS))
+    parser.add_argument("--analytics", action="store_true", help="Include the analytics section and charts in PDFs")
+    args = parser.parse_args()
+
+    history = make_history(args.turns, args.answer_repeats)
+    analytics = ConversationAnalytics() if args.analytics else None
+    if analytics is not None:
+        # Draw the charts once up front, as the analytics panel would have
+        analytics.generate_analytics(history)
+    exporter = ConversationExporter(analytics)
+    print(f"Exporting {len(history)} messages")
+
+    print(f"{'format':<8}{'mode':<10}{'seconds':>10}{'peak MB':>10}{'output MB':>11}")
+    for export_format in args.formats:
+        modes = {
+            "buffer": lambda: len(exporter.export(history, export_format)),
+            "stream": lambda: sum(len(chunk) for chunk in exporter.stream(history, export_format))
+        }
+        for mode, func in modes.items():
+            seconds, peak_mb, size = measure(func)
+            print(f"{export_format:<8}{mode:<10}{seconds:>10.3f}{peak_mb:>10.1f}{size / (1024 * 1024):>11.2f}")
+
+if __name__ == "__main__":
+    main()
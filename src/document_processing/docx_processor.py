@@ -4,19 +4,21 @@ from docx import Document as DocxDocument  # Renamed to avoid conflict
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document as LangchainDocument
 from src.utils.config import Config
+from src.utils.metrics import timed
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
 class DocxProcessor:
-    def __init__(self):
-        self.chunk_size = Config.CHUNK_SIZE
-        self.chunk_overlap = Config.CHUNK_OVERLAP
+    def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
+        self.chunk_size = Config.CHUNK_SIZE if chunk_size is None else chunk_size
+        self.chunk_overlap = Config.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap
         )
     
+    @timed("process_docx")
     def process_docx(self, file_path: str) -> List[LangchainDocument]:
         """Process a Word document and return a list of document chunks."""
         try:
@@ -26,19 +28,7 @@ class DocxProcessor:
             text = self._extract_text_from_docx(file_path)
             
             # Split text into chunks
-            chunks = self.text_splitter.split_text(text)
-            
-            # Create documents
-            documents = [
-                LangchainDocument(
-                    page_content=chunk,
-                    metadata={
-                        "source": os.path.basename(file_path),
-                        "page": i // 10  # Approximate page number
-                    }
-                )
-                for i, chunk in enumerate(chunks)
-            ]
+            documents = self.create_documents(text, file_path)
             
             logger.info(f"Created {len(documents)} document chunks from {file_path}")
             return documents
@@ -47,6 +37,20 @@ class DocxProcessor:
             logger.error(f"Error processing Word document {file_path}: {str(e)}")
             raise
     
+    def create_documents(self, text: str, file_path: str) -> List[LangchainDocument]:
+        """Split extracted text into document chunks."""
+        chunks = self.text_splitter.split_text(text)
+        
+        # Pages only exist once Word lays the document out, so chunks carry no page number
+        documents = [
+            LangchainDocument(
+                page_content=chunk,
+                metadata={"source": os.path.basename(file_path)}
+            )
+            for chunk in chunks
+        ]
+        return documents
+    
     def _extract_text_from_docx(self, file_path: str) -> str:
         """Extract text from a Word document."""
         try:
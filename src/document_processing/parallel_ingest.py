@@ -0,0 +1,192 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Tuple
+from langchain_core.documents import Document
+from src.document_processing.pdf_processor import PDFProcessor
+from src.document_processing.docx_processor import DocxProcessor
+from src.utils.config import Config
+from src.utils.logger import init_worker_logging, setup_logger, worker_log_queue
+from src.utils.metrics import get_default_metrics
+
+logger = setup_logger()
+
+_DONE = object()
+
+def process_file(file_path: str, chunk_size: int, chunk_overlap: int, pdf_streaming: bool) -> List[Document]:
+    """Extract and chunk one file. Runs inside a worker process."""
+    if file_path.endswith('.pdf'):
+        return PDFProcessor(chunk_size, chunk_overlap).process_pdf(file_path, streaming=pdf_streaming)
+    elif file_path.endswith('.docx'):
+        return DocxProcessor(chunk_size, chunk_overlap).process_docx(file_path)
+    raise ValueError(f"Unsupported file type: {file_path}")
+
+def iter_file_documents(file_path: str, chunk_size: int, chunk_overlap: int, pdf_streaming: bool) -> Iterable[Document]:
+    """Chunks of one file in this process; streamed PDFs are read and chunked lazily, page by page."""
+    if pdf_streaming and file_path.endswith('.pdf'):
+        return PDFProcessor(chunk_size, chunk_overlap).iter_documents(file_path)
+    return process_file(file_path, chunk_size, chunk_overlap, pdf_streaming)
+
+def extract_pdf_pages(file_path: str, start: int, stop: int) -> str:
+    """Extract the text of pages [start, stop) of a PDF. Runs inside a worker process."""
+    return PDFProcessor()._extract_text_from_pdf(file_path, start, stop)
+
+def process_pdf_pages(file_path: str, start: int, stop: int, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """Chunk pages [start, stop) of a PDF page by page. Runs inside a worker process."""
+    return list(PDFProcessor(chunk_size, chunk_overlap).iter_documents(file_path, start, stop))
+
+def run_task(func, *args):
+    """Run func in a worker process and return its result with the metrics it recorded."""
+    return func(*args), get_default_metrics().drain()
+
+class ParallelIngestor:
+    """Extract and chunk files across a process pool while the caller consumes finished files.
+
+    Files are yielded in input order through a bounded queue, so embedding one
+    file overlaps with extracting the next ones without letting extracted but
+    unembedded chunks pile up. Large PDFs are additionally split into page
+    ranges processed in parallel. In streaming mode each range is chunked page
+    by page in its worker; otherwise the ranges' text is joined and chunked as
+    a whole. Either way the output is identical to the serial path.
+
+    Streamed PDFs are yielded as lazy iterators, a page or a page range at a
+    time, so the caller can embed them in batches; consume each file's
+    documents before asking for the next file.
+    """
+
+    def __init__(self, max_workers: int = None, queue_size: int = None,
+                 chunk_size: int = None, chunk_overlap: int = None):
+        self.max_workers = max_workers or Config.INGEST_WORKERS
+        self.queue_size = queue_size or Config.INGEST_QUEUE_SIZE
+        self.chunk_size = Config.CHUNK_SIZE if chunk_size is None else chunk_size
+        self.chunk_overlap = Config.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+        self.pages_per_task = Config.INGEST_PAGES_PER_TASK
+        self.pdf_streaming = Config.PDF_STREAMING
+
+    def iter_documents(self, files: List[Tuple[str, str]]) -> Iterator[Tuple[str, Iterable[Document]]]:
+        """Yield (key, documents) for each (key, file_path) pair, in input order."""
+        if not files or self.max_workers <= 1 or (len(files) == 1 and not self._is_large_pdf(files[0][1])):
+            for key, file_path in files:
+                yield key, iter_file_documents(file_path, self.chunk_size, self.chunk_overlap, self.pdf_streaming)
+            return
+
+        logger.info(f"Ingesting {len(files)} files with {self.max_workers} worker processes")
+        results = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        # Workers log through the parent, which alone writes the log file
+        pool = ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=init_worker_logging, initargs=(worker_log_queue(),)
+        )
+        producer = threading.Thread(
+            target=self._produce, args=(pool, files, results, stop), daemon=True
+        )
+        producer.start()
+
+        try:
+            while True:
+                item = results.get()
+                if item is _DONE:
+                    break
+                key, documents, error = item
+                if error is not None:
+                    raise error
+                yield key, documents
+        finally:
+            stop.set()
+            producer.join()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _produce(self, pool: ProcessPoolExecutor, files: List[Tuple[str, str]],
+                 results: queue.Queue, stop: threading.Event):
+        """Submit files to the pool and hand finished ones to the consumer in order."""
+        # Cap outstanding work so finished-but-unconsumed results stay bounded
+        max_in_flight = self.max_workers + self.queue_size
+        pending = deque()
+        try:
+            for key, file_path in files:
+                if stop.is_set():
+                    return
+                pending.append((key, file_path, self._submit(pool, file_path)))
+                if len(pending) >= max_in_flight:
+                    self._put(results, self._collect(*pending.popleft()), stop)
+
+            while pending and not stop.is_set():
+                self._put(results, self._collect(*pending.popleft()), stop)
+        except Exception as e:
+            self._put(results, (None, None, e), stop)
+        finally:
+            self._put(results, _DONE, stop)
+
+    def _submit(self, pool: ProcessPoolExecutor, file_path: str):
+        num_pages = self._pdf_page_count(file_path)
+        if num_pages <= self.pages_per_task:
+            return pool.submit(
+                run_task, process_file, file_path, self.chunk_size, self.chunk_overlap, self.pdf_streaming
+            )
+
+        ranges = [
+            (start, min(start + self.pages_per_task, num_pages))
+            for start in range(0, num_pages, self.pages_per_task)
+        ]
+        if self.pdf_streaming:
+            return [
+                pool.submit(run_task, process_pdf_pages, file_path, start, stop, self.chunk_size, self.chunk_overlap)
+                for start, stop in ranges
+            ]
+        return [pool.submit(run_task, extract_pdf_pages, file_path, start, stop) for start, stop in ranges]
+
+    def _collect(self, key: str, file_path: str, job) -> Tuple[str, Iterable[Document], None]:
+        if not isinstance(job, list):
+            return key, self._result(job), None
+
+        # Page ranges come back in order
+        if self.pdf_streaming:
+            # Hand the ranges over as they finish, instead of waiting for the whole file
+            return key, self._iter_ranges(file_path, job), None
+
+        # Chunk the whole text like the serial path does
+        text = "".join(self._result(future) for future in job)
+        processor = PDFProcessor(self.chunk_size, self.chunk_overlap)
+        documents = processor.create_documents(text, file_path)
+        logger.info(f"Created {len(documents)} document chunks from {file_path}")
+        return key, documents, None
+
+    def _iter_ranges(self, file_path: str, job: list) -> Iterator[Document]:
+        count = 0
+        for future in job:
+            documents = self._result(future)
+            count += len(documents)
+            yield from documents
+        logger.info(f"Created {count} document chunks from {file_path}")
+
+    @staticmethod
+    def _result(future):
+        """Unpack a worker result, folding its metrics into this process."""
+        result, metrics = future.result()
+        get_default_metrics().merge(metrics)
+        return result
+
+    def _is_large_pdf(self, file_path: str) -> bool:
+        return self._pdf_page_count(file_path) > self.pages_per_task
+
+    @staticmethod
+    def _pdf_page_count(file_path: str) -> int:
+        """Page count of a PDF, or 0 for other files and unreadable PDFs."""
+        if not file_path.endswith('.pdf'):
+            return 0
+        try:
+            return PDFProcessor.count_pages(file_path)
+        except Exception:
+            # Let the worker surface the real error
+            return 0
+
+    @staticmethod
+    def _put(results: queue.Queue, item, stop: threading.Event):
+        """Block until the consumer has room, unless it has stopped listening."""
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
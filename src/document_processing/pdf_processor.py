@@ -1,44 +1,40 @@
 import os
-from typing import List
+from typing import Iterator, List, Tuple
 from pypdf import PdfReader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from src.utils.config import Config
+from src.utils.metrics import timed
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
 class PDFProcessor:
-    def __init__(self):
-        self.chunk_size = Config.CHUNK_SIZE
-        self.chunk_overlap = Config.CHUNK_OVERLAP
+    def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
+        self.chunk_size = Config.CHUNK_SIZE if chunk_size is None else chunk_size
+        self.chunk_overlap = Config.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap
+            chunk_overlap=self.chunk_overlap,
+            add_start_index=True
         )
     
-    def process_pdf(self, file_path: str) -> List[Document]:
+    @timed("process_pdf")
+    def process_pdf(self, file_path: str, streaming: bool = None) -> List[Document]:
         """Process a PDF file and return a list of document chunks."""
+        streaming = Config.PDF_STREAMING if streaming is None else streaming
         try:
             logger.info(f"Processing PDF: {file_path}")
             
-            # Extract text from PDF
-            text = self._extract_text_from_pdf(file_path)
-            
-            # Split text into chunks
-            chunks = self.text_splitter.split_text(text)
-            
-            # Create documents
-            documents = [
-                Document(
-                    page_content=chunk,
-                    metadata={
-                        "source": os.path.basename(file_path),
-                        "page": i // 10  # Approximate page number
-                    }
-                )
-                for i, chunk in enumerate(chunks)
-            ]
+            if streaming:
+                # Extract and split one page at a time
+                documents = list(self.iter_documents(file_path))
+            else:
+                # Extract text from PDF
+                text = self._extract_text_from_pdf(file_path)
+                
+                # Split text into chunks
+                documents = self.create_documents(text, file_path)
             
             logger.info(f"Created {len(documents)} document chunks from {file_path}")
             return documents
@@ -47,14 +43,62 @@ class PDFProcessor:
             logger.error(f"Error processing PDF {file_path}: {str(e)}")
             raise
     
-    def _extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from a PDF file."""
+    def create_documents(self, text: str, file_path: str) -> List[Document]:
+        """Split extracted text into document chunks."""
+        chunks = self.text_splitter.split_text(text)
+        
+        # Create documents
+        documents = [
+            Document(
+                page_content=chunk,
+                metadata={
+                    "source": os.path.basename(file_path),
+                    "page": i // 10  # Approximate page number
+                }
+            )
+            for i, chunk in enumerate(chunks)
+        ]
+        return documents
+    
+    def iter_documents(self, file_path: str, start: int = 0, stop: int = None) -> Iterator[Document]:
+        """Lazily yield chunks page by page.
+        
+        Chunks never span pages, so each one carries its true 1-based page number
+        and its character offset within that page ("start_index"). Only one page
+        of text is held in memory at a time.
+        """
+        source = os.path.basename(file_path)
+        for page_number, page_text in self.iter_pages(file_path, start, stop):
+            yield from self.split_page(source, page_number, page_text)
+    
+    def split_page(self, source: str, page_number: int, page_text: str) -> List[Document]:
+        """Chunk the text of one page the way iter_documents does."""
+        return self.text_splitter.create_documents(
+            [page_text],
+            metadatas=[{"source": source, "page": page_number}]
+        )
+    
+    def iter_pages(self, file_path: str, start: int = 0, stop: int = None) -> Iterator[Tuple[int, str]]:
+        """Lazily yield (page_number, text) for pages [start, stop) of a PDF file."""
+        try:
+            reader = PdfReader(file_path)
+            stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+            for index in range(start, stop):
+                yield index + 1, reader.pages[index].extract_text() or ""
+        except Exception as e:
+            logger.error(f"Error extracting text from PDF {file_path}: {str(e)}")
+            raise
+    
+    @staticmethod
+    def count_pages(file_path: str) -> int:
+        """Return the number of pages in a PDF file."""
+        return len(PdfReader(file_path).pages)
+    
+    def _extract_text_from_pdf(self, file_path: str, start: int = 0, stop: int = None) -> str:
+        """Extract text from a PDF file, optionally limited to pages [start, stop)."""
         try:
             reader = PdfReader(file_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+            return "".join(page.extract_text() + "\n" for page in reader.pages[start:stop])
         except Exception as e:
             logger.error(f"Error extracting text from PDF {file_path}: {str(e)}")
             raise
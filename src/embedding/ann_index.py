@@ -0,0 +1,159 @@
+import math
+from typing import Optional
+import faiss
+import numpy as np
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+
+# Subquantizer counts tried for IVF-PQ, most accurate first
+PQ_SUBQUANTIZERS = (64, 48, 32, 24, 16, 12, 8, 4, 2, 1)
+
+# Training points per IVF list that k-means needs for stable centroids
+TRAINING_POINTS_PER_LIST = 39
+
+def estimate_index_bytes(index_type: str, num_vectors: int, dim: int) -> int:
+    """Rough resident size of an index of the given type."""
+    if index_type == "hnsw":
+        # Full vectors plus about 2 * M neighbour links per vector
+        return num_vectors * (dim * 4 + Config.HNSW_M * 2 * 4)
+    if index_type == "ivfpq":
+        # PQ codes plus stored IDs and the direct map
+        return num_vectors * (pq_subquantizers(dim) + 16)
+    return num_vectors * dim * 4
+
+def choose_index_type(num_vectors: int, dim: int, memory_budget_mb: int = None) -> str:
+    """Pick flat, HNSW or IVF-PQ from corpus size and the index memory budget."""
+    if Config.ANN_INDEX_TYPE != "auto":
+        return Config.ANN_INDEX_TYPE
+
+    budget = (Config.ANN_MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb) * 1024 * 1024
+    if num_vectors < Config.ANN_MIN_VECTORS and estimate_index_bytes("flat", num_vectors, dim) <= budget:
+        return "flat"
+    if estimate_index_bytes("hnsw", num_vectors, dim) <= budget:
+        return "hnsw"
+    return "ivfpq"
+
+def pq_subquantizers(dim: int) -> int:
+    """Largest configured number of PQ subquantizers that divides the dimension."""
+    for m in (Config.PQ_M, *PQ_SUBQUANTIZERS):
+        if 0 < m <= dim and dim % m == 0:
+            return m
+    return 1
+
+def build_index(vectors: np.ndarray, index_type: str, holdout: np.ndarray = None) -> faiss.Index:
+    """Create an empty, trained index of the given type for an (n, dim) float32 array.
+
+    IVF-PQ is trained on a sample of the vectors that excludes the rows in
+    holdout, so recall can be measured on queries the quantizer has not seen.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    num_vectors, dim = vectors.shape
+    if index_type == "ivfpq" and num_vectors < 2 ** Config.PQ_BITS:
+        logger.warning(f"Too few vectors ({num_vectors}) to train IVF-PQ, using a flat index")
+        index_type = "flat"
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, Config.HNSW_M)
+        index.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+    else:
+        nlist = ivf_lists(num_vectors)
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, nlist, pq_subquantizers(dim), Config.PQ_BITS)
+        index.train(training_sample(vectors, nlist, holdout))
+        # Allow reconstruct() so the index can be rebuilt after removals
+        index.make_direct_map()
+
+    configure_search(index)
+    logger.info(f"Built {index_type} index for {num_vectors} vectors")
+    return index
+
+def ivf_lists(num_vectors: int) -> int:
+    """Number of IVF lists: about 4 * sqrt(n), with enough points to train each list."""
+    nlist = int(4 * math.sqrt(num_vectors))
+    return max(1, min(nlist, num_vectors // TRAINING_POINTS_PER_LIST))
+
+def training_sample(vectors: np.ndarray, nlist: int, holdout: np.ndarray = None) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    candidates = np.arange(len(vectors))
+    # Keep the held-out rows only when excluding them would leave too few points for the PQ codebooks
+    if holdout is not None and len(vectors) - len(holdout) >= 2 ** Config.PQ_BITS:
+        candidates = np.setdiff1d(candidates, holdout)
+    # PQ codebooks have 2^bits centroids each and need as many points as the coarse lists
+    size = max(nlist, 2 ** Config.PQ_BITS) * TRAINING_POINTS_PER_LIST
+    if len(candidates) > size:
+        candidates = rng.choice(candidates, size, replace=False)
+    return vectors[np.sort(candidates)]
+
+def configure_search(index: faiss.Index):
+    """Apply the configured nprobe / efSearch search-time settings."""
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = Config.HNSW_EF_SEARCH
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = Config.IVF_NPROBE
+
+def empty_copy(index: faiss.Index) -> faiss.Index:
+    """Return an empty index of the same type, keeping any trained quantizers."""
+    if isinstance(index, faiss.IndexHNSW):
+        copy = faiss.IndexHNSWFlat(index.d, Config.HNSW_M)
+        copy.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+    else:
+        copy = faiss.clone_index(index)
+        copy.reset()
+    configure_search(copy)
+    return copy
+
+def selector_for(positions: np.ndarray) -> faiss.IDSelector:
+    """Select the given sorted positions, as a cheap range check when they are contiguous."""
+    if positions[-1] - positions[0] + 1 == len(positions):
+        return faiss.IDSelectorRange(int(positions[0]), int(positions[-1]) + 1)
+    return faiss.IDSelectorBatch(positions.astype(np.int64))
+
+def search_parameters(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """Search parameters that restrict a search to the selected IDs."""
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=Config.HNSW_EF_SEARCH)
+    if faiss.try_extract_index_ivf(index) is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=Config.IVF_NPROBE)
+    return faiss.SearchParameters(sel=selector)
+
+def index_type_of(index: faiss.Index) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if faiss.try_extract_index_ivf(index) is not None:
+        return "ivfpq"
+    return "flat"
+
+def sample_queries(num_vectors: int, sample_size: int = None) -> np.ndarray:
+    """Pick the rows held out as recall queries."""
+    sample_size = min(sample_size or Config.ANN_RECALL_SAMPLE, num_vectors)
+    rng = np.random.default_rng(1)
+    return np.sort(rng.choice(num_vectors, sample_size, replace=False))
+
+def measure_recall(index: faiss.Index, vectors: np.ndarray, queries: np.ndarray, k: int = None) -> Optional[float]:
+    """Recall@k of an index against exact search over the same vectors.
+
+    The queries are rows of the index, so each one's match with itself is
+    left out of both result lists; otherwise it counts as a free hit.
+    """
+    k = min(k or Config.ANN_RECALL_K, len(vectors) - 1)
+    if not len(queries) or k <= 0:
+        return None
+
+    query_vectors = np.ascontiguousarray(vectors[queries], dtype=np.float32)
+    _, exact = faiss.knn(query_vectors, np.ascontiguousarray(vectors, dtype=np.float32), k + 1)
+    _, approximate = index.search(query_vectors, k + 1)
+    found = 0
+    for query, a, e in zip(queries, approximate, exact):
+        a = [position for position in a if position >= 0 and position != query][:k]
+        e = [position for position in e if position != query][:k]
+        found += len(set(a) & set(e))
+    return found / (len(queries) * k)
@@ -1,27 +1,186 @@
-from typing import List
+import itertools
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
 from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
+from src.embedding.ann_index import build_index, choose_index_type, configure_search, measure_recall, sample_queries
+from src.embedding.embedding_cache import CachedEmbeddings
+from src.embedding.index_cache import VectorIndexCache, get_default_cache
+from src.embedding.onnx_embeddings import OnnxEmbeddings
 from src.utils.config import Config
+from src.utils.metrics import timed
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
+def create_embeddings(model_name: str = None, backend: str = None) -> Embeddings:
+    """Load the embedding model for a backend ("torch", "onnx" or "fake")."""
+    model_name = model_name or Config.EMBEDDING_MODEL
+    backend = (backend or Config.EMBEDDING_BACKEND).lower()
+    if backend == "onnx":
+        return OnnxEmbeddings(model_name=model_name)
+    if backend == "torch":
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={'device': 'cpu'}
+        )
+    if backend == "fake":
+        # Hash-seeded vectors for offline, reproducible runs
+        return DeterministicFakeEmbedding(size=Config.FAKE_EMBEDDING_SIZE)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
 class DocumentEmbedder:
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, cache: VectorIndexCache = None, backend: str = None,
+                 embeddings: Embeddings = None):
         self.model_name = model_name or Config.EMBEDDING_MODEL
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=self.model_name,
-            model_kwargs={'device': 'cpu'}
+        self.backend = (backend or Config.EMBEDDING_BACKEND).lower()
+        
+        # Vectors differ slightly between backends, so caches must tell them apart
+        self.embedding_id = self.model_name if self.backend == "torch" else f"{self.model_name}@{self.backend}"
+        
+        # A preloaded model can be passed in, e.g. the shared one from the component registry
+        self.embeddings = embeddings or create_embeddings(self.model_name, self.backend)
+        
+        # Only encode chunks whose text has not been embedded before
+        if Config.EMBEDDING_CACHE_ENABLED:
+            self.embeddings = CachedEmbeddings(self.embeddings, self.embedding_id)
+
+        # Fall back to the shared on-disk cache unless caching is disabled
+        if cache is None and Config.INDEX_CACHE_ENABLED:
+            cache = get_default_cache()
+        self.cache = cache
+        self.last_index_report: Optional[Dict] = None  # Type, size and recall of the last built index
+        self.last_embed_seconds = 0.0  # Time spent embedding in the last create_vector_store call
+        self._dim: Optional[int] = None
+
+    @property
+    def embedding_dim(self) -> int:
+        """Vector size of the model, probed with one embedding the first time it is needed."""
+        if self._dim is None:
+            self._dim = len(self.embeddings.embed_query("dimension probe"))
+        return self._dim
+
+    def embedding_cache_stats(self) -> Optional[Dict]:
+        """Return chunk embedding cache hit/miss counts, or None when disabled."""
+        if isinstance(self.embeddings, CachedEmbeddings):
+            return self.embeddings.stats()
+        return None
+
+    def reset_embedding_cache_stats(self):
+        if isinstance(self.embeddings, CachedEmbeddings):
+            self.embeddings.reset_stats()
+
+    def cache_key(self, content_hashes: List[str], index_type: str = "flat") -> str:
+        """Build the index cache key for a set of files under the current settings."""
+        return VectorIndexCache.make_key(
+            content_hashes, self.embedding_id, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP, Config.PDF_STREAMING,
+            index_type
         )
-    
-    def create_vector_store(self, documents: List[Document]) -> FAISS:
-        """Create a vector store from a list of documents."""
+
+    def load_cached_vector_store(self, content_hashes: List[str], index_type: str = "flat") -> Optional[FAISS]:
+        """Return a previously built vector store for these files, if cached."""
+        if self.cache is None or not content_hashes:
+            return None
         try:
+            vector_store = self.cache.load(self.cache_key(content_hashes, index_type), self.embeddings)
+            if vector_store is not None:
+                configure_search(vector_store.index)
+            return vector_store
+        except Exception as e:
+            logger.warning(f"Index cache lookup failed: {str(e)}")
+            return None
+
+    @timed("create_vector_store")
+    def create_vector_store(self, documents: Iterable[Document], content_hashes: List[str] = None,
+                            ids: List[str] = None, index_type: str = None) -> FAISS:
+        """Create a vector store from documents, which may be a lazy iterator.
+
+        The index type defaults to ANN_INDEX_TYPE, where "auto" picks flat,
+        HNSW or IVF-PQ from the number of chunks and ANN_MEMORY_BUDGET_MB.
+        When the content hashes of the source files are given, the store is
+        looked up in and saved to the on-disk index cache; on a hit the
+        documents are never consumed.
+        """
+        try:
+            index_type = index_type or Config.ANN_INDEX_TYPE
+            if index_type == "auto":
+                # Resolve before the cache lookup, so the key names the index type actually built
+                documents = list(documents)
+                index_type = choose_index_type(len(documents), self.embedding_dim)
+            self.last_embed_seconds = 0.0
+            vector_store = self.load_cached_vector_store(content_hashes, index_type)
+            if vector_store is not None:
+                return vector_store
+
+            documents, vectors = self.embed_in_batches(documents)
             logger.info(f"Creating vector store with {len(documents)} documents")
-            vector_store = FAISS.from_documents(documents, self.embeddings)
+            texts = [doc.page_content for doc in documents]
+            vector_store = self.build_vector_store(
+                texts, vectors, [doc.metadata for doc in documents], ids, index_type
+            )
             logger.info("Vector store created successfully")
+
+            if self.cache is not None and content_hashes:
+                try:
+                    self.cache.save(self.cache_key(content_hashes, index_type), vector_store, {
+                        "model": self.embedding_id,
+                        "chunk_size": Config.CHUNK_SIZE,
+                        "chunk_overlap": Config.CHUNK_OVERLAP,
+                        "pdf_streaming": Config.PDF_STREAMING,
+                        "sources": sorted({doc.metadata.get("source", "") for doc in documents})
+                    })
+                except Exception as e:
+                    logger.warning(f"Failed to save vector store to index cache: {str(e)}")
+
             return vector_store
         except Exception as e:
             logger.error(f"Error creating vector store: {str(e)}")
             raise
+
+    def embed_in_batches(self, documents: Iterable[Document],
+                         batch_size: int = None) -> Tuple[List[Document], np.ndarray]:
+        """Embed documents as they arrive, batch_size at a time, into one float32 array.
+
+        Chunks are embedded as they are produced rather than after the whole
+        file is chunked, and vectors never pile up as lists of Python floats.
+        """
+        batch_size = batch_size or Config.INGEST_EMBED_BATCH
+        iterator = iter(documents)
+        docs: List[Document] = []
+        parts: List[np.ndarray] = []
+        self.last_embed_seconds = 0.0
+        while True:
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                break
+            start = time.perf_counter()
+            parts.append(np.asarray(self.embeddings.embed_documents([doc.page_content for doc in batch]),
+                                    dtype=np.float32))
+            self.last_embed_seconds += time.perf_counter() - start
+            docs.extend(batch)
+        if not parts:
+            return docs, np.empty((0, self.embedding_dim), dtype=np.float32)
+        return docs, np.concatenate(parts)
+
+    def build_vector_store(self, texts: List[str], vectors: np.ndarray, metadatas: List[Dict] = None,
+                           ids: List[str] = None, index_type: str = "auto") -> FAISS:
+        """Index precomputed embeddings, reporting recall against exact search for ANN indexes."""
+        num_vectors, dim = vectors.shape
+        if index_type == "auto":
+            index_type = choose_index_type(num_vectors, dim)
+
+        holdout = sample_queries(num_vectors) if index_type != "flat" else None
+        index = build_index(vectors, index_type, holdout)
+        vector_store = FAISS(self.embeddings, index, InMemoryDocstore(), {})
+        if num_vectors:
+            vector_store.add_embeddings(zip(texts, vectors), metadatas=metadatas, ids=ids)
+
+        recall = measure_recall(index, vectors, holdout) if holdout is not None else None
+        self.last_index_report = {"index_type": index_type, "num_vectors": num_vectors, "recall": recall}
+        if recall is not None:
+            logger.info(f"{index_type} index recall@{Config.ANN_RECALL_K} against flat search: {recall:.3f}")
+        return vector_store
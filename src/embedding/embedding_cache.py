@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Keep IN (...) lookups under SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+class ChunkEmbeddingStore:
+    """SQLite-backed mapping from chunk hash to a float32 embedding vector."""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.EMBEDDING_CACHE_PATH
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the stored vectors for whichever keys are present."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+                batch = keys[start:start + LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})", batch
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        """Store vectors, keeping any that already exist."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (hash, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends chunks it has not seen before to the model.
+
+    Chunks are keyed by a hash of the model name and the chunk text, so identical
+    text is encoded once across documents, uploads and sessions.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, store: ChunkEmbeddingStore = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.store = store or get_default_store()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, encoding only those missing from the cache."""
+        keys = [self._hash(text) for text in texts]
+
+        # Look up each distinct chunk once
+        unique_texts = dict(zip(keys, texts))
+        vectors = self.store.get_many(list(unique_texts))
+
+        missing = [key for key in unique_texts if key not in vectors]
+        if missing:
+            encoded = self.embeddings.embed_documents([unique_texts[key] for key in missing])
+            new_vectors = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(missing, encoded)}
+            self.store.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        logger.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+
+        return [vectors[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Queries are one-off, so they bypass the cache."""
+        return self.embeddings.embed_query(text)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def _hash(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_default_store() -> ChunkEmbeddingStore:
+    """Return the process-wide chunk embedding store."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ChunkEmbeddingStore()
+        return _default_store
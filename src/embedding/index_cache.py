@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+    from langchain_community.vectorstores import FAISS
+
+logger = setup_logger()
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "index.pkl"
+MANIFEST_FILE = "manifest.json"
+
+def hash_file_content(data: bytes) -> str:
+    """Return the SHA-256 digest of a file's raw content."""
+    return hashlib.sha256(data).hexdigest()
+
+class VectorIndexCache:
+    """On-disk, content-addressed cache of FAISS vector stores with LRU eviction."""
+
+    def __init__(self, cache_dir: str = None, max_size_mb: int = None):
+        self.cache_dir = cache_dir or Config.INDEX_CACHE_DIR
+        max_size_mb = Config.INDEX_CACHE_MAX_MB if max_size_mb is None else max_size_mb
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._manifest_path = os.path.join(self.cache_dir, MANIFEST_FILE)
+        self._manifest = self._load_manifest()
+
+    @staticmethod
+    def make_key(content_hashes: List[str], model_name: str, chunk_size: int, chunk_overlap: int,
+                 pdf_streaming: bool = False, index_type: str = "flat") -> str:
+        """Build a cache key from file contents and the settings that shape the index."""
+        payload = {
+            "files": sorted(content_hashes),
+            "model": model_name,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap
+        }
+        # Page-by-page PDF chunking produces different chunks
+        if pdf_streaming:
+            payload["pdf_streaming"] = True
+        # Stores built with other index types hold different structures
+        if index_type != "flat":
+            payload["index_type"] = index_type
+        payload = json.dumps(payload, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def load(self, key: str, embeddings: "Embeddings") -> Optional["FAISS"]:
+        """Load a cached vector store, or return None on a miss."""
+        with self._lock:
+            entry = self._manifest.get(key)
+            entry_dir = self._entry_dir(key)
+            if entry is None or not os.path.exists(os.path.join(entry_dir, INDEX_FILE)):
+                return None
+
+            try:
+                index = self._read_index(os.path.join(entry_dir, INDEX_FILE))
+                with open(os.path.join(entry_dir, DOCSTORE_FILE), "rb") as f:
+                    docstore, index_to_docstore_id = pickle.load(f)
+            except Exception as e:
+                logger.warning(f"Discarding unreadable index cache entry {key}: {str(e)}")
+                self._remove_entry(key)
+                self._save_manifest()
+                return None
+
+            entry["last_access"] = time.time()
+            entry["hits"] = entry.get("hits", 0) + 1
+            self._save_manifest()
+
+        logger.info(f"Loaded vector store from index cache entry {key}")
+        # Imported on first load so rendering cache stats does not pull in langchain
+        from langchain_community.vectorstores import FAISS
+        return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+    def save(self, key: str, vector_store: "FAISS", metadata: Dict = None):
+        """Persist a vector store under the given key and evict old entries if needed."""
+        with self._lock:
+            entry_dir = self._entry_dir(key)
+            tmp_dir = f"{entry_dir}.tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+            # Write to a temporary directory first so readers never see partial entries
+            vector_store.save_local(tmp_dir)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+
+            now = time.time()
+            self._manifest[key] = {
+                **(metadata or {}),
+                "num_vectors": vector_store.index.ntotal,
+                "size_bytes": self._dir_size(entry_dir),
+                "created": now,
+                "last_access": now,
+                "hits": 0
+            }
+            self._evict(keep=key)
+            self._save_manifest()
+
+        logger.info(f"Saved vector store to index cache entry {key}")
+
+    def entries(self) -> List[Dict]:
+        """List cache entries, most recently used first."""
+        with self._lock:
+            entries = [{"key": key, **entry} for key, entry in self._manifest.items()]
+        entries.sort(key=lambda e: e["last_access"], reverse=True)
+        return entries
+
+    def stats(self) -> Dict:
+        """Summarize cache usage."""
+        with self._lock:
+            return {
+                "entries": len(self._manifest),
+                "size_bytes": sum(e["size_bytes"] for e in self._manifest.values()),
+                "max_size_bytes": self.max_size_bytes,
+                "cache_dir": self.cache_dir
+            }
+
+    def remove(self, key: str):
+        """Remove a single cache entry."""
+        with self._lock:
+            self._remove_entry(key)
+            self._save_manifest()
+
+    def clear(self):
+        """Remove every cache entry."""
+        with self._lock:
+            for key in list(self._manifest):
+                self._remove_entry(key)
+            self._save_manifest()
+        logger.info("Index cache cleared")
+
+    def _evict(self, keep: str = None):
+        """Drop least recently used entries until the cache fits its size budget."""
+        total = sum(e["size_bytes"] for e in self._manifest.values())
+        candidates = sorted(
+            (k for k in self._manifest if k != keep),
+            key=lambda k: self._manifest[k]["last_access"]
+        )
+        for key in candidates:
+            if total <= self.max_size_bytes:
+                break
+            total -= self._manifest[key]["size_bytes"]
+            self._remove_entry(key)
+            logger.info(f"Evicted index cache entry {key}")
+
+    def _remove_entry(self, key: str):
+        self._manifest.pop(key, None)
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    @staticmethod
+    def _read_index(path: str):
+        """Read a FAISS index, memory-mapping it when the index type allows."""
+        import faiss
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+        except RuntimeError:
+            return faiss.read_index(path)
+
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        return sum(
+            os.path.getsize(os.path.join(path, name))
+            for name in os.listdir(path)
+        )
+
+    def _load_manifest(self) -> Dict:
+        if not os.path.exists(self._manifest_path):
+            return {}
+        try:
+            with open(self._manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable index cache manifest: {str(e)}")
+            return {}
+
+        # Drop entries whose files have disappeared
+        return {
+            key: entry for key, entry in manifest.items()
+            if os.path.exists(os.path.join(self._entry_dir(key), INDEX_FILE))
+        }
+
+    def _save_manifest(self):
+        tmp_path = f"{self._manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_path)
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache() -> VectorIndexCache:
+    """Return the process-wide index cache shared by all sessions."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = VectorIndexCache()
+        return _default_cache
@@ -0,0 +1,335 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from src.embedding.ann_index import (
+    build_index, choose_index_type, empty_copy, index_type_of, measure_recall, sample_queries,
+    search_parameters, selector_for
+)
+from src.embedding.embedder import DocumentEmbedder
+from src.embedding.index_cache import VectorIndexCache
+from src.retrieval.lexical_index import LexicalIndex
+from src.retrieval.search_scope import SearchScope
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+class VectorIndexManager:
+    """Maintain one live vector store and track which chunks belong to which file.
+
+    Files are keyed by the hash of their content. Adding a file embeds (or loads
+    from the index cache) only that file's chunks, and removing a file deletes
+    its vectors from the live store in place. A BM25 index over the same
+    chunks is kept in step for hybrid retrieval.
+    """
+
+    def __init__(self, embedder: DocumentEmbedder):
+        self.embedder = embedder
+        self.chunk_size = Config.CHUNK_SIZE
+        self.chunk_overlap = Config.CHUNK_OVERLAP
+        self.pdf_streaming = Config.PDF_STREAMING
+        self.vector_store: Optional[FAISS] = None
+        self.file_chunks: Dict[str, List[str]] = {}  # content hash -> chunk IDs
+        self.file_names: Dict[str, str] = {}  # content hash -> source file name
+        self.lexical_index = LexicalIndex()
+        self.index_recall: Optional[float] = None  # Recall@k of the live ANN index against flat search
+        # Original float vectors by live position; IVF-PQ only keeps lossy codes, so rebuilds start from these
+        self._vectors: Optional[np.ndarray] = None
+        self._layout: Optional[Tuple[Dict[str, Tuple[int, int]], np.ndarray]] = None  # File ranges, chunk pages
+        self._lock = threading.RLock()
+
+    def matches_settings(self) -> bool:
+        """Whether the index was built with the current chunking settings."""
+        return (self.chunk_size, self.chunk_overlap, self.pdf_streaming) == (
+            Config.CHUNK_SIZE, Config.CHUNK_OVERLAP, Config.PDF_STREAMING
+        )
+
+    def has_file(self, content_hash: str) -> bool:
+        return content_hash in self.file_chunks
+
+    @property
+    def num_chunks(self) -> int:
+        return sum(len(ids) for ids in self.file_chunks.values())
+
+    @property
+    def index_type(self) -> Optional[str]:
+        return index_type_of(self.vector_store.index) if self.vector_store is not None else None
+
+    def fingerprint(self, scope: SearchScope = None) -> str:
+        """Identify the indexed (or scoped) document set together with the settings that shaped it."""
+        content_hashes = list(self.file_chunks)
+        if scope is not None and scope.content_hashes:
+            content_hashes = [content_hash for content_hash in scope.content_hashes if content_hash in self.file_chunks]
+        key = VectorIndexCache.make_key(
+            content_hashes, self.embedder.embedding_id, self.chunk_size, self.chunk_overlap,
+            self.pdf_streaming
+        )
+        if scope is not None and scope.pages is not None:
+            key = f"{key}:pages={scope.pages[0]}-{scope.pages[1]}"
+        return key
+
+    def similarity_search(self, query: str, k: int, scope: SearchScope) -> List[Document]:
+        """Search only the chunks inside the scope, instead of filtering a global search."""
+        embedding = np.asarray([self.embedder.embeddings.embed_query(query)], dtype=np.float32)
+        return self.search_by_vectors(embedding, k, scope)[0]
+
+    def search_by_vectors(self, embeddings: np.ndarray, k: int, scope: SearchScope = None) -> List[List[Document]]:
+        """Search a batch of query embeddings with one FAISS call, optionally inside a scope."""
+        with self._lock:
+            if self.vector_store is None:
+                return [[] for _ in embeddings]
+            index = self.vector_store.index
+
+            if scope is None or scope.is_unrestricted():
+                _, found = index.search(embeddings, min(k, index.ntotal))
+            else:
+                positions = self.scope_positions(scope)
+                if not len(positions):
+                    return [[] for _ in embeddings]
+                k = min(k, len(positions))
+                if len(positions) <= Config.ANN_MIN_VECTORS:
+                    # Small scopes are searched exactly over just their own vectors
+                    vectors = self._vectors[positions]
+                    _, found = faiss.knn(embeddings, vectors, k)
+                    found = positions[found]
+                else:
+                    selector = selector_for(positions)
+                    _, found = index.search(embeddings, k, params=search_parameters(index, selector))
+                logger.info(f"Scoped search of {len(embeddings)} queries over {len(positions)} chunks ({scope.key()})")
+
+            results = []
+            for row in found:
+                docs = [self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[int(position)])
+                        for position in row if position >= 0]
+                results.append([doc for doc in docs if isinstance(doc, Document)])
+            return results
+
+    def get_documents(self, chunk_ids: List[str]) -> List[Document]:
+        """Look up chunks by ID, skipping any that are no longer indexed."""
+        with self._lock:
+            if self.vector_store is None:
+                return []
+            docs = [self.vector_store.docstore.search(chunk_id) for chunk_id in chunk_ids]
+        return [doc for doc in docs if isinstance(doc, Document)]
+
+    def lexical_search(self, query: str, k: int, scope: SearchScope = None) -> List[Tuple[str, float]]:
+        """BM25 search, optionally inside a scope. Returns (chunk ID, score) pairs."""
+        with self._lock:
+            chunk_ids = None
+            if scope is not None and not scope.is_unrestricted():
+                chunk_ids = self.scope_chunk_ids(scope)
+            return self.lexical_index.search(query, k, chunk_ids=chunk_ids)
+
+    def scope_chunk_ids(self, scope: SearchScope) -> List[str]:
+        """Chunk IDs inside the scope."""
+        with self._lock:
+            return [self.vector_store.index_to_docstore_id[int(position)] for position in self.scope_positions(scope)]
+
+    def scope_positions(self, scope: SearchScope) -> np.ndarray:
+        """Sorted live index positions of the chunks inside the scope."""
+        with self._lock:
+            if self.vector_store is None:
+                return np.empty(0, dtype=np.int64)
+            ranges, pages = self._index_layout()
+
+            content_hashes = scope.content_hashes or list(ranges)
+            parts = [np.arange(*ranges[content_hash]) for content_hash in content_hashes if content_hash in ranges]
+            positions = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+            if scope.pages is not None:
+                chunk_pages = pages[positions]
+                positions = positions[(chunk_pages >= scope.pages[0]) & (chunk_pages <= scope.pages[1])]
+            return np.sort(positions)
+
+    def add_cached_file(self, content_hash: str, source_name: str) -> bool:
+        """Add a file from the index cache without reprocessing it. Returns False on a miss."""
+        if self.has_file(content_hash):
+            return True
+        file_store = self.embedder.load_cached_vector_store([content_hash])
+        if file_store is None:
+            return False
+        self.add_file_store(content_hash, source_name, file_store)
+        return True
+
+    def add_file(self, content_hash: str, source_name: str, documents: Iterable[Document]) -> int:
+        """Embed and add one file's chunks, which may stream in lazily. Returns the number of chunks added."""
+        if self.has_file(content_hash):
+            return 0
+        return self.add_file_store(content_hash, source_name, self.build_file_store(content_hash, documents))
+
+    def build_file_store(self, content_hash: str, documents: Iterable[Document]) -> FAISS:
+        """Embed one file's chunks into a flat store of their own, or load it from the index cache.
+
+        Leaves the live index alone and takes no lock, so searches carry on
+        while a file is embedded; add_file_store merges the result.
+        """
+        ids: List[str] = []  # Filled in as create_vector_store consumes the chunks, before it indexes them
+
+        def with_chunk_ids():
+            for position, doc in enumerate(documents):
+                doc.metadata["chunk_id"] = self.chunk_id(content_hash, position)
+                ids.append(doc.metadata["chunk_id"])
+                yield doc
+
+        return self.embedder.create_vector_store(
+            with_chunk_ids(), content_hashes=[content_hash], ids=ids, index_type="flat"
+        )
+
+    def add_file_store(self, content_hash: str, source_name: str, file_store: FAISS) -> int:
+        """Merge a file's store into the live index. Returns the number of chunks added, 0 if already indexed."""
+        with self._lock:
+            # Another thread may have added the same file while this store was built
+            if self.has_file(content_hash):
+                return 0
+            num_added = file_store.index.ntotal
+            if not num_added:
+                self.file_chunks[content_hash] = []
+                self.file_names[content_hash] = source_name
+                return 0
+            self._merge_file_store(content_hash, source_name, file_store)
+            return num_added
+
+    def remove_file(self, content_hash: str) -> int:
+        """Delete a file's vectors from the live store. Returns the number of chunks removed."""
+        with self._lock:
+            positions = self._file_positions(content_hash)
+            ids = self.file_chunks.pop(content_hash, None)
+            source_name = self.file_names.pop(content_hash, None)
+            if not ids:
+                return 0
+
+            keep = np.delete(np.arange(self.vector_store.index.ntotal), positions)
+            self._vectors = self._vectors[keep]
+            if self.index_type == "flat":
+                self.vector_store.delete(ids)
+            else:
+                self._delete_from_ann_index(ids, keep)
+            self.lexical_index.remove(ids)
+            self._layout = None
+            self._select_index_type()
+            logger.info(f"Removed {len(ids)} chunks of {source_name} from the vector store")
+            return len(ids)
+
+    def reset(self):
+        """Drop every file and the live vector store."""
+        with self._lock:
+            self.vector_store = None
+            self.file_chunks = {}
+            self.file_names = {}
+            self.lexical_index = LexicalIndex()
+            self.index_recall = None
+            self._vectors = None
+            self._layout = None
+            self.chunk_size = Config.CHUNK_SIZE
+            self.chunk_overlap = Config.CHUNK_OVERLAP
+            self.pdf_streaming = Config.PDF_STREAMING
+
+    def close(self):
+        """Drop the index; the counterpart of RemoteIndexManager.close()."""
+        self.reset()
+
+    @staticmethod
+    def chunk_id(content_hash: str, position: int) -> str:
+        """Deterministic chunk ID so cached per-file stores stay addressable."""
+        return f"{content_hash[:16]}:{position}"
+
+    def _merge_file_store(self, content_hash: str, source_name: str, file_store: FAISS):
+        """Copy a per-file flat store's vectors and documents into the live store."""
+        ntotal = file_store.index.ntotal
+        ids = [file_store.index_to_docstore_id[i] for i in range(ntotal)]
+        docs = [file_store.docstore.search(chunk_id) for chunk_id in ids]
+        vectors = file_store.index.reconstruct_n(0, ntotal)
+
+        if self.vector_store is None:
+            self.vector_store = FAISS(
+                self.embedder.embeddings,
+                faiss.IndexFlatL2(vectors.shape[1]),
+                InMemoryDocstore(),
+                {}
+            )
+
+        texts = [doc.page_content for doc in docs]
+        # Cached stores are keyed by content, so they carry the name the file was first uploaded under
+        self.vector_store.add_embeddings(
+            zip(texts, vectors),
+            metadatas=[dict(doc.metadata, source=source_name) for doc in docs],
+            ids=ids
+        )
+        self._vectors = vectors if self._vectors is None else np.vstack([self._vectors, vectors])
+        self.lexical_index.add(ids, texts)
+        self.file_chunks[content_hash] = ids
+        self.file_names[content_hash] = source_name
+        self._layout = None
+        logger.info(f"Added {ntotal} chunks of {source_name} to the vector store")
+        self._select_index_type()
+
+    def _file_positions(self, content_hash: str) -> Optional[np.ndarray]:
+        """Live positions of a file's chunks.
+
+        Files are merged in order and removals keep the order of what is left,
+        so each file is one run of positions after the files added before it.
+        """
+        start = 0
+        for other, ids in self.file_chunks.items():
+            if other == content_hash:
+                return np.arange(start, start + len(ids))
+            start += len(ids)
+        return None
+
+    def _index_layout(self) -> Tuple[Dict[str, Tuple[int, int]], np.ndarray]:
+        """Position range of every file and page number of every chunk, rebuilt after changes."""
+        if self._layout is None:
+            index_to_docstore_id = self.vector_store.index_to_docstore_id
+            id_to_position = {doc_id: position for position, doc_id in index_to_docstore_id.items()}
+            ranges = {}
+            for content_hash, ids in self.file_chunks.items():
+                if ids:
+                    start = id_to_position[ids[0]]
+                    ranges[content_hash] = (start, start + len(ids))
+
+            pages = np.full(self.vector_store.index.ntotal, -1, dtype=np.int32)
+            for position, doc_id in index_to_docstore_id.items():
+                doc = self.vector_store.docstore.search(doc_id)
+                if isinstance(doc, Document):
+                    pages[position] = doc.metadata.get("page", -1)
+            self._layout = (ranges, pages)
+        return self._layout
+
+    def _select_index_type(self):
+        """Rebuild the live index when the corpus size calls for a different index type."""
+        index = self.vector_store.index
+        if index.ntotal == 0:
+            return
+        target = choose_index_type(index.ntotal, index.d)
+        if target == self.index_type:
+            return
+
+        logger.info(f"Rebuilding live index of {index.ntotal} vectors as {target}")
+        vectors = self._vectors
+        holdout = sample_queries(len(vectors)) if target != "flat" else None
+        new_index = build_index(vectors, target, holdout)
+        new_index.add(vectors)
+        # Positions are unchanged, so index_to_docstore_id stays valid
+        self.vector_store.index = new_index
+        self.index_recall = measure_recall(new_index, vectors, holdout) if holdout is not None else None
+        if self.index_recall is not None:
+            logger.info(f"Live {target} index recall against flat search: {self.index_recall:.3f}")
+
+    def _delete_from_ann_index(self, ids: List[str], keep: np.ndarray):
+        """Delete vectors from an HNSW or IVF-PQ index by refilling it without them.
+
+        Neither supports renumbering removals the way FAISS.delete expects, so
+        the original vectors at the kept positions are re-added to an empty
+        copy that keeps the trained quantizers.
+        """
+        new_index = empty_copy(self.vector_store.index)
+        new_index.add(self._vectors)
+        self.vector_store.index = new_index
+        self.vector_store.index_to_docstore_id = {
+            new_position: self.vector_store.index_to_docstore_id[position]
+            for new_position, position in enumerate(keep.tolist())
+        }
+        self.vector_store.docstore.delete(ids)
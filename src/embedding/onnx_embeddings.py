@@ -0,0 +1,114 @@
+import os
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+try:
+    import onnxruntime as ort
+    from transformers import AutoTokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence-transformers model run through ONNX Runtime on CPU.
+
+    The model is exported to ONNX once, optionally quantized to int8 with
+    dynamic quantization, and stored under ONNX_MODEL_DIR. Embeddings use the
+    same mean pooling and L2 normalization as the sentence-transformers model.
+    """
+
+    def __init__(self, model_name: str = None, batch_size: int = None, num_threads: int = None,
+                 quantize: bool = True, model_dir: str = None, max_length: int = 256):
+        if not ONNX_AVAILABLE:
+            raise ImportError(
+                "The ONNX embedding backend requires onnxruntime, optimum and transformers "
+                "(pip install -r requirements-onnx.txt)"
+            )
+
+        model_name = model_name or Config.EMBEDDING_MODEL
+        self.model_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        self.batch_size = batch_size or Config.EMBEDDING_BATCH_SIZE
+        self.num_threads = num_threads or Config.EMBEDDING_THREADS
+        self.quantize = quantize
+        self.max_length = max_length
+
+        model_dir = model_dir or os.path.join(Config.ONNX_MODEL_DIR, self.model_id.replace("/", "--"))
+        model_path = self._ensure_model(model_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        logger.info(f"Loaded ONNX embedding model {model_path} with {self.num_threads} threads")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batches of similar length to keep padding small."""
+        if not texts:
+            return []
+
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        vectors = np.empty((len(texts), self._dimension()), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            vectors[batch] = self._encode([texts[i] for i in batch])
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np"
+        )
+        inputs = {
+            name: tokens[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self._input_names and name in tokens
+        }
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean pooling over non-padding tokens, then L2 normalization
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def _dimension(self) -> int:
+        if not hasattr(self, "_dim"):
+            self._dim = self._encode([""]).shape[1]
+        return self._dim
+
+    def _ensure_model(self, model_dir: str) -> str:
+        """Export (and quantize) the model on first use, returning the ONNX file to load."""
+        model_path = os.path.join(model_dir, MODEL_FILE)
+        quantized_path = os.path.join(model_dir, QUANTIZED_MODEL_FILE)
+
+        if not os.path.exists(model_path):
+            logger.info(f"Exporting {self.model_id} to ONNX in {model_dir}")
+            from optimum.exporters.onnx import main_export
+            main_export(self.model_id, output=model_dir, task="feature-extraction")
+
+        if not self.quantize:
+            return model_path
+
+        if not os.path.exists(quantized_path):
+            logger.info(f"Quantizing {model_path} to int8")
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+
+        return quantized_path
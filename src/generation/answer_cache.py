@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+class SemanticAnswerCache:
+    """Persistent answer cache matched on question-embedding similarity.
+
+    Entries live in SQLite and are grouped into namespaces that fingerprint the
+    indexed documents and generation settings. Within a namespace, a question
+    hits when its embedding has cosine similarity above the threshold with a
+    cached question, so paraphrases are served without calling the LLM.
+    Entries expire after a TTL and the least recently used ones are evicted
+    once the cache holds more than max_entries answers.
+    """
+
+    def __init__(self, db_path: str = None, threshold: float = None, ttl_seconds: int = None,
+                 max_entries: int = None):
+        self.db_path = db_path or Config.ANSWER_CACHE_PATH
+        self.threshold = Config.ANSWER_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl_seconds = Config.ANSWER_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = Config.ANSWER_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT NOT NULL,
+                question TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_namespace ON answers (namespace)")
+        self._conn.commit()
+
+        # namespace -> (row ids, normalized embedding matrix), loaded on first use
+        self._namespaces: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @staticmethod
+    def make_namespace(document_fingerprint: str, model_name: str, temperature: float, max_tokens: int) -> str:
+        """Fingerprint everything besides the question that determines an answer."""
+        payload = json.dumps({
+            "documents": document_fingerprint,
+            "model": model_name,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, namespace: str, embedding: List[float]) -> Optional[Dict]:
+        """Return the cached answer for the most similar question, or None on a miss."""
+        query = self._normalize(embedding)
+        with self._lock:
+            ids, matrix = self._load_namespace(namespace)
+            if len(ids):
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry = self._get_entry(int(ids[best]), float(scores[best]))
+                    if entry is not None:
+                        self.hits += 1
+                        logger.info(f"Answer cache hit (similarity {entry['similarity']:.3f})")
+                        return entry
+            self.misses += 1
+            return None
+
+    def store(self, namespace: str, question: str, embedding: List[float], answer: str):
+        """Cache an answer for a question."""
+        vector = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO answers (namespace, question, embedding, answer, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, question, vector.tobytes(), answer, now, now)
+            )
+            self._conn.commit()
+
+            if namespace in self._namespaces:
+                ids, matrix = self._namespaces[namespace]
+                matrix = np.vstack([matrix, vector[None, :]]) if len(ids) else vector[None, :]
+                self._namespaces[namespace] = (np.append(ids, cursor.lastrowid), matrix)
+
+            self._purge_expired()
+            self._evict()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.commit()
+            self._namespaces = {}
+        logger.info("Answer cache cleared")
+
+    def _get_entry(self, row_id: int, similarity: float) -> Optional[Dict]:
+        """Fetch a cached answer, dropping it if it has expired."""
+        row = self._conn.execute(
+            "SELECT question, answer, created FROM answers WHERE id = ?", (row_id,)
+        ).fetchone()
+        if row is None:
+            self._namespaces = {}
+            return None
+
+        question, answer, created = row
+        now = time.time()
+        if now - created > self.ttl_seconds:
+            self._conn.execute("DELETE FROM answers WHERE id = ?", (row_id,))
+            self._conn.commit()
+            self._namespaces = {}
+            return None
+
+        self._conn.execute("UPDATE answers SET last_access = ? WHERE id = ?", (now, row_id))
+        self._conn.commit()
+        return {"question": question, "answer": answer, "similarity": similarity}
+
+    def _load_namespace(self, namespace: str) -> Tuple[np.ndarray, np.ndarray]:
+        if namespace not in self._namespaces:
+            rows = self._conn.execute(
+                "SELECT id, embedding FROM answers WHERE namespace = ?", (namespace,)
+            ).fetchall()
+            ids = np.array([row[0] for row in rows], dtype=np.int64)
+            matrix = (
+                np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+                if rows else np.empty((0, 0), dtype=np.float32)
+            )
+            self._namespaces[namespace] = (ids, matrix)
+        return self._namespaces[namespace]
+
+    def _purge_expired(self):
+        cursor = self._conn.execute(
+            "DELETE FROM answers WHERE created < ?", (time.time() - self.ttl_seconds,)
+        )
+        if cursor.rowcount:
+            self._conn.commit()
+            self._namespaces = {}
+
+    def _evict(self):
+        """Drop least recently used answers beyond max_entries."""
+        entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        excess = entries - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM answers WHERE id IN (SELECT id FROM answers ORDER BY last_access LIMIT ?)",
+            (excess,)
+        )
+        self._conn.commit()
+        self._namespaces = {}
+        logger.info(f"Evicted {excess} answers from the answer cache")
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_answer_cache() -> SemanticAnswerCache:
+    """Return the process-wide answer cache shared by all sessions."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SemanticAnswerCache()
+        return _default_cache
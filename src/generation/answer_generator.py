@@ -1,27 +1,36 @@
 # src/generation/answer_generator.py
 
-from typing import List
+import time
+from typing import Iterator, List
 from langchain_core.documents import Document
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from src.utils.config import Config
+from src.utils.metrics import get_default_metrics, timed
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
+def create_chat_model(model_name: str = None, temperature: float = None, max_tokens: int = None) -> BaseChatModel:
+    """Create the OpenAI chat model client."""
+    return ChatOpenAI(
+        model=model_name or Config.MODEL_NAME,
+        temperature=Config.TEMPERATURE if temperature is None else temperature,
+        max_tokens=max_tokens or Config.MAX_TOKENS,
+        api_key=Config.OPENAI_API_KEY,
+        timeout=30
+    )
+
 class AnswerGenerator:
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, llm: BaseChatModel = None):
         self.model_name = model_name or Config.MODEL_NAME
         self.temperature = Config.TEMPERATURE
         self.max_tokens = Config.MAX_TOKENS
+        self.last_time_to_first_token = None
         
-        self.llm = ChatOpenAI(
-            model=self.model_name,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
-            api_key=Config.OPENAI_API_KEY,
-            timeout=30
-        )
+        # Any chat model can be injected, e.g. FakeStreamingChatModel for offline runs
+        self.llm = llm or create_chat_model(self.model_name, self.temperature, self.max_tokens)
         
         # Create prompt template
         self.prompt = ChatPromptTemplate.from_template(
@@ -35,16 +44,14 @@ class AnswerGenerator:
             Answer:"""
         )
     
+    @timed("generate")
     def generate_answer(self, question: str, documents: List[Document]) -> str:
         """Generate an answer based on a question and relevant documents."""
         try:
             logger.info(f"Generating answer for question: {question}")
             
-            # Combine document contents
-            context = "\n\n".join([doc.page_content for doc in documents])
-            
             # Format prompt with context and question
-            formatted_prompt = self.prompt.format(context=context, input=question)
+            formatted_prompt = self._format_prompt(question, documents)
             
             # Generate answer using LLM
             result = self.llm.invoke(formatted_prompt)
@@ -60,3 +67,50 @@ class AnswerGenerator:
         except Exception as e:
             logger.error(f"Error generating answer: {str(e)}")
             raise
+    
+    @timed("generate")
+    async def agenerate_answer(self, question: str, documents: List[Document]) -> str:
+        """Generate an answer without blocking the event loop."""
+        try:
+            logger.info(f"Generating answer for question: {question}")
+            
+            formatted_prompt = self._format_prompt(question, documents)
+            result = await self.llm.ainvoke(formatted_prompt)
+            answer = result.content if hasattr(result, 'content') else str(result)
+            
+            logger.info("Answer generated successfully")
+            return answer
+        except Exception as e:
+            logger.error(f"Error generating answer: {str(e)}")
+            raise
+    
+    @timed("generate")
+    def stream_answer(self, question: str, documents: List[Document]) -> Iterator[str]:
+        """Yield the answer piece by piece as the LLM produces it."""
+        try:
+            logger.info(f"Streaming answer for question: {question}")
+            
+            formatted_prompt = self._format_prompt(question, documents)
+            
+            start = time.perf_counter()
+            self.last_time_to_first_token = None
+            for chunk in self.llm.stream(formatted_prompt):
+                content = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                if not content:
+                    continue
+                if self.last_time_to_first_token is None:
+                    self.last_time_to_first_token = time.perf_counter() - start
+                    logger.info(f"Time to first token: {self.last_time_to_first_token:.3f}s")
+                    if Config.METRICS_ENABLED:
+                        get_default_metrics().observe("first_token", self.last_time_to_first_token)
+                yield content
+            
+            logger.info(f"Answer streamed successfully in {time.perf_counter() - start:.3f}s")
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}")
+            raise
+    
+    def _format_prompt(self, question: str, documents: List[Document]) -> str:
+        """Combine document contents into the prompt."""
+        context = "\n\n".join([doc.page_content for doc in documents])
+        return self.prompt.format(context=context, input=question)
@@ -0,0 +1,295 @@
+"""Headless batch Q&A: ingest a directory, answer a JSONL file of questions.
+
+Writes one JSON line per question with the answer, its sources and per-stage
+timings, and prints a timing summary. With the fake LLM, translator and
+embedding backends it runs fully offline and reproducibly, as a benchmark of
+the pipeline itself:
+
+    python -m src.pipeline.batch_runner docs/ questions.jsonl --output answers.jsonl \\
+        --llm fake --translator fake --embedding-backend fake
+
+Each question line is {"question": ..., "id": ..., "language": "English" |
+"German", "sources": [file names to restrict the search to]}; only
+"question" is required.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from src.document_processing.docx_processor import DocxProcessor
+from src.document_processing.pdf_processor import PDFProcessor
+from src.embedding.embedder import DocumentEmbedder
+from src.embedding.index_cache import hash_file_content
+from src.embedding.index_manager import VectorIndexManager
+from src.generation.answer_generator import AnswerGenerator
+from src.generation.fake_llm import FakeStreamingChatModel
+from src.retrieval.retriever import DocumentRetriever
+from src.retrieval.search_scope import SearchScope
+from src.translation.backends import FakeTranslationBackend, create_backend
+from src.translation.translator import DocumentTranslator
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+STAGES = ("extract", "split", "embed", "index", "retrieve", "generate", "translate")
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+
+class StageTimer:
+    """Accumulate wall-clock durations per pipeline stage."""
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        self.durations.setdefault(name, []).append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, total, mean, p50 and p95 in seconds for every stage that ran."""
+        summary = {}
+        for name, durations in self.durations.items():
+            if not durations:
+                continue
+            values = np.asarray(durations)
+            summary[name] = {
+                "count": len(values),
+                "total": float(values.sum()),
+                "mean": float(values.mean()),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95))
+            }
+        return summary
+
+class BatchRunner:
+    """Run ingestion and question answering outside Streamlit, timing every stage.
+
+    Files are processed serially in this process, rather than through
+    ParallelIngestor, so extraction and splitting can be timed separately.
+    """
+
+    def __init__(self, embedder: DocumentEmbedder, answer_generator: AnswerGenerator,
+                 translator: DocumentTranslator, hybrid: bool = None):
+        self.index_manager = VectorIndexManager(embedder)
+        self.answer_generator = answer_generator
+        self.translator = translator
+        self.hybrid = Config.HYBRID_RETRIEVAL_ENABLED if hybrid is None else hybrid
+        self.timer = StageTimer()
+        self.retriever = None
+
+    def ingest(self, paths: List[str]) -> int:
+        """Index the given files. Returns the number of chunks in the index."""
+        for path in paths:
+            with open(path, "rb") as f:
+                content_hash = hash_file_content(f.read())
+            if self.index_manager.has_file(content_hash):
+                continue
+
+            # Reuse a cached index when the same file was processed before, as the app does
+            with self.timer.stage("index"):
+                if self.index_manager.add_cached_file(content_hash, os.path.basename(path)):
+                    continue
+
+            documents = self.load_file(path)
+            start = time.perf_counter()
+            self.index_manager.add_file(content_hash, os.path.basename(path), documents)
+            embed_seconds = self.index_manager.embedder.last_embed_seconds
+            self.timer.record("embed", embed_seconds)
+            self.timer.record("index", time.perf_counter() - start - embed_seconds)
+
+        if self.index_manager.vector_store is None:
+            raise ValueError("No chunks were extracted from the input documents")
+
+        self.retriever = DocumentRetriever(
+            self.index_manager.vector_store,
+            model_name=self.answer_generator.model_name,
+            lexical_index=self.index_manager.lexical_index if self.hybrid else None,
+            index_manager=self.index_manager
+        )
+        return self.index_manager.num_chunks
+
+    def load_file(self, path: str) -> List[Document]:
+        """Extract and chunk one file with the app's processors, timing both steps."""
+        if path.endswith(".docx"):
+            processor = DocxProcessor()
+            with self.timer.stage("extract"):
+                text = processor._extract_text_from_docx(path)
+            with self.timer.stage("split"):
+                return processor.create_documents(text, path)
+
+        processor = PDFProcessor()
+        if not Config.PDF_STREAMING:
+            with self.timer.stage("extract"):
+                text = processor._extract_text_from_pdf(path)
+            with self.timer.stage("split"):
+                return processor.create_documents(text, path)
+
+        # PDFProcessor.iter_documents, one step at a time, so extraction and splitting are timed apart
+        documents = []
+        source = os.path.basename(path)
+        pages = processor.iter_pages(path)
+        extract_seconds = split_seconds = 0.0
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            extract_seconds += time.perf_counter() - start
+            if page is None:
+                break
+            start = time.perf_counter()
+            documents.extend(processor.split_page(source, *page))
+            split_seconds += time.perf_counter() - start
+        self.timer.record("extract", extract_seconds)
+        self.timer.record("split", split_seconds)
+        return documents
+
+    def answer(self, question: str, language: str = "English", sources: List[str] = None) -> Dict:
+        """Answer one question, returning the answer, its sources and stage timings."""
+        timings = {}
+
+        def timed(stage: str, func, *args):
+            start = time.perf_counter()
+            result = func(*args)
+            seconds = time.perf_counter() - start
+            timings[stage] = timings.get(stage, 0.0) + seconds
+            self.timer.record(stage, seconds)
+            return result
+
+        translated_question = question
+        if language == "German":
+            translated_question = timed("translate", self.translator.translate, question, "en", "de")
+
+        docs = timed("retrieve", self.retriever.get_relevant_documents, translated_question, self.scope_for(sources))
+        answer = timed("generate", self.answer_generator.generate_answer, translated_question, docs)
+
+        if language == "German":
+            answer = timed("translate", self.translator.translate, answer, "de", "en")
+
+        return {
+            "question": question,
+            "translated_question": translated_question,
+            "answer": answer,
+            "sources": [
+                {key: doc.metadata.get(key) for key in ("source", "page", "chunk_id")}
+                for doc in docs
+            ],
+            "timings": timings
+        }
+
+    def scope_for(self, sources: List[str] = None) -> SearchScope:
+        """Map source file names to a search scope, or None to search everything."""
+        if not sources:
+            return None
+        names = set(sources)
+        content_hashes = [
+            content_hash for content_hash, name in self.index_manager.file_names.items() if name in names
+        ]
+        if not content_hashes:
+            logger.warning(f"None of the sources {sorted(names)} are indexed, searching all documents")
+            return None
+        return SearchScope(content_hashes)
+
+def find_documents(path: str) -> List[str]:
+    """Return the supported files under a directory (or the file itself), sorted."""
+    if os.path.isfile(path):
+        return [path]
+    found = []
+    for root, _, files in os.walk(path):
+        found.extend(os.path.join(root, name) for name in files if name.lower().endswith(SUPPORTED_EXTENSIONS))
+    return sorted(found)
+
+def read_questions(path: str) -> Iterator[Tuple[int, Dict]]:
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                yield line_number, json.loads(line)
+
+def build_runner(args: argparse.Namespace) -> BatchRunner:
+    """Wire real or fake components from the command-line options."""
+    if not args.use_caches:
+        # Every run should start cold so timings are comparable
+        Config.INDEX_CACHE_ENABLED = False
+        Config.EMBEDDING_CACHE_ENABLED = False
+        Config.TRANSLATION_CACHE_ENABLED = False
+
+    embedder = DocumentEmbedder(backend=args.embedding_backend)
+
+    llm = None
+    if args.llm == "fake":
+        llm = FakeStreamingChatModel(first_token_delay=args.llm_first_token_delay, token_delay=args.llm_token_delay)
+    answer_generator = AnswerGenerator(model_name=args.model, llm=llm)
+
+    if args.translator == "fake":
+        backend = FakeTranslationBackend(delay=args.translation_delay)
+    else:
+        backend = create_backend(args.translator)
+    translator = DocumentTranslator(backend=backend)
+
+    return BatchRunner(embedder, answer_generator, translator, hybrid=not args.no_hybrid)
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions over a directory of documents.")
+    parser.add_argument("documents", help="Directory (or single file) of PDF and Word documents")
+    parser.add_argument("questions", help="JSONL file with one question object per line")
+    parser.add_argument("--output", default="-", help="Where to write the answers as JSONL (default: stdout)")
+    parser.add_argument("--summary", help="Also write the stage timing summary to this JSON file")
+    parser.add_argument("--model", default=Config.MODEL_NAME)
+    parser.add_argument("--llm", choices=["openai", "fake"], default="openai")
+    parser.add_argument("--llm-first-token-delay", type=float, default=0.0)
+    parser.add_argument("--llm-token-delay", type=float, default=0.0)
+    parser.add_argument("--translator", choices=["google", "fake"], default=Config.TRANSLATION_BACKEND)
+    parser.add_argument("--translation-delay", type=float, default=0.0)
+    parser.add_argument("--embedding-backend", choices=["torch", "onnx", "fake"], default=Config.EMBEDDING_BACKEND)
+    parser.add_argument("--no-hybrid", action="store_true", help="Use vector search only")
+    parser.add_argument("--use-caches", action="store_true", help="Keep the on-disk index, embedding and translation caches")
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None):
+    args = parse_args(argv)
+    runner = build_runner(args)
+
+    paths = find_documents(args.documents)
+    if not paths:
+        raise SystemExit(f"No PDF or Word documents found in {args.documents}")
+    start = time.perf_counter()
+    num_chunks = runner.ingest(paths)
+    logger.info(f"Indexed {num_chunks} chunks from {len(paths)} files in {time.perf_counter() - start:.2f}s")
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for line_number, item in read_questions(args.questions):
+            result = runner.answer(item["question"], item.get("language", "English"), item.get("sources"))
+            result["id"] = item.get("id", line_number)
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    summary = runner.timer.summary()
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    print(f"{'stage':<10}{'count':>7}{'total s':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}", file=sys.stderr)
+    for stage, stats in summary.items():
+        print(
+            f"{stage:<10}{stats['count']:>7}{stats['total']:>10.3f}{stats['mean'] * 1000:>10.1f}"
+            f"{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}",
+            file=sys.stderr
+        )
+
+if __name__ == "__main__":
+    main()
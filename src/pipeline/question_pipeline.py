@@ -0,0 +1,134 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from src.generation.answer_cache import SemanticAnswerCache
+from src.generation.answer_generator import AnswerGenerator
+from src.retrieval.retriever import DocumentRetriever
+from src.retrieval.search_scope import SearchScope
+from src.translation.translator import DocumentTranslator
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+class QuestionPipeline:
+    """Asyncio orchestrator for translate -> retrieve -> generate -> translate back.
+
+    Independent steps overlap: for German questions, retrieval on the original
+    text starts while the translation is still in flight. Many questions can be
+    answered concurrently from one process via answer_many. With an answer
+    cache, generation is skipped for questions similar to ones already answered
+    over the same documents.
+    """
+
+    def __init__(self, retriever: DocumentRetriever, answer_generator: AnswerGenerator,
+                 translator: DocumentTranslator, max_concurrency: int = None,
+                 answer_cache: SemanticAnswerCache = None, embeddings: Embeddings = None,
+                 document_fingerprint: str = None, scope: SearchScope = None):
+        self.retriever = retriever
+        self.scope = scope  # Files and pages to search; document_fingerprint should cover the same scope
+        self.answer_generator = answer_generator
+        self.translator = translator
+        self.max_concurrency = max_concurrency or Config.PIPELINE_MAX_CONCURRENCY
+        
+        # The answer cache needs question embeddings and the indexed document set
+        self.answer_cache = answer_cache if embeddings is not None and document_fingerprint else None
+        self.embeddings = embeddings
+        self.cache_namespace = None
+        if self.answer_cache is not None:
+            self.cache_namespace = SemanticAnswerCache.make_namespace(
+                document_fingerprint,
+                answer_generator.model_name,
+                answer_generator.temperature,
+                answer_generator.max_tokens
+            )
+
+    async def retrieve(self, question: str, language: str = "English") -> Tuple[str, List[Document]]:
+        """Return the English question and the documents retrieved for it."""
+        if language != "German":
+            return question, await self.retriever.aget_relevant_documents(question, self.scope)
+
+        # Start retrieving on the original text while the translation runs
+        translation = asyncio.create_task(self.translator.atranslate(question, "en", "de"))
+        speculative = asyncio.create_task(self.retriever.aget_relevant_documents(question, self.scope))
+
+        try:
+            translated_question = await translation
+        except Exception:
+            speculative.cancel()
+            raise
+
+        if translated_question.strip().lower() == question.strip().lower():
+            return translated_question, await speculative
+
+        translated_docs, original_docs = await asyncio.gather(
+            self.retriever.aget_relevant_documents(translated_question, self.scope),
+            speculative
+        )
+        return translated_question, self._merge(translated_docs, original_docs)
+
+    async def answer(self, question: str, language: str = "English") -> Dict:
+        """Answer a single question end to end."""
+        translated_question, docs = await self.retrieve(question, language)
+        
+        embedding = await asyncio.to_thread(self.embed_question, translated_question)
+        cached = await asyncio.to_thread(self.lookup_answer, translated_question, embedding)
+        if cached is not None:
+            answer = cached["answer"]
+        else:
+            answer = await self.answer_generator.agenerate_answer(translated_question, docs)
+            await asyncio.to_thread(self.store_answer, translated_question, answer, embedding)
+
+        if language == "German":
+            answer = await self.translator.atranslate(answer, "de", "en")
+
+        return {
+            "question": question,
+            "translated_question": translated_question,
+            "answer": answer,
+            "sources": docs
+        }
+
+    async def answer_many(self, questions: List[str], language: str = "English") -> List[Dict]:
+        """Answer questions concurrently, at most max_concurrency at a time, in input order."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(question: str) -> Dict:
+            async with semaphore:
+                return await self.answer(question, language)
+
+        logger.info(f"Answering {len(questions)} questions with concurrency {self.max_concurrency}")
+        return await asyncio.gather(*(run(question) for question in questions))
+
+    def embed_question(self, question: str) -> Optional[List[float]]:
+        """Embed a question for the answer cache, or return None when caching is off."""
+        if self.answer_cache is None:
+            return None
+        return self.embeddings.embed_query(question)
+
+    def lookup_answer(self, question: str, embedding: List[float] = None) -> Optional[Dict]:
+        """Return a cached answer for this or a similar question, if any."""
+        if self.answer_cache is None:
+            return None
+        embedding = embedding or self.embed_question(question)
+        return self.answer_cache.lookup(self.cache_namespace, embedding)
+
+    def store_answer(self, question: str, answer: str, embedding: List[float] = None):
+        """Remember a freshly generated answer."""
+        if self.answer_cache is None:
+            return
+        embedding = embedding or self.embed_question(question)
+        self.answer_cache.store(self.cache_namespace, question, embedding, answer)
+
+    def _merge(self, primary: List[Document], secondary: List[Document]) -> List[Document]:
+        """Keep primary results first, fill up the token budget with unseen secondary results."""
+        merged = []
+        seen = set()
+        for doc in primary + secondary:
+            key = doc.metadata.get("chunk_id", doc.page_content)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(doc)
+        return self.retriever.packer.pack(merged)
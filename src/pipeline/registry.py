@@ -0,0 +1,116 @@
+import threading
+from typing import Callable, Dict, Hashable, List
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+class ComponentRegistry:
+    """Process-wide store of expensive pipeline components, keyed by their settings.
+
+    The embedding model and the chat model client are loaded once per distinct
+    settings and shared by every Streamlit session and thread. Only stateless,
+    thread-safe objects are shared: sessions still get their own
+    DocumentEmbedder and AnswerGenerator, which are cheap wrappers around them.
+    Heavy modules are imported on first use so importing the registry stays
+    fast.
+    """
+
+    def __init__(self):
+        self._components: Dict[Hashable, object] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], object]):
+        """Return the component for a key, building it with factory exactly once."""
+        with self._lock:
+            if key in self._components:
+                return self._components[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Loads of different components may overlap, loads of the same one wait for each other
+        with key_lock:
+            with self._lock:
+                if key in self._components:
+                    return self._components[key]
+            logger.info(f"Loading shared component {key}")
+            component = factory()
+            with self._lock:
+                self._components[key] = component
+            return component
+
+    def embeddings(self, model_name: str = None, backend: str = None):
+        """Return the shared embedding model."""
+        from src.embedding.embedder import create_embeddings
+
+        model_name = model_name or Config.EMBEDDING_MODEL
+        backend = (backend or Config.EMBEDDING_BACKEND).lower()
+        return self.get_or_create(
+            ("embeddings", model_name, backend), lambda: create_embeddings(model_name, backend)
+        )
+
+    def chat_model(self, model_name: str = None, temperature: float = None, max_tokens: int = None):
+        """Return the shared chat model client for these generation settings."""
+        from src.generation.answer_generator import create_chat_model
+
+        model_name = model_name or Config.MODEL_NAME
+        temperature = Config.TEMPERATURE if temperature is None else temperature
+        max_tokens = max_tokens or Config.MAX_TOKENS
+        return self.get_or_create(
+            ("chat_model", model_name, temperature, max_tokens),
+            lambda: create_chat_model(model_name, temperature, max_tokens)
+        )
+
+    def embedder(self, model_name: str = None, backend: str = None):
+        """Create a DocumentEmbedder around the shared embedding model."""
+        from src.embedding.embedder import DocumentEmbedder
+
+        return DocumentEmbedder(
+            model_name=model_name, backend=backend, embeddings=self.embeddings(model_name, backend)
+        )
+
+    def answer_generator(self, model_name: str = None):
+        """Create an AnswerGenerator around the shared chat model for the current settings."""
+        from src.generation.answer_generator import AnswerGenerator
+
+        return AnswerGenerator(model_name=model_name, llm=self.chat_model(model_name))
+
+    def warm_up(self):
+        """Load the default models and run one embedding, so the first request does not pay for it."""
+        try:
+            self.embeddings().embed_query("warm up")
+            self.chat_model()
+            logger.info("Shared components warmed up")
+        except Exception as e:
+            logger.warning(f"Warm-up failed: {str(e)}")
+
+    def loaded(self) -> List[Hashable]:
+        """Keys of the components loaded so far."""
+        with self._lock:
+            return list(self._components)
+
+    def clear(self):
+        with self._lock:
+            self._components = {}
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+_warm_up_thread = None
+
+def get_default_registry() -> ComponentRegistry:
+    """Return the process-wide component registry."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ComponentRegistry()
+        return _default_registry
+
+def start_warm_up() -> threading.Thread:
+    """Warm up the default registry in a background thread, once per process."""
+    global _warm_up_thread
+    registry = get_default_registry()
+    with _default_registry_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=registry.warm_up, name="warm-up", daemon=True)
+            _warm_up_thread.start()
+        return _warm_up_thread
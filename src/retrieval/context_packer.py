@@ -0,0 +1,142 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+import tiktoken
+from langchain_core.documents import Document
+from src.utils.config import Config
+
+# Context windows of the selectable models, in tokens
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+}
+
+# Tokens reserved for the prompt template and question
+PROMPT_OVERHEAD_TOKENS = 500
+
+# Word n-gram size used to spot near-duplicate chunks
+SHINGLE_SIZE = 5
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str):
+    """Return the tiktoken encoding for a model, falling back to cl100k_base."""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+class ContextPacker:
+    """Fill a prompt token budget with retrieved chunks in relevance order.
+
+    Text repeated between neighbouring chunks because of CHUNK_OVERLAP is
+    trimmed using the chunks' character offsets, and chunks that are mostly
+    covered by, or near-duplicates of, already selected chunks are dropped.
+    """
+
+    def __init__(self, model_name: str = None, token_budget: int = None, redundancy_threshold: float = None):
+        self.model_name = model_name or Config.MODEL_NAME
+        self.token_budget = token_budget
+        self.redundancy_threshold = (
+            Config.CONTEXT_REDUNDANCY_THRESHOLD if redundancy_threshold is None else redundancy_threshold
+        )
+        self.encoding = get_encoding(self.model_name)
+        self.last_token_count = 0
+
+    def budget(self) -> int:
+        """Token budget for context, capped by what the model's window leaves after the answer."""
+        budget = self.token_budget or Config.CONTEXT_TOKEN_BUDGET
+        window = MODEL_CONTEXT_WINDOWS.get(self.model_name)
+        if window:
+            budget = min(budget, window - Config.MAX_TOKENS - PROMPT_OVERHEAD_TOKENS)
+        return max(budget, 0)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def pack(self, documents: List[Document]) -> List[Document]:
+        """Select documents, most relevant first, until the budget is spent."""
+        budget = self.budget()
+        selected = []
+        used = 0
+        ranges: Dict[Tuple, List[Tuple[int, int]]] = {}
+        shingles: List[Set[str]] = []
+
+        for doc in documents:
+            doc = self._trim_overlap(doc, ranges)
+            if doc is None:
+                continue
+
+            doc_shingles = self._shingles(doc.page_content)
+            if any(self._jaccard(doc_shingles, other) >= self.redundancy_threshold for other in shingles):
+                continue
+
+            tokens = self.count_tokens(doc.page_content)
+            if used + tokens > budget:
+                # A smaller, less relevant chunk may still fit
+                continue
+
+            selected.append(doc)
+            used += tokens
+            shingles.append(doc_shingles)
+            span = self._span(doc)
+            if span is not None:
+                ranges.setdefault(span[0], []).append(span[1])
+
+        self.last_token_count = used
+        return selected
+
+    def _trim_overlap(self, doc: Document, ranges: Dict[Tuple, List[Tuple[int, int]]]) -> Optional[Document]:
+        """Cut text already covered by selected chunks of the same page, or drop the chunk.
+
+        A chunk can only keep one contiguous span, so when selected chunks
+        cover its middle, the longest uncovered piece is kept.
+        """
+        span = self._span(doc)
+        if span is None:
+            return doc
+
+        key, (start, end) = span
+        uncovered = [(start, end)]
+        for other_start, other_end in sorted(ranges.get(key, [])):
+            pieces = []
+            for piece_start, piece_end in uncovered:
+                if other_end <= piece_start or other_start >= piece_end:
+                    pieces.append((piece_start, piece_end))
+                    continue
+                if piece_start < other_start:
+                    pieces.append((piece_start, other_start))
+                if other_end < piece_end:
+                    pieces.append((other_end, piece_end))
+            uncovered = pieces
+
+        covered = (end - start) - sum(piece_end - piece_start for piece_start, piece_end in uncovered)
+        if not uncovered or covered >= self.redundancy_threshold * (end - start):
+            return None
+        start, end = max(uncovered, key=lambda piece: piece[1] - piece[0])
+        if (start, end) == span[1]:
+            return doc
+
+        original_start = doc.metadata["start_index"]
+        content = doc.page_content[start - original_start:end - original_start]
+        return Document(page_content=content, metadata={**doc.metadata, "start_index": start})
+
+    @staticmethod
+    def _span(doc: Document) -> Optional[Tuple[Tuple, Tuple[int, int]]]:
+        start = doc.metadata.get("start_index")
+        if start is None:
+            return None
+        key = (doc.metadata.get("source"), doc.metadata.get("page"))
+        return key, (start, start + len(doc.page_content))
+
+    @staticmethod
+    def _shingles(text: str) -> Set[str]:
+        words = re.findall(r"\w+", text.lower())
+        if len(words) <= SHINGLE_SIZE:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+    @staticmethod
+    def _jaccard(a: Set[str], b: Set[str]) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
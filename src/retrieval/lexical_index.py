@@ -0,0 +1,163 @@
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from src.utils.config import Config
+
+# Keep identifiers such as "4.2.1", "AB-1234" or "EU/2016/679" as single terms
+TOKEN_PATTERN = re.compile(r"\w+(?:[.\-/]\w+)*")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class LexicalIndex:
+    """Array-backed inverted index with BM25 scoring over chunk texts.
+
+    Postings are kept in CSR form: for term t, the documents containing it are
+    doc_ids[indptr[t]:indptr[t + 1]] with matching term frequencies in tfs.
+    New chunks are staged in flat append-only arrays and merged into the CSR
+    arrays on the next search. Removed chunks are masked out until that merge,
+    which drops their rows, postings and unused terms and renumbers the rest,
+    so the index only ever holds live chunks after a search.
+    """
+
+    def __init__(self, k1: float = None, b: float = None):
+        self.k1 = Config.BM25_K1 if k1 is None else k1
+        self.b = Config.BM25_B if b is None else b
+        self._lock = threading.RLock()
+
+        self.vocabulary: Dict[str, int] = {}
+        self.chunk_ids: List[str] = []
+        self._positions: Dict[str, int] = {}  # chunk ID -> document number
+        self._doc_lengths = array('i')
+        self._alive = bytearray()
+        self._num_alive = 0
+
+        # Compacted postings
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._doc_ids = np.empty(0, dtype=np.int32)
+        self._tfs = np.empty(0, dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+
+        # Postings added since the last compaction
+        self._pending_terms = array('i')
+        self._pending_docs = array('i')
+        self._pending_tfs = array('f')
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return self._num_alive
+
+    def add(self, chunk_ids: List[str], texts: List[str]):
+        """Index chunk texts under their chunk IDs."""
+        with self._lock:
+            for chunk_id, text in zip(chunk_ids, texts):
+                if chunk_id in self._positions:
+                    continue
+                doc = len(self.chunk_ids)
+                counts = Counter(tokenize(text))
+                for term, tf in counts.items():
+                    term_id = self.vocabulary.setdefault(term, len(self.vocabulary))
+                    self._pending_terms.append(term_id)
+                    self._pending_docs.append(doc)
+                    self._pending_tfs.append(tf)
+
+                length = sum(counts.values())
+                self.chunk_ids.append(chunk_id)
+                self._positions[chunk_id] = doc
+                self._doc_lengths.append(length)
+                self._alive.append(1)
+                self._num_alive += 1
+            self._dirty = True
+
+    def remove(self, chunk_ids: List[str]):
+        """Stop returning the given chunks."""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                doc = self._positions.pop(chunk_id, None)
+                if doc is None:
+                    continue
+                self._alive[doc] = 0
+                self._num_alive -= 1
+            self._dirty = True
+
+    def search(self, query: str, k: int, chunk_ids: Iterable[str] = None) -> List[Tuple[str, float]]:
+        """Return up to k (chunk_id, score) pairs, best first, optionally only among chunk_ids."""
+        with self._lock:
+            if self._dirty:
+                self._compact()
+
+            term_ids = {self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary}
+            if not term_ids or not self._num_alive:
+                return []
+
+            scores = np.zeros(len(self.chunk_ids), dtype=np.float32)
+            for term_id in term_ids:
+                start, end = self._indptr[term_id], self._indptr[term_id + 1]
+                if start == end:
+                    continue
+                docs = self._doc_ids[start:end]
+                tfs = self._tfs[start:end]
+                df = end - start
+                idf = np.log(1.0 + (self._num_alive - df + 0.5) / (df + 0.5))
+                scores[docs] += idf * tfs * (self.k1 + 1.0) / (tfs + self._norms[docs])
+
+            if chunk_ids is not None:
+                allowed = np.zeros(len(scores), dtype=bool)
+                allowed[[self._positions[chunk_id] for chunk_id in chunk_ids if chunk_id in self._positions]] = True
+                scores[~allowed] = 0.0
+
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k)[:k]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(self.chunk_ids[doc], float(scores[doc])) for doc in candidates]
+
+    def _compact(self):
+        """Merge staged postings into the CSR arrays and drop removed chunks."""
+        old_counts = np.diff(self._indptr)
+        old_terms = np.repeat(np.arange(len(old_counts), dtype=np.int32), old_counts)
+
+        terms = np.concatenate([old_terms, np.asarray(self._pending_terms, dtype=np.int32)])
+        docs = np.concatenate([self._doc_ids, np.asarray(self._pending_docs, dtype=np.int32)])
+        tfs = np.concatenate([self._tfs, np.asarray(self._pending_tfs, dtype=np.float32)])
+        lengths = np.asarray(self._doc_lengths, dtype=np.float32)
+
+        alive = np.asarray(self._alive, dtype=np.uint8).astype(bool)
+        if not alive.all():
+            keep = alive[docs]
+            terms, docs, tfs = terms[keep], docs[keep], tfs[keep]
+            terms, docs, lengths = self._drop_removed(terms, docs, lengths, alive)
+
+        num_terms = len(self.vocabulary)
+        order = np.argsort(terms, kind="stable")
+        self._doc_ids = docs[order]
+        self._tfs = tfs[order]
+        self._indptr = np.zeros(num_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=num_terms), out=self._indptr[1:])
+
+        # Precompute the BM25 length normalization for every document, against the live average length
+        avgdl = float(lengths.mean()) if len(lengths) else 1.0
+        self._norms = self.k1 * (1.0 - self.b + self.b * lengths / max(avgdl, 1e-9))
+
+        self._pending_terms = array('i')
+        self._pending_docs = array('i')
+        self._pending_tfs = array('f')
+        self._dirty = False
+
+    def _drop_removed(self, terms: np.ndarray, docs: np.ndarray, lengths: np.ndarray,
+                      alive: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Renumber live documents and used terms densely, forgetting removed chunks."""
+        new_docs = np.cumsum(alive, dtype=np.int32) - 1
+        self.chunk_ids = [chunk_id for chunk_id, live in zip(self.chunk_ids, alive.tolist()) if live]
+        self._positions = {chunk_id: doc for doc, chunk_id in enumerate(self.chunk_ids)}
+        lengths = lengths[alive]
+        self._doc_lengths = array('i', lengths.astype(np.int32).tolist())
+        self._alive = bytearray(b"\x01") * len(self.chunk_ids)
+
+        used = np.bincount(terms, minlength=len(self.vocabulary)) > 0
+        new_terms = np.cumsum(used, dtype=np.int32) - 1
+        self.vocabulary = {term: int(new_terms[term_id]) for term, term_id in self.vocabulary.items() if used[term_id]}
+        return new_terms[terms], new_docs[docs], lengths
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import threading
+import urllib.error
+import urllib.request
+import uuid
+import weakref
+from typing import Dict, List, Optional
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from src.embedding.index_cache import VectorIndexCache
+from src.retrieval.context_packer import ContextPacker
+from src.retrieval.search_scope import SearchScope
+from src.utils.config import Config
+from src.utils.metrics import timed
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+class RetrievalClient:
+    """JSON-over-HTTP client of the local retrieval server."""
+
+    def __init__(self, url: str = None, timeout: float = None):
+        self.url = (url or Config.RETRIEVAL_SERVER_URL).rstrip("/")
+        self.timeout = timeout or Config.RETRIEVAL_TIMEOUT
+
+    def health(self) -> Dict:
+        return self._request("GET", "/health")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._request("POST", "/embed", {"query": text})["vector"]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._request("POST", "/embed", {"texts": texts})["vectors"]
+
+    def lookup_file(self, session: str, content_hash: str, file_name: str) -> Optional[int]:
+        """Use a file the server has indexed or cached. Returns its chunk count, or None on a miss."""
+        result = self._request("POST", "/files/lookup", {
+            "session": session, "content_hash": content_hash, "file_name": file_name, "settings": self._settings()
+        })
+        return result["chunks"] if result["found"] else None
+
+    def add_file(self, session: str, content_hash: str, file_name: str, documents: List[Document]) -> int:
+        return self._request("POST", "/files/add", {
+            "session": session,
+            "content_hash": content_hash,
+            "file_name": file_name,
+            "documents": [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+            "settings": self._settings()
+        })["chunks"]
+
+    def release_file(self, session: str, content_hash: str) -> int:
+        return self._request("POST", "/files/release", {"session": session, "content_hash": content_hash})["removed"]
+
+    def heartbeat(self, session: str) -> int:
+        return self._request("POST", "/sessions/heartbeat", {"session": session})["files"]
+
+    def close_session(self, session: str) -> int:
+        return self._request("POST", "/sessions/close", {"session": session})["removed"]
+
+    def get_documents(self, chunk_ids: List[str]) -> List[Document]:
+        result = self._request("POST", "/documents", {"chunk_ids": chunk_ids})
+        return [Document(page_content=doc["page_content"], metadata=doc["metadata"]) for doc in result["documents"]]
+
+    def search(self, query: str, k: int, scope: SearchScope, hybrid: bool) -> List[Document]:
+        result = self._request("POST", "/search", {
+            "query": query,
+            "k": k,
+            "scope": {"content_hashes": scope.content_hashes, "pages": list(scope.pages) if scope.pages else None},
+            "hybrid": hybrid
+        })
+        return [Document(page_content=doc["page_content"], metadata=doc["metadata"]) for doc in result["documents"]]
+
+    @staticmethod
+    def _settings() -> Dict:
+        return {
+            "chunk_size": Config.CHUNK_SIZE,
+            "chunk_overlap": Config.CHUNK_OVERLAP,
+            "pdf_streaming": Config.PDF_STREAMING
+        }
+
+    def _request(self, method: str, path: str, payload: Dict = None) -> Dict:
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(
+            self.url + path, data=data, method=method, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise ValueError(f"Retrieval server error on {path}: {message}") from e
+
+class RemoteEmbeddings(Embeddings):
+    """Embeddings computed by the retrieval server's shared model."""
+
+    def __init__(self, client: RetrievalClient):
+        self.client = client
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.embed_query(text)
+
+class RemoteEmbedder:
+    """Stand-in for DocumentEmbedder when the model lives in the retrieval server."""
+
+    def __init__(self, client: RetrievalClient, embedding_id: str):
+        self.embeddings = RemoteEmbeddings(client)
+        self.embedding_id = embedding_id
+
+    def embedding_cache_stats(self) -> Optional[Dict]:
+        return None  # Kept by the server
+
+    def reset_embedding_cache_stats(self):
+        pass
+
+class RemoteIndexManager:
+    """Track one session's files in the shared index of the retrieval server.
+
+    Offers the parts of VectorIndexManager the app uses. Files are shared with
+    other sessions on the server; each session holds its files under a random
+    session ID and only searches those. A background thread renews the
+    session's lease while the manager is alive; close() (or garbage
+    collection) releases its files right away.
+    """
+
+    def __init__(self, client: RetrievalClient = None):
+        self.client = client or RetrievalClient()
+        self.session = uuid.uuid4().hex
+        settings = self.client.health()
+        self.embedder = RemoteEmbedder(self.client, settings["embedding_id"])
+        self.chunk_size = settings["chunk_size"]
+        self.chunk_overlap = settings["chunk_overlap"]
+        self.pdf_streaming = settings["pdf_streaming"]
+        self.file_sizes: Dict[str, int] = {}  # content hash -> number of chunks
+        self.file_names: Dict[str, str] = {}  # content hash -> source file name
+        self.vector_store = None
+        self.lexical_index = None
+        self.index_type = None
+        self.index_recall = None
+        self._closed = threading.Event()
+        self._finalizer = weakref.finalize(self, _close_session, self.client, self.session, self._closed)
+        # The thread only holds a weak reference, so an abandoned manager can still be collected
+        threading.Thread(
+            target=_send_heartbeats, args=(weakref.ref(self), self.client, self.session, self._closed),
+            name="retrieval-heartbeat", daemon=True
+        ).start()
+
+    def matches_settings(self) -> bool:
+        return (self.chunk_size, self.chunk_overlap, self.pdf_streaming) == (
+            Config.CHUNK_SIZE, Config.CHUNK_OVERLAP, Config.PDF_STREAMING
+        )
+
+    def has_file(self, content_hash: str) -> bool:
+        return content_hash in self.file_sizes
+
+    @property
+    def num_chunks(self) -> int:
+        return sum(self.file_sizes.values())
+
+    def fingerprint(self, scope: SearchScope = None) -> str:
+        """Same fingerprint VectorIndexManager gives the same document set."""
+        content_hashes = list(self.file_sizes)
+        if scope is not None and scope.content_hashes:
+            content_hashes = [content_hash for content_hash in scope.content_hashes if content_hash in self.file_sizes]
+        key = VectorIndexCache.make_key(
+            content_hashes, self.embedder.embedding_id, self.chunk_size, self.chunk_overlap, self.pdf_streaming
+        )
+        if scope is not None and scope.pages is not None:
+            key = f"{key}:pages={scope.pages[0]}-{scope.pages[1]}"
+        return key
+
+    def session_scope(self, scope: SearchScope = None) -> SearchScope:
+        """Limit a scope to this session's files."""
+        content_hashes = list(self.file_sizes)
+        if scope is not None and scope.content_hashes:
+            content_hashes = [content_hash for content_hash in scope.content_hashes if content_hash in self.file_sizes]
+        return SearchScope(content_hashes, scope.pages if scope is not None else None)
+
+    def get_documents(self, chunk_ids: List[str]) -> List[Document]:
+        """Look up chunks by ID on the server, skipping any that are no longer indexed."""
+        return self.client.get_documents(chunk_ids) if chunk_ids else []
+
+    def add_cached_file(self, content_hash: str, source_name: str) -> bool:
+        chunks = self.client.lookup_file(self.session, content_hash, source_name)
+        if chunks is None:
+            return False
+        self.file_sizes[content_hash] = chunks
+        self.file_names[content_hash] = source_name
+        return True
+
+    def add_file(self, content_hash: str, source_name: str, documents: List[Document]) -> int:
+        if self.has_file(content_hash):
+            return 0
+        self.file_sizes[content_hash] = self.client.add_file(self.session, content_hash, source_name, documents)
+        self.file_names[content_hash] = source_name
+        return self.file_sizes[content_hash]
+
+    def remove_file(self, content_hash: str) -> int:
+        chunks = self.file_sizes.pop(content_hash, 0)
+        self.file_names.pop(content_hash, None)
+        if chunks:
+            self.client.release_file(self.session, content_hash)
+        return chunks
+
+    def close(self):
+        """Release all of the session's files on the server."""
+        self.file_sizes = {}
+        self.file_names = {}
+        self._finalizer()
+
+def _send_heartbeats(manager_ref: weakref.ref, client: RetrievalClient, session: str, closed: threading.Event):
+    while not closed.wait(Config.RETRIEVAL_SESSION_TTL / 3):
+        manager = manager_ref()
+        if manager is None:
+            return
+        expected = len(manager.file_sizes)
+        del manager
+        try:
+            held = client.heartbeat(session)
+            if held < expected:
+                logger.warning(f"Retrieval server holds {held} of this session's {expected} files; re-upload the rest")
+        except Exception as e:
+            logger.warning(f"Retrieval server heartbeat failed: {str(e)}")
+
+def _close_session(client: RetrievalClient, session: str, closed: threading.Event):
+    closed.set()
+    try:
+        client.close_session(session)
+    except Exception as e:
+        logger.warning(f"Failed to close retrieval server session: {str(e)}")
+
+class RemoteRetriever:
+    """DocumentRetriever counterpart that searches through the retrieval server.
+
+    The server returns the fused candidates; packing into the prompt token
+    budget happens here, because it depends on the session's model.
+    """
+
+    def __init__(self, index_manager: RemoteIndexManager, model_name: str = None, token_budget: int = None,
+                 hybrid: bool = None):
+        self.index_manager = index_manager
+        self.hybrid = Config.HYBRID_RETRIEVAL_ENABLED if hybrid is None else hybrid
+        self.k = Config.RETRIEVAL_K
+        self.packer = ContextPacker(model_name=model_name, token_budget=token_budget)
+
+    @timed("retrieve")
+    def get_relevant_documents(self, query: str, scope: SearchScope = None) -> List[Document]:
+        """Retrieve relevant documents from this session's files, optionally only from some files or pages."""
+        try:
+            logger.info(f"Retrieving documents from the retrieval server for query: {query}")
+            scope = self.index_manager.session_scope(scope)
+            if not scope.content_hashes:
+                return []
+            docs = self.index_manager.client.search(query, self.k, scope, self.hybrid)
+            packed = self.packer.pack(docs)
+            logger.info(
+                f"Retrieved {len(docs)} documents, packed {len(packed)} "
+                f"into {self.packer.last_token_count} tokens"
+            )
+            return packed
+        except Exception as e:
+            logger.error(f"Error retrieving documents: {str(e)}")
+            raise
+
+    async def aget_relevant_documents(self, query: str, scope: SearchScope = None) -> List[Document]:
+        """Retrieve relevant documents without blocking the event loop."""
+        return await asyncio.to_thread(self.get_relevant_documents, query, scope)
@@ -0,0 +1,378 @@
+"""Local retrieval server shared by several app processes.
+
+Owns the embedding model and one live vector index. Every file is indexed
+once and shared by all sessions that upload it; sessions search only their
+own files through search scopes. Concurrent queries are embedded with one
+encoder call and searched with one FAISS call per scope. Runs fully offline:
+
+    python -m src.retrieval.retrieval_server --port 8765
+
+and point the app at it with RETRIEVAL_SERVER_URL=http://127.0.0.1:8765.
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Set
+import numpy as np
+from langchain_core.documents import Document
+from src.embedding.index_manager import VectorIndexManager
+from src.pipeline.registry import ComponentRegistry, get_default_registry
+from src.retrieval.retriever import reciprocal_rank_fusion
+from src.retrieval.search_scope import SearchScope
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+class QueryBatcher:
+    """Hand concurrent requests to one worker thread that processes them in batches.
+
+    A batch starts with the first waiting request and takes whatever else
+    arrives within max_wait_ms, up to max_batch requests.
+    """
+
+    def __init__(self, process: Callable[[List[Any]], List[Any]], max_batch: int = None,
+                 max_wait_ms: float = None, name: str = "batcher"):
+        self.process = process
+        self.max_batch = max_batch or Config.RETRIEVAL_BATCH_SIZE
+        self.max_wait = (Config.RETRIEVAL_BATCH_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Any:
+        """Process one item as part of the next batch and return its result."""
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # Finish this batch, then stop
+                    break
+                batch.append(item)
+
+            try:
+                results = self.process([item for item, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batch of {len(batch)} requests failed: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+
+class RetrievalService:
+    """Files, indexes and batched search behind the retrieval server.
+
+    Files are reference counted by the sessions holding them and deleted from
+    the index once the last session releases them. Sessions hold their files
+    under a lease that every call and heartbeat renews; a session silent for
+    longer than session_ttl seconds is closed, releasing its files.
+    """
+
+    def __init__(self, registry: ComponentRegistry = None, session_ttl: float = None):
+        registry = registry or get_default_registry()
+        self.embeddings = registry.embeddings()  # Raw model, so queries bypass the chunk embedding cache
+        self.index_manager = VectorIndexManager(registry.embedder())
+        self.holders: Dict[str, Set[str]] = {}  # content hash -> sessions using the file
+        self.leases: Dict[str, float] = {}  # session -> monotonic time its lease runs out
+        self.session_ttl = Config.RETRIEVAL_SESSION_TTL if session_ttl is None else session_ttl
+        # Guards holders and leases together with the index changes they imply
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.search_batcher = QueryBatcher(self._search_batch, name="search-batcher")
+        self.embed_batcher = QueryBatcher(self._embed_batch, name="embed-batcher")
+        self._reaper = threading.Thread(target=self._reap_expired, name="session-reaper", daemon=True)
+        self._reaper.start()
+
+    def stop(self):
+        self._stopped.set()
+        self.search_batcher.stop()
+        self.embed_batcher.stop()
+
+    def settings(self) -> Dict:
+        """Model and chunking settings clients must match."""
+        return {
+            "embedding_id": self.index_manager.embedder.embedding_id,
+            "chunk_size": self.index_manager.chunk_size,
+            "chunk_overlap": self.index_manager.chunk_overlap,
+            "pdf_streaming": self.index_manager.pdf_streaming
+        }
+
+    def health(self) -> Dict:
+        return {
+            **self.settings(),
+            "files": len(self.index_manager.file_chunks),
+            "chunks": self.index_manager.num_chunks,
+            "index_type": self.index_manager.index_type,
+            "index_recall": self.index_manager.index_recall
+        }
+
+    def check_settings(self, settings: Dict):
+        """Reject chunks produced with other chunking settings than the shared index."""
+        expected = self.settings()
+        mismatched = [key for key in ("chunk_size", "chunk_overlap", "pdf_streaming")
+                      if key in settings and settings[key] != expected[key]]
+        if mismatched:
+            raise ValueError(
+                "The retrieval server indexes with " +
+                ", ".join(f"{key}={expected[key]}" for key in mismatched) +
+                "; use the same settings in the app"
+            )
+
+    def lookup_file(self, session: str, content_hash: str, file_name: str, settings: Dict) -> int:
+        """Hold an indexed or index-cached file for a session. Returns its chunk count, or -1 on a miss."""
+        self.check_settings(settings)
+        with self._lock:
+            self._renew(session)
+            if not self.index_manager.add_cached_file(content_hash, file_name):
+                return -1
+            return self._hold(session, content_hash)
+
+    def add_file(self, session: str, content_hash: str, file_name: str, documents: List[Document],
+                 settings: Dict) -> int:
+        """Index a file's chunks, unless another session already did, and hold it for the session."""
+        self.check_settings(settings)
+        file_store = None
+        while True:
+            with self._lock:
+                self._renew(session)
+                if file_store is not None:
+                    # Adds nothing if another session indexed the same file meanwhile
+                    self.index_manager.add_file_store(content_hash, file_name, file_store)
+                if self.index_manager.has_file(content_hash):
+                    return self._hold(session, content_hash)
+            # Embed outside the locks, so other sessions keep searching and renewing their leases
+            file_store = self.index_manager.build_file_store(content_hash, documents)
+
+    def release_file(self, session: str, content_hash: str) -> int:
+        """Release a session's hold on a file. Returns the number of chunks deleted from the index."""
+        with self._lock:
+            self._renew(session)
+            return self._release(session, content_hash)
+
+    def heartbeat(self, session: str) -> int:
+        """Renew a session's lease. Returns the number of files it still holds."""
+        with self._lock:
+            self._renew(session)
+            return sum(1 for sessions in self.holders.values() if session in sessions)
+
+    def close_session(self, session: str) -> int:
+        """Release every file a session holds and end its lease. Returns the number of chunks deleted."""
+        with self._lock:
+            return self._close(session)
+
+    def expire_sessions(self, now: Optional[float] = None) -> List[str]:
+        """Close the sessions whose lease ran out. Returns their IDs."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [session for session, expiry in self.leases.items() if expiry <= now]
+            for session in expired:
+                removed = self._close(session)
+                logger.info(f"Session {session} expired, deleted {removed} chunks")
+        return expired
+
+    def search(self, query: str, k: int, scope: SearchScope, hybrid: bool) -> List[Document]:
+        return self.search_batcher.submit((query, k, scope, hybrid))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_batcher.submit(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def _renew(self, session: str):
+        self.leases[session] = time.monotonic() + self.session_ttl
+
+    def _hold(self, session: str, content_hash: str) -> int:
+        self.holders.setdefault(content_hash, set()).add(session)
+        return len(self.index_manager.file_chunks.get(content_hash, []))
+
+    def _release(self, session: str, content_hash: str) -> int:
+        sessions = self.holders.get(content_hash, set())
+        sessions.discard(session)
+        if sessions:
+            return 0
+        self.holders.pop(content_hash, None)
+        return self.index_manager.remove_file(content_hash)
+
+    def _close(self, session: str) -> int:
+        self.leases.pop(session, None)
+        held = [content_hash for content_hash, sessions in self.holders.items() if session in sessions]
+        return sum(self._release(session, content_hash) for content_hash in held)
+
+    def _reap_expired(self):
+        while not self._stopped.wait(max(self.session_ttl / 4, 1)):
+            try:
+                self.expire_sessions()
+            except Exception as e:
+                logger.error(f"Failed to expire sessions: {str(e)}")
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def _search_batch(self, requests: List[tuple]) -> List[List[Document]]:
+        """Embed all queries at once, then search each group of queries sharing a scope together."""
+        vectors = np.asarray(self.embeddings.embed_documents([query for query, _, _, _ in requests]), dtype=np.float32)
+
+        groups: Dict[tuple, List[int]] = {}
+        for i, (_, k, scope, _) in enumerate(requests):
+            groups.setdefault((scope.key(), k), []).append(i)
+
+        results: List[List[Document]] = [[] for _ in requests]
+        for (_, k), members in groups.items():
+            scope = requests[members[0]][2]
+            found = self.index_manager.search_by_vectors(vectors[members], k, scope)
+            for i, docs in zip(members, found):
+                query, _, _, hybrid = requests[i]
+                if hybrid and self.index_manager.vector_store is not None:
+                    lexical_hits = self.index_manager.lexical_search(query, k, scope)
+                    docs = reciprocal_rank_fusion(docs, lexical_hits, self.index_manager.vector_store.docstore, k)
+                results[i] = docs
+        logger.info(f"Searched {len(requests)} queries in {len(groups)} scope groups")
+        return results
+
+def document_to_dict(doc: Document) -> Dict:
+    return {"page_content": doc.page_content, "metadata": doc.metadata}
+
+def document_from_dict(data: Dict) -> Document:
+    return Document(page_content=data["page_content"], metadata=data.get("metadata") or {})
+
+def scope_from_dict(data: Dict) -> SearchScope:
+    pages = data.get("pages")
+    return SearchScope(data.get("content_hashes"), tuple(pages) if pages else None)
+
+class _RetrievalHandler(BaseHTTPRequestHandler):
+    service: RetrievalService = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/health":
+            self.send_error(404)
+            return
+        self._reply(200, self.service.health())
+
+    def do_POST(self):
+        routes = {
+            "/search": self._search,
+            "/embed": self._embed,
+            "/documents": self._documents,
+            "/files/lookup": self._lookup_file,
+            "/files/add": self._add_file,
+            "/files/release": self._release_file,
+            "/sessions/heartbeat": self._heartbeat,
+            "/sessions/close": self._close_session
+        }
+        route = routes.get(self.path.split("?")[0])
+        if route is None:
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            self._reply(200, route(payload))
+        except (ValueError, KeyError) as e:
+            self._reply(400, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Retrieval server error on {self.path}: {str(e)}")
+            self._reply(500, {"error": str(e)})
+
+    def _search(self, payload: Dict) -> Dict:
+        docs = self.service.search(
+            payload["query"], int(payload.get("k", Config.RETRIEVAL_K)),
+            scope_from_dict(payload.get("scope") or {}), bool(payload.get("hybrid", Config.HYBRID_RETRIEVAL_ENABLED))
+        )
+        return {"documents": [document_to_dict(doc) for doc in docs]}
+
+    def _embed(self, payload: Dict) -> Dict:
+        if "query" in payload:
+            return {"vector": self.service.embed_query(payload["query"])}
+        return {"vectors": self.service.embed_documents(payload["texts"])}
+
+    def _documents(self, payload: Dict) -> Dict:
+        docs = self.service.index_manager.get_documents(payload["chunk_ids"])
+        return {"documents": [document_to_dict(doc) for doc in docs]}
+
+    def _lookup_file(self, payload: Dict) -> Dict:
+        chunks = self.service.lookup_file(
+            payload["session"], payload["content_hash"], payload["file_name"], payload.get("settings", {})
+        )
+        return {"found": chunks >= 0, "chunks": max(chunks, 0)}
+
+    def _add_file(self, payload: Dict) -> Dict:
+        documents = [document_from_dict(doc) for doc in payload["documents"]]
+        chunks = self.service.add_file(
+            payload["session"], payload["content_hash"], payload["file_name"], documents, payload.get("settings", {})
+        )
+        return {"chunks": chunks}
+
+    def _release_file(self, payload: Dict) -> Dict:
+        return {"removed": self.service.release_file(payload["session"], payload["content_hash"])}
+
+    def _heartbeat(self, payload: Dict) -> Dict:
+        return {"files": self.service.heartbeat(payload["session"])}
+
+    def _close_session(self, payload: Dict) -> Dict:
+        return {"removed": self.service.close_session(payload["session"])}
+
+    def _reply(self, status: int, body: Dict):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Requests are logged by the service
+
+def create_server(service: RetrievalService, host: str = None, port: int = None) -> ThreadingHTTPServer:
+    """Create (but do not start) an HTTP server for the service."""
+    handler = type("RetrievalHandler", (_RetrievalHandler,), {"service": service})
+    port = Config.RETRIEVAL_SERVER_PORT if port is None else port
+    server = ThreadingHTTPServer((host or Config.RETRIEVAL_SERVER_HOST, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Serve shared embeddings and vector search to local app processes.")
+    parser.add_argument("--host", default=Config.RETRIEVAL_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=Config.RETRIEVAL_SERVER_PORT)
+    parser.add_argument("--embedding-backend", choices=["torch", "onnx", "fake"], default=Config.EMBEDDING_BACKEND)
+    args = parser.parse_args(argv)
+
+    Config.EMBEDDING_BACKEND = args.embedding_backend
+    service = RetrievalService()
+    service.embed_query("warm up")
+    server = create_server(service, args.host, args.port)
+    logger.info(f"Retrieval server listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,103 @@
-from typing import List
+import asyncio
+from typing import Dict, List, Tuple
 from langchain_core.documents import Document
+from langchain_community.docstore.base import Docstore
 from langchain_community.vectorstores import FAISS
+from src.retrieval.context_packer import ContextPacker
+from src.retrieval.lexical_index import LexicalIndex
+from src.retrieval.search_scope import SearchScope
 from src.utils.config import Config
+from src.utils.metrics import timed
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
+def reciprocal_rank_fusion(vector_docs: List[Document], lexical_hits: List[Tuple[str, float]],
+                           docstore: Docstore, k: int) -> List[Document]:
+    """Merge vector and BM25 rankings, fetching keyword-only matches from the docstore."""
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+
+    for rank, doc in enumerate(vector_docs):
+        key = doc.metadata.get("chunk_id") or doc.page_content
+        scores[key] = scores.get(key, 0.0) + 1.0 / (Config.RRF_K + rank + 1)
+        docs.setdefault(key, doc)
+
+    for rank, (chunk_id, _) in enumerate(lexical_hits):
+        if chunk_id not in docs:
+            doc = docstore.search(chunk_id)
+            if not isinstance(doc, Document):
+                continue
+            docs[chunk_id] = doc
+        scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (Config.RRF_K + rank + 1)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    logger.info(f"Fused {len(vector_docs)} vector and {len(lexical_hits)} keyword matches")
+    return [docs[key] for key in ranked]
+
 class DocumentRetriever:
-    def __init__(self, vector_store: FAISS):
+    def __init__(self, vector_store: FAISS, model_name: str = None, token_budget: int = None,
+                 lexical_index: LexicalIndex = None, index_manager=None):
         self.vector_store = vector_store
-        self.k = Config.MAX_TOKENS // 100  # Retrieve enough documents to fill context
-    
-    def get_relevant_documents(self, query: str) -> List[Document]:
-        """Retrieve relevant documents based on a query."""
+        self.lexical_index = lexical_index  # Enables hybrid BM25 + vector retrieval when set
+        self.index_manager = index_manager  # VectorIndexManager routing scoped searches to file ranges
+        self.k = Config.RETRIEVAL_K  # Candidates fetched before packing into the token budget
+        self.packer = ContextPacker(model_name=model_name, token_budget=token_budget)
+
+    @timed("retrieve")
+    def get_relevant_documents(self, query: str, scope: SearchScope = None) -> List[Document]:
+        """Retrieve relevant documents based on a query, optionally only from some files or pages."""
+        try:
+            logger.info(f"Retrieving documents for query: {query}")
+            if self._is_scoped(scope):
+                docs = self.index_manager.similarity_search(query, self.k, scope)
+            else:
+                docs = self.vector_store.similarity_search(query, k=self.k)
+            if self.lexical_index is not None:
+                docs = self._fuse(docs, self._lexical_search(query, scope))
+            return self._pack(docs)
+        except Exception as e:
+            logger.error(f"Error retrieving documents: {str(e)}")
+            raise
+
+    @timed("retrieve")
+    async def aget_relevant_documents(self, query: str, scope: SearchScope = None) -> List[Document]:
+        """Retrieve relevant documents without blocking the event loop."""
         try:
             logger.info(f"Retrieving documents for query: {query}")
-            docs = self.vector_store.similarity_search(query, k=self.k)
-            logger.info(f"Retrieved {len(docs)} documents")
-            return docs
+            if self._is_scoped(scope):
+                vector_search = asyncio.to_thread(self.index_manager.similarity_search, query, self.k, scope)
+            else:
+                vector_search = self.vector_store.asimilarity_search(query, k=self.k)
+
+            if self.lexical_index is None:
+                docs = await vector_search
+            else:
+                docs, lexical_hits = await asyncio.gather(
+                    vector_search,
+                    asyncio.to_thread(self._lexical_search, query, scope)
+                )
+                docs = self._fuse(docs, lexical_hits)
+            return self._pack(docs)
         except Exception as e:
             logger.error(f"Error retrieving documents: {str(e)}")
             raise
+
+    def _is_scoped(self, scope: SearchScope) -> bool:
+        return scope is not None and not scope.is_unrestricted() and self.index_manager is not None
+
+    def _lexical_search(self, query: str, scope: SearchScope = None) -> List[Tuple[str, float]]:
+        chunk_ids = self.index_manager.scope_chunk_ids(scope) if self._is_scoped(scope) else None
+        return self.lexical_index.search(query, self.k, chunk_ids=chunk_ids)
+
+    def _fuse(self, vector_docs: List[Document], lexical_hits: List[Tuple[str, float]]) -> List[Document]:
+        return reciprocal_rank_fusion(vector_docs, lexical_hits, self.vector_store.docstore, self.k)
+
+    def _pack(self, docs: List[Document]) -> List[Document]:
+        """Fit retrieved documents into the prompt token budget."""
+        packed = self.packer.pack(docs)
+        logger.info(
+            f"Retrieved {len(docs)} documents, packed {len(packed)} "
+            f"into {self.packer.last_token_count} tokens"
+        )
+        return packed
@@ -0,0 +1,22 @@
+from typing import List, Optional, Tuple
+
+class SearchScope:
+    """Restrict retrieval to some source files and, optionally, a page range.
+
+    Files are identified by content hash, pages by the 1-based "page"
+    metadata of their chunks; the page range is inclusive. Chunks without a
+    page, such as those of Word documents, fall outside every page range.
+    """
+
+    def __init__(self, content_hashes: List[str] = None, pages: Optional[Tuple[int, int]] = None):
+        self.content_hashes = sorted(set(content_hashes or []))
+        self.pages = pages
+
+    def is_unrestricted(self) -> bool:
+        return not self.content_hashes and self.pages is None
+
+    def key(self) -> str:
+        """Stable description of the scope for cache keys and logs."""
+        files = ",".join(content_hash[:16] for content_hash in self.content_hashes) or "*"
+        pages = f"{self.pages[0]}-{self.pages[1]}" if self.pages else "*"
+        return f"files={files};pages={pages}"
@@ -0,0 +1,75 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from src.utils.config import Config
+
+class TranslationBackend(ABC):
+    """A service that translates batches of texts between two languages.
+
+    name identifies the backend in the translation cache, so results of one
+    backend are never served for another.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        """Translate texts, returning one translation per text in the same order."""
+
+class GoogleTranslationBackend(TranslationBackend):
+    """Google Translate through deep-translator.
+
+    GoogleTranslator keeps per-request state on the instance, so each thread
+    reuses its own translator per language pair. Batches are sent as parallel
+    requests on a pool that lives as long as the backend, so the threads and
+    their translators are reused across batches.
+    """
+
+    name = "google"
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or Config.TRANSLATION_MAX_WORKERS
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="translate")
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        if len(texts) == 1:
+            return [self._translator(source, target).translate(texts[0])]
+        return list(self._pool.map(lambda text: self._translator(source, target).translate(text), texts))
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+    def _translator(self, source: str, target: str):
+        translators = getattr(self._local, "translators", None)
+        if translators is None:
+            translators = self._local.translators = {}
+        if (source, target) not in translators:
+            from deep_translator import GoogleTranslator  # Only needed once something is translated
+            translators[(source, target)] = GoogleTranslator(source=source, target=target)
+        return translators[(source, target)]
+
+class FakeTranslationBackend(TranslationBackend):
+    """Offline stand-in that tags texts with the target language after an optional delay."""
+
+    name = "fake"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        self.calls += 1
+        time.sleep(self.delay)
+        return [f"[{target}] {text}" for text in texts]
+
+def create_backend(name: str = None) -> TranslationBackend:
+    """Build the translation backend selected by name or TRANSLATION_BACKEND."""
+    name = (name or Config.TRANSLATION_BACKEND).lower()
+    if name == "google":
+        return GoogleTranslationBackend()
+    if name == "fake":
+        return FakeTranslationBackend()
+    raise ValueError(f"Unknown translation backend: {name}")
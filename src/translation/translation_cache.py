@@ -0,0 +1,77 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+from src.utils.config import Config
+
+# Keep IN (...) lookups under SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class TranslationCache:
+    """Persistent (backend, source language, target language, text hash) -> translation store."""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.TRANSLATION_CACHE_PATH
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(translations)")]
+        if columns and "backend" not in columns:
+            # Older caches did not record which backend translated a text, and may hold fake results
+            self._conn.execute("DROP TABLE translations")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                backend TEXT NOT NULL,
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                PRIMARY KEY (backend, source, target, text_hash)
+            )
+        """)
+        self._conn.commit()
+
+    def get_many(self, backend: str, source: str, target: str, text_hashes: List[str]) -> Dict[str, str]:
+        """Return cached translations for whichever hashes are present."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(text_hashes), LOOKUP_BATCH_SIZE):
+                batch = text_hashes[start:start + LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    "SELECT text_hash, translation FROM translations "
+                    f"WHERE backend = ? AND source = ? AND target = ? AND text_hash IN ({placeholders})",
+                    [backend, source, target, *batch]
+                )
+                found.update(rows)
+        return found
+
+    def put_many(self, backend: str, source: str, target: str, translations: Dict[str, str]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (backend, source, target, text_hash, translation) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(backend, source, target, text_hash, translation) for text_hash, translation in translations.items()]
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM translations")
+            self._conn.commit()
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_translation_cache() -> TranslationCache:
+    """Return the process-wide translation cache."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TranslationCache()
+        return _default_cache
@@ -1,29 +1,71 @@
-from deep_translator import GoogleTranslator
+import asyncio
+from typing import List
+from src.translation.backends import TranslationBackend, create_backend
+from src.translation.translation_cache import TranslationCache, get_default_translation_cache, hash_text
 from src.utils.config import Config
+from src.utils.metrics import timed
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Map UI language names to language codes
+LANGUAGE_CODES = {"english": "en", "german": "de"}
+
 class DocumentTranslator:
-    def __init__(self):
+    def __init__(self, backend: TranslationBackend = None, cache: TranslationCache = None):
         self.supported_languages = Config.SUPPORTED_LANGUAGES
-    
-    def translate(self, text: str, target_language: str) -> str:
+        self.backend = backend or create_backend()
+
+        # Fall back to the shared persistent cache unless caching is disabled
+        if cache is None and Config.TRANSLATION_CACHE_ENABLED:
+            cache = get_default_translation_cache()
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def translate(self, text: str, target_language: str, source_language: str = "auto") -> str:
         """Translate text to the target language."""
+        return self.translate_many([text], target_language, source_language)[0]
+
+    @timed("translate")
+    def translate_many(self, texts: List[str], target_language: str, source_language: str = "auto") -> List[str]:
+        """Translate several texts, serving repeats from the cache and sending the rest as one batch."""
         try:
-            if target_language.lower() == "en":
-                return text
-            
-            logger.info(f"Translating text to {target_language}")
-            
-            # Map language codes
-            lang_code = "de" if target_language.lower() == "german" else target_language.lower()
-            
-            # Translate text
-            translated_text = GoogleTranslator(source='auto', target=lang_code).translate(text)
-            
+            target = self._language_code(target_language)
+            source = self._language_code(source_language)
+            if source == target:
+                return list(texts)
+
+            # Translate each distinct text once
+            hashes = [hash_text(text) for text in texts]
+            unique_texts = dict(zip(hashes, texts))
+            translations = self.cache.get_many(self.backend.name, source, target, list(unique_texts)) if self.cache else {}
+
+            missing = [text_hash for text_hash in unique_texts if text_hash not in translations]
+            if missing:
+                logger.info(f"Translating {len(missing)} texts from {source} to {target}")
+                translated = self.backend.translate_batch(
+                    [unique_texts[text_hash] for text_hash in missing], source, target
+                )
+                new_translations = dict(zip(missing, translated))
+                if self.cache:
+                    self.cache.put_many(self.backend.name, source, target, new_translations)
+                translations.update(new_translations)
+
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
             logger.info("Translation completed successfully")
-            return translated_text
+            return [translations[text_hash] for text_hash in hashes]
         except Exception as e:
             logger.error(f"Error translating text: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def atranslate(self, text: str, target_language: str, source_language: str = "auto") -> str:
+        """Translate text without blocking the event loop."""
+        return await asyncio.to_thread(self.translate, text, target_language, source_language)
+
+    @staticmethod
+    def _language_code(language: str) -> str:
+        language = language.lower()
+        return LANGUAGE_CODES.get(language, language)
@@ -1,21 +1,58 @@
 # src/ui/components.py
 
-import os
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-from fpdf import FPDF
 import streamlit as st
-import tempfile
 from datetime import datetime
-import base64
 from src.utils.analytics import ConversationAnalytics
+from src.utils.export import CHART_TITLES, EXPORT_FORMATS, ConversationExporter
+from src.retrieval.search_scope import SearchScope
+from src.utils.config import Config
 
-def render_chat_history(chat_history):
-    """Render the chat history with download options."""
-    for i, message in enumerate(chat_history):
+# Analytics charts shown together behind one checkbox
+ANALYTICS_CHART_GROUPS = (
+    ("word clouds", ('question_wordcloud', 'answer_wordcloud')),
+    ("length distributions", ('question_length_chart', 'answer_length_chart')),
+    ("complexity distribution", ('complexity_distribution',))
+)
+
+def render_chat_history(chat_history, resolve_sources=None, page_size: int = None):
+    """Render one page of the chat history, showing the newest page until an older one is picked.
+    
+    Pages hold whole question/answer exchanges counted from the start of the
+    conversation, so a page keeps its content as new questions arrive. Only
+    the messages on the selected page are sent to the browser, and source
+    documents are rendered only when asked for, so a rerun costs the same
+    however long the conversation gets. Turns reference their sources by
+    chunk ID; resolve_sources maps the IDs to documents.
+    """
+    page_size = page_size or Config.CHAT_PAGE_SIZE
+    if hasattr(chat_history, "exchange_starts"):
+        starts = chat_history.exchange_starts()
+    else:
+        starts = [i for i, message in enumerate(chat_history) if message["role"] == "user" or i == 0]
+    num_pages = max(1, -(-len(starts) // page_size))
+    
+    # Follow the newest exchanges, unless the reader stayed on an older page
+    key = "chat_history_page"
+    if key not in st.session_state or st.session_state[key] == st.session_state.get("chat_history_num_pages"):
+        st.session_state[key] = num_pages
+    st.session_state[key] = min(st.session_state[key], num_pages)
+    st.session_state.chat_history_num_pages = num_pages
+    
+    page = num_pages
+    if num_pages > 1:
+        page = int(st.number_input(
+            f"Page (of {num_pages}, oldest first)", min_value=1, max_value=num_pages, key=key
+        ))
+    
+    first = (page - 1) * page_size
+    start = starts[first] if starts else 0
+    end = starts[first + page_size] if first + page_size < len(starts) else len(chat_history)
+    if num_pages > 1:
+        last = min(first + page_size, len(starts))
+        st.caption(f"Showing questions {first + 1}-{last} of {len(starts)}")
+    
+    for i in range(start, end):
+        message = chat_history[i]
         if message["role"] == "user":
             st.markdown(f"**You:** {message['content']}")
         else:
@@ -31,16 +68,36 @@ def render_chat_history(chat_history):
             ):
                 st.success("Answer downloaded!")
             
-            # Show source documents
-            if "sources" in message and message["sources"]:
-                with st.expander("View Source Documents"):
-                    for j, doc in enumerate(message["sources"]):
-                        st.markdown(f"**Source {j+1}:**")
-                        st.write(doc.page_content)
-                        st.markdown("---")
+            # Show source documents on demand; a collapsed expander would still send them
+            source_ids = message.get("source_ids")
+            if source_ids and resolve_sources is not None and st.checkbox(
+                f"View {len(source_ids)} source documents", key=f"sources_{i}"
+            ):
+                sources = resolve_sources(list(source_ids))
+                if sources:
+                    render_sources(sources, key=f"sources_{i}")
+                else:
+                    st.info("The source documents are no longer indexed.")
             
         st.markdown("---")
 
+def render_sources(sources, key: str = "sources"):
+    """Render source documents as short previews; a long text is only sent once its checkbox is ticked."""
+    for j, doc in enumerate(sources):
+        label = doc.metadata.get("source", "")
+        if doc.metadata.get("page") is not None:
+            label += f", page {doc.metadata['page']}"
+        st.markdown(f"**Source {j+1}:** {label}")
+        
+        text = doc.page_content
+        if len(text) <= Config.SOURCE_PREVIEW_CHARS:
+            st.write(text)
+        elif st.checkbox("Show full text", key=f"{key}_full_{j}"):
+            st.write(text)
+        else:
+            st.write(text[:Config.SOURCE_PREVIEW_CHARS].rstrip() + "…")
+        st.markdown("---")
+
 def render_document_manager(uploaded_files, remove_file_callback):
     """Render document management section."""
     st.subheader("Document Manager")
@@ -50,6 +107,7 @@ def render_document_manager(uploaded_files, remove_file_callback):
         return
     
     # Display uploaded files
+    import pandas as pd  # Imported on first use to keep startup fast
     files_df = pd.DataFrame({
         "Filename": [file.name for file in uploaded_files],
         "Size (KB)": [round(file.size / 1024, 2) for file in uploaded_files],
@@ -70,6 +128,113 @@ def render_document_manager(uploaded_files, remove_file_callback):
         remove_file_callback(selected_files)
         st.success("Selected documents removed!")
 
+def render_search_scope(index_manager):
+    """Render source and page filters, returning the selected scope or None to search everything."""
+    st.subheader("Search Scope")
+    
+    if index_manager is None or not index_manager.file_names:
+        st.info("Process documents to limit questions to some of them.")
+        return None
+    
+    selected_hashes = st.multiselect(
+        "Only search these documents",
+        options=list(index_manager.file_names),
+        format_func=lambda content_hash: index_manager.file_names[content_hash]
+    )
+    
+    pages = None
+    if not index_manager.pdf_streaming:
+        # Without page-by-page chunking, PDF chunks only carry an estimated page
+        st.caption("Page ranges need PDF_STREAMING, which records the true page of every chunk.")
+    elif st.checkbox("Limit to a page range"):
+        col1, col2 = st.columns(2)
+        with col1:
+            first_page = st.number_input("From page", min_value=1, value=1, step=1)
+        with col2:
+            last_page = st.number_input("To page", min_value=int(first_page), value=int(first_page), step=1)
+        pages = (int(first_page), int(last_page))
+        st.caption("Word documents have no fixed pages, so a page range only searches PDFs.")
+    
+    scope = SearchScope(selected_hashes, pages)
+    return None if scope.is_unrestricted() else scope
+
+def render_metrics(metrics):
+    """Render per-stage latency percentiles and the Prometheus export."""
+    st.subheader("Performance")
+    
+    summary = metrics.summary()
+    if not summary:
+        st.info("No timings recorded yet.")
+        return
+    
+    def to_ms(seconds):
+        return round(seconds * 1000, 1) if seconds is not None else None
+    
+    import pandas as pd
+    metrics_df = pd.DataFrame({
+        "Stage": [s["stage"] for s in summary],
+        "Calls": [s["count"] for s in summary],
+        "p50 (ms)": [to_ms(s["p50"]) for s in summary],
+        "p95 (ms)": [to_ms(s["p95"]) for s in summary],
+        "Errors": [s["errors"] for s in summary]
+    })
+    st.dataframe(metrics_df)
+    
+    st.download_button(
+        label="Download Prometheus Metrics",
+        data=metrics.to_prometheus(),
+        file_name="clarityai_metrics.prom",
+        mime="text/plain"
+    )
+
+def render_index_cache(index_cache):
+    """Render index cache usage and a control to clear it."""
+    st.subheader("Index Cache")
+    
+    if index_cache is None:
+        st.info("Index cache is disabled.")
+        return
+    
+    stats = index_cache.stats()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Cached Indexes", stats['entries'])
+    with col2:
+        st.metric("Size (MB)", f"{stats['size_bytes'] / (1024 * 1024):.1f} / {stats['max_size_bytes'] / (1024 * 1024):.0f}")
+    
+    entries = index_cache.entries()
+    if entries:
+        import pandas as pd
+        entries_df = pd.DataFrame({
+            "Sources": [", ".join(e.get("sources", [])) for e in entries],
+            "Vectors": [e["num_vectors"] for e in entries],
+            "Size (KB)": [round(e["size_bytes"] / 1024, 2) for e in entries],
+            "Hits": [e.get("hits", 0) for e in entries],
+            "Last Used": [datetime.fromtimestamp(e["last_access"]).strftime('%Y-%m-%d %H:%M') for e in entries]
+        })
+        st.dataframe(entries_df)
+    
+    if st.button("Clear Index Cache", type="secondary"):
+        index_cache.clear()
+        st.success("Index cache cleared!")
+
+def render_answer_cache(answer_cache):
+    """Render answer cache hit/miss metrics and a control to clear it."""
+    st.subheader("Answer Cache")
+    
+    stats = answer_cache.stats()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Cached Answers", stats['entries'])
+    with col2:
+        st.metric("Hits / Misses", f"{stats['hits']} / {stats['misses']}")
+    with col3:
+        st.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+    
+    if st.button("Clear Answer Cache", type="secondary"):
+        answer_cache.clear()
+        st.success("Answer cache cleared!")
+
 def render_feedback_system():
     """Render feedback system for AI responses."""
     st.subheader("Was this response helpful?")
@@ -91,219 +256,24 @@ def render_export_options(chat_history):
     
     export_format = st.selectbox(
         "Select export format",
-        ["Text", "PDF", "CSV"]
+        list(EXPORT_FORMATS)
     )
     
     if st.button("Export Conversation"):
-        if export_format == "Text":
-            export_as_text(chat_history)
-        elif export_format == "PDF":
-            export_as_pdf(chat_history)
-        elif export_format == "CSV":
-            export_as_csv(chat_history)
+        # PDF exports reuse the chart images the analytics panel already drew
+        exporter = ConversationExporter(_session_analytics())
+        st.download_button(
+            label=f"Download {export_format}",
+            data=exporter.export(chat_history, export_format),
+            file_name=exporter.file_name(export_format),
+            mime=exporter.mime_type(export_format)
+        )
 
-def export_as_text(chat_history):
-    """Export conversation as text file."""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as tmp:
-        with open(tmp.name, "w") as f:
-            f.write("ClarityAI Conversation Export\n")
-            f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-            for message in chat_history:
-                # Ensure content is a string
-                content = message['content']
-                if not isinstance(content, str):
-                    if isinstance(content, (list, tuple)):
-                        content = ' '.join(str(item) for item in content)
-                    else:
-                        content = str(content)
-                
-                if message["role"] == "user":
-                    f.write(f"You: {content}\n\n")
-                else:
-                    f.write(f"ClarityAI: {content}\n\n")
-        
-        with open(tmp.name, "rb") as f:
-            st.download_button(
-                label="Download Text File",
-                data=f.read(),
-                file_name=f"clarityai_conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                mime="text/plain"
-            )
-        
-        os.unlink(tmp.name)
-
-def export_as_pdf(chat_history):
-    """Export conversation as PDF file with analytics."""
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    
-    # Title
-    pdf.cell(200, 10, txt="ClarityAI Conversation Export", ln=True, align='C')
-    pdf.cell(200, 10, txt=f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ln=True, align='C')
-    pdf.ln(10)
-    
-    # Conversation
-    pdf.set_font("Arial", size=12, style='B')
-    pdf.cell(200, 10, txt="Conversation", ln=True)
-    pdf.set_font("Arial", size=12)
-    
-    for message in chat_history:
-        # Ensure content is a string
-        content = message['content']
-        if not isinstance(content, str):
-            if isinstance(content, (list, tuple)):
-                content = ' '.join(str(item) for item in content)
-            else:
-                content = str(content)
-                
-        if message["role"] == "user":
-            pdf.set_font("Arial", size=12, style='B')
-            pdf.cell(200, 10, txt=f"You: {content}", ln=True)
-            pdf.set_font("Arial", size=12)
-        else:
-            pdf.set_font("Arial", size=12, style='B')
-            pdf.cell(200, 10, txt="ClarityAI:", ln=True)
-            pdf.set_font("Arial", size=12)
-            pdf.multi_cell(0, 10, txt=content)
-            pdf.ln(5)
-    
-    # Analytics Section
-    pdf.add_page()
-    pdf.set_font("Arial", size=14, style='B')
-    pdf.cell(200, 10, txt="Conversation Analytics", ln=True, align='C')
-    pdf.ln(10)
-    
-    # Generate analytics
-    analytics = ConversationAnalytics()
-    analytics_data = analytics.generate_analytics(chat_history)
-    
-    if analytics_data:
-        # Basic Statistics
-        pdf.set_font("Arial", size=12, style='B')
-        pdf.cell(200, 10, txt="Basic Statistics", ln=True)
-        pdf.set_font("Arial", size=12)
-        
-        stats = analytics_data['stats']
-        pdf.cell(200, 10, txt=f"Total Questions: {stats['total_questions']}", ln=True)
-        pdf.cell(200, 10, txt=f"Total Answers: {stats['total_answers']}", ln=True)
-        pdf.cell(200, 10, txt=f"Average Question Length: {stats['avg_question_length']:.2f} characters", ln=True)
-        pdf.cell(200, 10, txt=f"Average Answer Length: {stats['avg_answer_length']:.2f} characters", ln=True)
-        pdf.cell(200, 10, txt=f"Average Question Complexity: {analytics_data['avg_complexity']:.2f}/1.0", ln=True)
-        pdf.ln(10)
-        
-        # Top Keywords
-        pdf.set_font("Arial", size=12, style='B')
-        pdf.cell(200, 10, txt="Top Keywords in Questions", ln=True)
-        pdf.set_font("Arial", size=12)
-        
-        for item in analytics_data['top_question_keywords']:
-            pdf.cell(200, 10, txt=f"{item['word']}: {item['count']} occurrences", ln=True)
-        
-        pdf.ln(5)
-        
-        pdf.set_font("Arial", size=12, style='B')
-        pdf.cell(200, 10, txt="Top Keywords in Answers", ln=True)
-        pdf.set_font("Arial", size=12)
-        
-        for item in analytics_data['top_answer_keywords']:
-            pdf.cell(200, 10, txt=f"{item['word']}: {item['count']} occurrences", ln=True)
-        
-        pdf.ln(10)
-        
-        # Topic Distribution
-        pdf.set_font("Arial", size=12, style='B')
-        pdf.cell(200, 10, txt="Topic Distribution", ln=True)
-        pdf.set_font("Arial", size=12)
-        
-        for topic in analytics_data['topics']:
-            pdf.cell(200, 10, txt=f"{topic['topic']}: {topic['percentage']}%", ln=True)
-        
-        # Add charts and word clouds
-        if analytics_data['question_wordcloud']:
-            pdf.add_page()
-            pdf.set_font("Arial", size=12, style='B')
-            pdf.cell(200, 10, txt="Questions Word Cloud", ln=True, align='C')
-            pdf.image(_decode_base64(analytics_data['question_wordcloud']), x=10, w=190)
-        
-        if analytics_data['answer_wordcloud']:
-            pdf.add_page()
-            pdf.set_font("Arial", size=12, style='B')
-            pdf.cell(200, 10, txt="Answers Word Cloud", ln=True, align='C')
-            pdf.image(_decode_base64(analytics_data['answer_wordcloud']), x=10, w=190)
-        
-        if analytics_data['question_length_chart']:
-            pdf.add_page()
-            pdf.set_font("Arial", size=12, style='B')
-            pdf.cell(200, 10, txt="Question Length Distribution", ln=True, align='C')
-            pdf.image(_decode_base64(analytics_data['question_length_chart']), x=10, w=190)
-        
-        if analytics_data['answer_length_chart']:
-            pdf.add_page()
-            pdf.set_font("Arial", size=12, style='B')
-            pdf.cell(200, 10, txt="Answer Length Distribution", ln=True, align='C')
-            pdf.image(_decode_base64(analytics_data['answer_length_chart']), x=10, w=190)
-        
-        if analytics_data['complexity_distribution']:
-            pdf.add_page()
-            pdf.set_font("Arial", size=12, style='B')
-            pdf.cell(200, 10, txt="Question Complexity Distribution", ln=True, align='C')
-            pdf.image(_decode_base64(analytics_data['complexity_distribution']), x=10, w=190)
-    
-    # Save to a temporary file and read as bytes
-    temp_path = os.path.join("temp", f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
-    os.makedirs("temp", exist_ok=True)
-    pdf.output(temp_path)
-    
-    with open(temp_path, "rb") as f:
-        pdf_bytes = f.read()
-    
-    os.remove(temp_path)
-    
-    st.download_button(
-        label="Download PDF",
-        data=pdf_bytes,
-        file_name=f"clarityai_conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-        mime="application/pdf"
-    )
-
-def export_as_csv(chat_history):
-    """Export conversation as CSV file."""
-    data = []
-    for message in chat_history:
-        # Ensure content is a string
-        content = message['content']
-        if not isinstance(content, str):
-            if isinstance(content, (list, tuple)):
-                content = ' '.join(str(item) for item in content)
-            else:
-                content = str(content)
-        
-        data.append({
-            "Role": message["role"],
-            "Content": content,
-            "Timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
-    
-    df = pd.DataFrame(data)
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
-        df.to_csv(tmp.name, index=False)
-        
-        with open(tmp.name, "rb") as f:
-            st.download_button(
-                label="Download CSV",
-                data=f.read(),
-                file_name=f"clarityai_conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
-            )
-        
-        os.unlink(tmp.name)
-
-def _decode_base64(base64_string):
-    """Decode a base64 string to binary data."""
-    return base64.b64decode(base64_string)
+def _session_analytics() -> ConversationAnalytics:
+    """Keep one aggregator per session so reruns only process new messages."""
+    if "conversation_analytics" not in st.session_state:
+        st.session_state.conversation_analytics = ConversationAnalytics()
+    return st.session_state.conversation_analytics
 
 def render_analytics(chat_history):
     """Render enhanced analytics dashboard."""
@@ -313,9 +283,9 @@ def render_analytics(chat_history):
         st.info("No conversation data available for analytics.")
         return
     
-    # Generate analytics
-    analytics = ConversationAnalytics()
-    analytics_data = analytics.generate_analytics(chat_history)
+    # Charts are drawn below, only when asked for
+    analytics = _session_analytics()
+    analytics_data = analytics.generate_analytics(chat_history, include_charts=False)
     
     if not analytics_data:
         st.info("Not enough data to generate analytics.")
@@ -337,6 +307,7 @@ def render_analytics(chat_history):
         st.metric("Avg. Answer Length", f"{analytics_data['stats']['avg_answer_length']:.2f} chars")
     
     # Top Keywords
+    import pandas as pd
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("Top Keywords in Questions")
@@ -353,31 +324,13 @@ def render_analytics(chat_history):
     topics_df = pd.DataFrame(analytics_data['topics'])
     st.bar_chart(topics_df.set_index('topic'))
     
-    # Word Clouds
-    col1, col2 = st.columns(2)
-    with col1:
-        if analytics_data['question_wordcloud']:
-            st.subheader("Questions Word Cloud")
-            st.image(f"data:image/png;base64,{analytics_data['question_wordcloud']}")
-    
-    with col2:
-        if analytics_data['answer_wordcloud']:
-            st.subheader("Answers Word Cloud")
-            st.image(f"data:image/png;base64,{analytics_data['answer_wordcloud']}")
-    
-    # Length Distributions
-    col1, col2 = st.columns(2)
-    with col1:
-        if analytics_data['question_length_chart']:
-            st.subheader("Question Length Distribution")
-            st.image(f"data:image/png;base64,{analytics_data['question_length_chart']}")
-    
-    with col2:
-        if analytics_data['answer_length_chart']:
-            st.subheader("Answer Length Distribution")
-            st.image(f"data:image/png;base64,{analytics_data['answer_length_chart']}")
-    
-    # Complexity Distribution
-    if analytics_data['complexity_distribution']:
-        st.subheader("Question Complexity Distribution")
-        st.image(f"data:image/png;base64,{analytics_data['complexity_distribution']}")
+    # Word clouds and distributions; each image is redrawn only after the conversation changed
+    for group, names in ANALYTICS_CHART_GROUPS:
+        if not st.checkbox(f"Show {group}", key=f"analytics_{names[0]}"):
+            continue
+        for column, name in zip(st.columns(len(names)), names):
+            image = analytics.chart(name)
+            if image:
+                with column:
+                    st.subheader(CHART_TITLES[name])
+                    st.image(f"data:image/png;base64,{image}")
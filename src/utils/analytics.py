@@ -1,16 +1,7 @@
 # src/utils/analytics.py
 
 import os
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-try:
-    from wordcloud import WordCloud
-    WORDCLOUD_AVAILABLE = True
-except ImportError:
-    WORDCLOUD_AVAILABLE = False
+import importlib.util
 from collections import Counter
 import re
 from typing import List, Dict, Any
@@ -18,6 +9,35 @@ import base64
 import io
 from datetime import datetime
 
+# Plotting libraries are imported on the first chart, not at startup
+WORDCLOUD_AVAILABLE = importlib.util.find_spec("wordcloud") is not None
+
+def _load_plotting():
+    """Import matplotlib and seaborn, returning (pyplot, seaborn)."""
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-interactive backend
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+# Keywords that assign a question to a topic
+TOPIC_KEYWORDS = {
+    "Contract": ["contract", "agreement", "clause", "terms", "party", "sign", "legal"],
+    "Employment": ["job", "work", "employee", "employer", "salary", "position", "hire"],
+    "Technical": ["how", "technical", "system", "process", "method", "technology", "software"],
+    "Financial": ["money", "payment", "cost", "price", "financial", "budget", "expense"],
+    "Policy": ["policy", "rule", "regulation", "guideline", "procedure", "compliance"],
+    "General": []
+}
+
+CHART_NAMES = (
+    'question_wordcloud',
+    'answer_wordcloud',
+    'question_length_chart',
+    'answer_length_chart',
+    'complexity_distribution'
+)
+
 class ConversationAnalytics:
     def __init__(self):
         self.stop_words = set([
@@ -32,83 +52,122 @@ class ConversationAnalytics:
             'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do', 'does', 'did',
             'doing', 'would', 'could', 'shall', 'will', 'should', 'may', 'might', 'must'
         ])
+        self.reset()
     
-    def generate_analytics(self, chat_history: List[Dict]) -> Dict[str, Any]:
-        """Generate comprehensive analytics from conversation history."""
-        if not chat_history:
-            return {}
+    def reset(self):
+        """Forget everything aggregated so far."""
+        self.processed = 0  # Number of chat history messages already aggregated
+        self.version = 0  # Bumped whenever the aggregates change
+        self._last_message_id = None
+        self.question_chars = 0
+        self.answer_chars = 0
+        self.question_words = Counter()
+        self.answer_words = Counter()
+        self.question_lengths = []  # Word counts
+        self.answer_lengths = []
+        self.complexity_scores = []
+        self.topic_counts = {topic: 0 for topic in TOPIC_KEYWORDS}
+        self._charts = {}  # Chart name -> (version, base64 PNG)
+    
+    def update(self, chat_history: List[Dict]) -> bool:
+        """Aggregate messages added since the last call. Returns True if anything changed.
+        
+        A history that shrank or was replaced is aggregated again from scratch.
+        """
+        if len(chat_history) < self.processed or (
+            self.processed and self._message_key(chat_history[self.processed - 1]) != self._last_message_id
+        ):
+            self.reset()
         
-        # Extract questions and answers
-        questions = []
-        answers = []
+        new_messages = chat_history[self.processed:]
+        if not new_messages:
+            return False
         
-        for msg in chat_history:
+        for msg in new_messages:
+            content = self._as_text(msg['content'])
             if msg['role'] == 'user':
-                # Ensure content is a string
-                content = msg['content']
-                if isinstance(content, str):
-                    questions.append(content)
-                elif isinstance(content, (list, tuple)):
-                    # If it's a list or tuple, join elements into a string
-                    questions.append(' '.join(str(item) for item in content))
-                else:
-                    # Convert to string if it's another type
-                    questions.append(str(content))
+                self.question_chars += len(content)
+                self.question_words.update(self._extract_words([content]))
+                self.question_lengths.append(len(content.split()))
+                self.complexity_scores.append(self._calculate_complexity(content))
+                self.topic_counts[self._classify_topic(content)] += 1
             elif msg['role'] == 'assistant':
-                # Ensure content is a string
-                content = msg['content']
-                if isinstance(content, str):
-                    answers.append(content)
-                elif isinstance(content, (list, tuple)):
-                    # If it's a list or tuple, join elements into a string
-                    answers.append(' '.join(str(item) for item in content))
-                else:
-                    # Convert to string if it's another type
-                    answers.append(str(content))
-        
-        # Basic statistics
-        stats = {
-            'total_questions': len(questions),
-            'total_answers': len(answers),
-            'avg_question_length': sum(len(q) for q in questions) / len(questions) if questions else 0,
-            'avg_answer_length': sum(len(a) for a in answers) / len(answers) if answers else 0,
-        }
-        
-        # Word frequency analysis
-        question_words = self._extract_words(questions)
-        answer_words = self._extract_words(answers)
-        
-        # Top keywords
-        top_question_keywords = self._get_top_keywords(question_words)
-        top_answer_keywords = self._get_top_keywords(answer_words)
+                self.answer_chars += len(content)
+                self.answer_words.update(self._extract_words([content]))
+                self.answer_lengths.append(len(content.split()))
         
-        # Question complexity
-        complexity_scores = [self._calculate_complexity(q) for q in questions]
-        avg_complexity = sum(complexity_scores) / len(complexity_scores) if complexity_scores else 0
+        self.processed = len(chat_history)
+        self._last_message_id = self._message_key(chat_history[-1])
+        self.version += 1
+        return True
+    
+    def generate_analytics(self, chat_history: List[Dict], include_charts: bool = True) -> Dict[str, Any]:
+        """Generate comprehensive analytics from conversation history.
         
-        # Topic analysis
-        topics = self._identify_topics(questions)
+        Only messages not seen before are processed, and chart images are
+        re-rendered only when the aggregates changed since they were drawn.
+        """
+        if not chat_history:
+            return {}
         
-        # Generate word clouds
-        question_wordcloud = self._generate_wordcloud(question_words)
-        answer_wordcloud = self._generate_wordcloud(answer_words)
+        self.update(chat_history)
         
-        # Generate charts
-        question_length_chart = self._generate_length_chart(questions, "Question Lengths")
-        answer_length_chart = self._generate_length_chart(answers, "Answer Lengths")
+        num_questions = len(self.question_lengths)
+        num_answers = len(self.answer_lengths)
+        stats = {
+            'total_questions': num_questions,
+            'total_answers': num_answers,
+            'avg_question_length': self.question_chars / num_questions if num_questions else 0,
+            'avg_answer_length': self.answer_chars / num_answers if num_answers else 0,
+        }
         
-        return {
+        analytics = {
             'stats': stats,
-            'top_question_keywords': top_question_keywords,
-            'top_answer_keywords': top_answer_keywords,
-            'avg_complexity': avg_complexity,
-            'topics': topics,
-            'question_wordcloud': question_wordcloud,
-            'answer_wordcloud': answer_wordcloud,
-            'question_length_chart': question_length_chart,
-            'answer_length_chart': answer_length_chart,
-            'complexity_distribution': self._generate_complexity_distribution(complexity_scores)
+            'top_question_keywords': self._get_top_keywords(self.question_words),
+            'top_answer_keywords': self._get_top_keywords(self.answer_words),
+            'avg_complexity': sum(self.complexity_scores) / num_questions if num_questions else 0,
+            'topics': self._topic_percentages()
         }
+        if include_charts:
+            analytics.update({name: self.chart(name) for name in CHART_NAMES})
+        return analytics
+    
+    def chart(self, name: str) -> str:
+        """Return a chart as a base64 PNG, drawing it only if the data changed since the last draw."""
+        cached = self._charts.get(name)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        
+        if name == 'question_wordcloud':
+            image = self._generate_wordcloud(self.question_words)
+        elif name == 'answer_wordcloud':
+            image = self._generate_wordcloud(self.answer_words)
+        elif name == 'question_length_chart':
+            image = self._generate_length_chart(self.question_lengths, "Question Lengths")
+        elif name == 'answer_length_chart':
+            image = self._generate_length_chart(self.answer_lengths, "Answer Lengths")
+        elif name == 'complexity_distribution':
+            image = self._generate_complexity_distribution(self.complexity_scores)
+        else:
+            raise ValueError(f"Unknown chart: {name}")
+        
+        self._charts[name] = (self.version, image)
+        return image
+    
+    @staticmethod
+    def _message_key(message) -> int:
+        # Spilled conversation turns are new objects on every read, so prefer their stable ID
+        return getattr(message, "turn_id", None) or id(message)
+    
+    @staticmethod
+    def _as_text(content) -> str:
+        """Ensure message content is a string."""
+        if isinstance(content, str):
+            return content
+        if isinstance(content, (list, tuple)):
+            # If it's a list or tuple, join elements into a string
+            return ' '.join(str(item) for item in content)
+        return str(content)
     
     def _extract_words(self, texts: List[str]) -> List[str]:
         """Extract meaningful words from texts."""
@@ -124,9 +183,8 @@ class ConversationAnalytics:
             words.extend([word for word in clean_text.split() if word not in self.stop_words and len(word) > 2])
         return words
     
-    def _get_top_keywords(self, words: List[str], top_n: int = 10) -> List[Dict[str, int]]:
+    def _get_top_keywords(self, counter: Counter, top_n: int = 10) -> List[Dict[str, int]]:
         """Get top keywords with their frequencies."""
-        counter = Counter(words)
         return [{"word": word, "count": count} for word, count in counter.most_common(top_n)]
     
     def _calculate_complexity(self, text: str) -> float:
@@ -150,56 +208,41 @@ class ConversationAnalytics:
         complexity = (length_factor * 0.4) + (question_word_factor * 0.3) + (complex_word_factor * 0.3)
         return complexity
     
-    def _identify_topics(self, questions: List[str]) -> List[Dict[str, Any]]:
-        """Identify main topics from questions."""
-        # Simple topic identification based on keywords
-        topic_keywords = {
-            "Contract": ["contract", "agreement", "clause", "terms", "party", "sign", "legal"],
-            "Employment": ["job", "work", "employee", "employer", "salary", "position", "hire"],
-            "Technical": ["how", "technical", "system", "process", "method", "technology", "software"],
-            "Financial": ["money", "payment", "cost", "price", "financial", "budget", "expense"],
-            "Policy": ["policy", "rule", "regulation", "guideline", "procedure", "compliance"],
-            "General": []
-        }
+    def _classify_topic(self, question: str) -> str:
+        """Assign a question to the topic whose keywords it mentions most."""
+        words = set(question.lower().split())
+        max_count = 0
+        best_topic = "General"
         
-        topic_counts = {topic: 0 for topic in topic_keywords}
+        for topic, keywords in TOPIC_KEYWORDS.items():
+            if topic == "General":
+                continue
+            count = sum(1 for keyword in keywords if keyword in words)
+            if count > max_count:
+                max_count = count
+                best_topic = topic
         
-        for question in questions:
-            # Ensure question is a string
-            if not isinstance(question, str):
-                question = str(question)
-                
-            words = set(question.lower().split())
-            max_count = 0
-            best_topic = "General"
-            
-            for topic, keywords in topic_keywords.items():
-                if topic == "General":
-                    continue
-                count = sum(1 for keyword in keywords if keyword in words)
-                if count > max_count:
-                    max_count = count
-                    best_topic = topic
-            
-            topic_counts[best_topic] += 1
-        
-        # Convert to percentage and sort
-        total = sum(topic_counts.values())
+        return best_topic
+    
+    def _topic_percentages(self) -> List[Dict[str, Any]]:
+        """Share of questions per topic, largest first."""
+        total = sum(self.topic_counts.values())
         topics = [
             {"topic": topic, "percentage": round((count / total) * 100, 1) if total > 0 else 0}
-            for topic, count in topic_counts.items()
+            for topic, count in self.topic_counts.items()
         ]
         topics.sort(key=lambda x: x["percentage"], reverse=True)
         
         return topics
     
-    def _generate_wordcloud(self, words: List[str]) -> str:
+    def _generate_wordcloud(self, word_counts: Counter) -> str:
         """Generate a word cloud and return as base64 string."""
-        if not words or not WORDCLOUD_AVAILABLE:
+        if not word_counts or not WORDCLOUD_AVAILABLE:
             return ""
         
         try:
-            wordcloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(words))
+            from wordcloud import WordCloud
+            wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(word_counts)
             
             # Convert to base64
             img_buffer = io.BytesIO()
@@ -212,13 +255,12 @@ class ConversationAnalytics:
             # If wordcloud fails, return empty string
             return ""
     
-    def _generate_length_chart(self, texts: List[str], title: str) -> str:
+    def _generate_length_chart(self, lengths: List[int], title: str) -> str:
         """Generate a length distribution chart and return as base64 string."""
-        if not texts:
+        if not lengths:
             return ""
         
-        lengths = [len(text.split()) for text in texts]
-        
+        plt, sns = _load_plotting()
         plt.figure(figsize=(10, 6))
         sns.histplot(lengths, bins=20, kde=True)
         plt.title(title)
@@ -239,6 +281,7 @@ class ConversationAnalytics:
         if not complexity_scores:
             return ""
         
+        plt, sns = _load_plotting()
         plt.figure(figsize=(10, 6))
         sns.histplot(complexity_scores, bins=10, kde=True)
         plt.title('Question Complexity Distribution')
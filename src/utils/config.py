@@ -7,10 +7,105 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     MODEL_NAME = os.getenv("MODEL_NAME", "gpt-3.5-turbo")
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # "torch", "onnx" or "fake"
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+    EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", os.cpu_count() or 1))
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join("cache", "onnx"))
+    FAKE_EMBEDDING_SIZE = int(os.getenv("FAKE_EMBEDDING_SIZE", 384))
     TEMPERATURE = float(os.getenv("TEMPERATURE", 0.1))
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", 1000))
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 1000))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 200))
+    PDF_STREAMING = os.getenv("PDF_STREAMING", "true").lower() == "true"  # Chunk PDFs page by page
+    
+    # Retrieval and context packing
+    RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", 20))
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
+    CONTEXT_REDUNDANCY_THRESHOLD = float(os.getenv("CONTEXT_REDUNDANCY_THRESHOLD", 0.8))
+    
+    # Approximate nearest-neighbour index
+    ANN_INDEX_TYPE = os.getenv("ANN_INDEX_TYPE", "auto")  # "auto", "flat", "hnsw" or "ivfpq"
+    ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", 20000))  # Below this, exact search is fast enough
+    ANN_MEMORY_BUDGET_MB = int(os.getenv("ANN_MEMORY_BUDGET_MB", 512))
+    HNSW_M = int(os.getenv("HNSW_M", 32))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", 80))
+    HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 64))
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", 16))
+    PQ_M = int(os.getenv("PQ_M", 48))
+    PQ_BITS = int(os.getenv("PQ_BITS", 8))
+    ANN_RECALL_SAMPLE = int(os.getenv("ANN_RECALL_SAMPLE", 200))
+    ANN_RECALL_K = int(os.getenv("ANN_RECALL_K", 10))
+    
+    # Vector index cache
+    INDEX_CACHE_ENABLED = os.getenv("INDEX_CACHE_ENABLED", "true").lower() == "true"
+    INDEX_CACHE_DIR = os.getenv("INDEX_CACHE_DIR", os.path.join("cache", "indexes"))
+    INDEX_CACHE_MAX_MB = int(os.getenv("INDEX_CACHE_MAX_MB", 1024))
+    
+    # Chunk-level embedding cache
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join("cache", "embeddings.sqlite3"))
+    
+    # Parallel ingestion
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", os.cpu_count() or 1))
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 4))
+    INGEST_PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", 50))
+    INGEST_EMBED_BATCH = int(os.getenv("INGEST_EMBED_BATCH", 256))  # Chunks embedded per call while a file streams in
+    
+    # Semantic answer cache
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", os.path.join("cache", "answers.sqlite3"))
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+    ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", 86400))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 10000))
+    
+    # Question pipeline
+    PIPELINE_MAX_CONCURRENCY = int(os.getenv("PIPELINE_MAX_CONCURRENCY", 8))
+    
+    # Translation
+    TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "google")  # "google" or "fake"
+    TRANSLATION_CACHE_ENABLED = os.getenv("TRANSLATION_CACHE_ENABLED", "true").lower() == "true"
+    TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", os.path.join("cache", "translations.sqlite3"))
+    TRANSLATION_MAX_WORKERS = int(os.getenv("TRANSLATION_MAX_WORKERS", 4))
+    
+    # Hybrid retrieval
+    HYBRID_RETRIEVAL_ENABLED = os.getenv("HYBRID_RETRIEVAL_ENABLED", "true").lower() == "true"
+    BM25_K1 = float(os.getenv("BM25_K1", 1.5))
+    BM25_B = float(os.getenv("BM25_B", 0.75))
+    RRF_K = int(os.getenv("RRF_K", 60))
+    
+    # Metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", 1024))  # Recent samples per stage kept for percentiles
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", 0))  # Serve /metrics on this port when non-zero
+    
+    # Logging
+    LOG_DIR = os.getenv("LOG_DIR", "logs")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" or "json"
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+    
+    # Shared components
+    WARMUP_ON_START = os.getenv("WARMUP_ON_START", "false").lower() == "true"  # Load models when the server starts
+    
+    # Chat history
+    CHAT_PAGE_SIZE = int(os.getenv("CHAT_PAGE_SIZE", 10))  # Question/answer turns rendered per page
+    SOURCE_PREVIEW_CHARS = int(os.getenv("SOURCE_PREVIEW_CHARS", 300))
+    CHAT_MEMORY_CAP_MB = float(os.getenv("CHAT_MEMORY_CAP_MB", 8))  # Per session; older turns spill to disk
+    CHAT_SPILL_DIR = os.getenv("CHAT_SPILL_DIR", os.path.join("cache", "chat_history"))
+    
+    # Feedback
+    FEEDBACK_DB_PATH = os.getenv("FEEDBACK_DB_PATH", os.path.join("data", "feedback.sqlite3"))
+    
+    # Retrieval server
+    RETRIEVAL_SERVER_URL = os.getenv("RETRIEVAL_SERVER_URL", "")  # e.g. http://127.0.0.1:8765; empty retrieves in-process
+    RETRIEVAL_SERVER_HOST = os.getenv("RETRIEVAL_SERVER_HOST", "127.0.0.1")
+    RETRIEVAL_SERVER_PORT = int(os.getenv("RETRIEVAL_SERVER_PORT", 8765))
+    RETRIEVAL_BATCH_SIZE = int(os.getenv("RETRIEVAL_BATCH_SIZE", 32))  # Most queries encoded and searched together
+    RETRIEVAL_BATCH_WAIT_MS = float(os.getenv("RETRIEVAL_BATCH_WAIT_MS", 5))  # How long a batch waits to fill up
+    RETRIEVAL_TIMEOUT = float(os.getenv("RETRIEVAL_TIMEOUT", 60))
+    RETRIEVAL_SESSION_TTL = float(os.getenv("RETRIEVAL_SESSION_TTL", 600))  # Seconds a silent session keeps its files
     
     # Supported languages
     SUPPORTED_LANGUAGES = ["en", "de"]
\ No newline at end of file
@@ -0,0 +1,187 @@
+import itertools
+import json
+import os
+import sys
+import threading
+import uuid
+import weakref
+from datetime import datetime
+from typing import Iterator, List, Union
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Turn IDs are unique per process, so aggregators can tell turns apart after they are spilled and reloaded
+_turn_ids = itertools.count(1)
+_turn_ids_lock = threading.Lock()
+
+def _next_turn_id() -> int:
+    with _turn_ids_lock:
+        return next(_turn_ids)
+
+class ConversationTurn:
+    """One chat message, referencing its sources by chunk ID instead of holding the documents.
+
+    Supports read-only dict-style access (turn["content"], turn.get("role")),
+    so code written against the old message dicts keeps working.
+    """
+
+    __slots__ = ("turn_id", "role", "content", "source_ids", "timestamp")
+
+    def __init__(self, role: str, content: str, source_ids: List[str] = None, timestamp: str = None,
+                 turn_id: int = None):
+        self.turn_id = turn_id or _next_turn_id()
+        self.role = role
+        self.content = content
+        self.source_ids = tuple(source_ids or ())
+        self.timestamp = timestamp or datetime.now().isoformat(timespec="seconds")
+
+    @classmethod
+    def answer(cls, content: str, sources: List = None) -> "ConversationTurn":
+        """An assistant turn citing the given retrieved documents."""
+        source_ids = [doc.metadata["chunk_id"] for doc in sources or [] if doc.metadata.get("chunk_id")]
+        return cls("assistant", content, source_ids)
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the turn."""
+        return (
+            sys.getsizeof(self) + sys.getsizeof(self.content) + sys.getsizeof(self.source_ids) +
+            sum(sys.getsizeof(source_id) for source_id in self.source_ids)
+        )
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "turn_id": self.turn_id,
+            "role": self.role,
+            "content": self.content,
+            "source_ids": self.source_ids,
+            "timestamp": self.timestamp
+        }, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, line: Union[str, bytes]) -> "ConversationTurn":
+        data = json.loads(line)
+        return cls(data["role"], data["content"], data["source_ids"], data["timestamp"], data["turn_id"])
+
+class ConversationHistory:
+    """Chat history that keeps at most memory_cap_mb of recent turns in memory.
+
+    Older turns are appended to a JSONL spill file and read back on demand,
+    so a session's footprint stays bounded however long it runs. Behaves
+    like a read-mostly list: len(), indexing, slicing and iteration cover
+    spilled and in-memory turns alike. The spill file is deleted with the
+    history.
+    """
+
+    def __init__(self, memory_cap_mb: float = None, spill_dir: str = None):
+        self.memory_cap = int((Config.CHAT_MEMORY_CAP_MB if memory_cap_mb is None else memory_cap_mb) * 1024 * 1024)
+        self.spill_path = os.path.join(spill_dir or Config.CHAT_SPILL_DIR, f"{uuid.uuid4().hex}.jsonl")
+        self._turns: List[ConversationTurn] = []  # Most recent turns, in order
+        self._memory_bytes = 0
+        self._offsets: List[int] = []  # Byte offset of every spilled turn in the spill file
+        self._exchange_starts: List[int] = []  # Index of every question, where an exchange begins
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _remove_file, self.spill_path)
+
+    @property
+    def num_spilled(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    def exchange_starts(self) -> List[int]:
+        """Index of the first turn of every question/answer exchange, without reading spilled turns."""
+        with self._lock:
+            return list(self._exchange_starts)
+
+    def append(self, turn: ConversationTurn):
+        with self._lock:
+            if turn.role == "user" or not len(self):
+                self._exchange_starts.append(len(self))
+            self._turns.append(turn)
+            self._memory_bytes += turn.memory_bytes()
+            # Always keep the latest turn in memory, even if it alone exceeds the cap
+            if self._memory_bytes > self.memory_cap and len(self._turns) > 1:
+                self._spill()
+
+    def clear(self):
+        with self._lock:
+            self._turns = []
+            self._memory_bytes = 0
+            self._offsets = []
+            self._exchange_starts = []
+            _remove_file(self.spill_path)
+
+    def __len__(self) -> int:
+        return len(self._offsets) + len(self._turns)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        with self._lock:
+            num_spilled = len(self._offsets)
+            if index < 0:
+                index += num_spilled + len(self._turns)
+            if not 0 <= index < num_spilled + len(self._turns):
+                raise IndexError("conversation turn index out of range")
+            if index >= num_spilled:
+                return self._turns[index - num_spilled]
+            with open(self.spill_path, "rb") as f:
+                f.seek(self._offsets[index])
+                return ConversationTurn.from_json(f.readline())
+
+    def __iter__(self) -> Iterator[ConversationTurn]:
+        with self._lock:
+            num_spilled = len(self._offsets)
+            turns = list(self._turns)
+        if num_spilled:
+            # Read spilled turns sequentially rather than seeking for each one
+            with open(self.spill_path, "rb") as f:
+                for line in itertools.islice(f, num_spilled):
+                    yield ConversationTurn.from_json(line)
+        yield from turns
+
+    def _spill(self):
+        """Move the oldest turns to disk until the in-memory ones fit under half the cap."""
+        target = self.memory_cap // 2
+        os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+        count = 0
+        with open(self.spill_path, "ab") as f:
+            while self._memory_bytes > target and count < len(self._turns) - 1:
+                turn = self._turns[count]
+                self._offsets.append(f.tell())
+                f.write((turn.to_json() + "\n").encode("utf-8"))
+                self._memory_bytes -= turn.memory_bytes()
+                count += 1
+        del self._turns[:count]
+        logger.info(f"Spilled {count} conversation turns to disk ({len(self._offsets)} in total)")
+
+class UploadedDocument:
+    """What the session keeps of an uploaded file once its content is indexed."""
+
+    __slots__ = ("name", "size", "content_hash")
+
+    def __init__(self, name: str, size: int, content_hash: str):
+        self.name = name
+        self.size = size
+        self.content_hash = content_hash
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
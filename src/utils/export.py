@@ -1,68 +1,197 @@
-import os
-import pandas as pd
-from fpdf import FPDF
+import base64
+import csv
+import io
 from datetime import datetime
-from typing import List, Dict
+from typing import Dict, Iterator, List
+from src.utils.analytics import CHART_NAMES, ConversationAnalytics
+
+# Format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "Text": ("txt", "text/plain"),
+    "PDF": ("pdf", "application/pdf"),
+    "CSV": ("csv", "text/csv")
+}
+
+# Approximate size of the chunks yielded by the streaming exporters
+STREAM_CHUNK_BYTES = 64 * 1024
+
+CHART_TITLES = {
+    'question_wordcloud': "Questions Word Cloud",
+    'answer_wordcloud': "Answers Word Cloud",
+    'question_length_chart': "Question Length Distribution",
+    'answer_length_chart': "Answer Length Distribution",
+    'complexity_distribution': "Question Complexity Distribution"
+}
+
+def _as_text(content) -> str:
+    """Ensure message content is a string."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, (list, tuple)):
+        return ' '.join(str(item) for item in content)
+    return str(content)
 
 class ConversationExporter:
+    """Export conversations as Text, CSV or PDF without touching the disk.
+
+    export() returns the whole file as bytes; stream() yields it in chunks of
+    about STREAM_CHUNK_BYTES, so Text and CSV exports of long histories never
+    hold more than one chunk. PDF pages are laid out in memory by fpdf either
+    way. When an analytics aggregator is given, the PDF gets an analytics
+    section that reuses its cached chart images.
+    """
+
+    def __init__(self, analytics: ConversationAnalytics = None):
+        self.analytics = analytics
+        self.exported_at = datetime.now()
+
+    @staticmethod
+    def file_name(export_format: str) -> str:
+        extension = EXPORT_FORMATS[export_format][0]
+        return f"clarityai_conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
     @staticmethod
-    def export_as_text(chat_history: List[Dict]) -> bytes:
+    def mime_type(export_format: str) -> str:
+        return EXPORT_FORMATS[export_format][1]
+
+    def export(self, chat_history: List[Dict], export_format: str) -> bytes:
+        """Render the whole export into memory."""
+        if export_format == "PDF":
+            return self.export_as_pdf(chat_history)
+        return b"".join(self.stream(chat_history, export_format))
+
+    def stream(self, chat_history: List[Dict], export_format: str) -> Iterator[bytes]:
+        """Yield the export in chunks."""
+        if export_format == "Text":
+            return self.iter_text(chat_history)
+        if export_format == "CSV":
+            return self.iter_csv(chat_history)
+        if export_format == "PDF":
+            return self._chunks(self.export_as_pdf(chat_history))
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    def export_as_text(self, chat_history: List[Dict]) -> bytes:
         """Export conversation as text file."""
-        content = "ClarityAI Conversation Export\n"
-        content += f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        
+        return b"".join(self.iter_text(chat_history))
+
+    def export_as_csv(self, chat_history: List[Dict]) -> bytes:
+        """Export conversation as CSV file."""
+        return b"".join(self.iter_csv(chat_history))
+
+    def iter_text(self, chat_history: List[Dict]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        buffer.write("ClarityAI Conversation Export\n")
+        buffer.write(f"Date: {self.exported_at.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+
         for message in chat_history:
-            if message["role"] == "user":
-                content += f"You: {message['content']}\n\n"
-            else:
-                content += f"ClarityAI: {message['content']}\n\n"
-        
-        return content.encode('utf-8')
-    
-    @staticmethod
-    def export_as_pdf(chat_history: List[Dict]) -> bytes:
-        """Export conversation as PDF file."""
+            speaker = "You" if message["role"] == "user" else "ClarityAI"
+            buffer.write(f"{speaker}: {_as_text(message['content'])}\n\n")
+            if buffer.tell() >= STREAM_CHUNK_BYTES:
+                yield buffer.getvalue().encode('utf-8')
+                buffer = io.StringIO()
+        yield buffer.getvalue().encode('utf-8')
+
+    def iter_csv(self, chat_history: List[Dict]) -> Iterator[bytes]:
+        timestamp = self.exported_at.strftime('%Y-%m-%d %H:%M:%S')
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["Role", "Content", "Timestamp"])
+
+        for message in chat_history:
+            writer.writerow([message["role"], _as_text(message["content"]), timestamp])
+            if buffer.tell() >= STREAM_CHUNK_BYTES:
+                yield buffer.getvalue().encode('utf-8')
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+        yield buffer.getvalue().encode('utf-8')
+
+    def export_as_pdf(self, chat_history: List[Dict]) -> bytes:
+        """Export conversation as PDF file, with analytics when an aggregator was given."""
+        from fpdf import FPDF
+
         pdf = FPDF()
         pdf.add_page()
         pdf.set_font("Arial", size=12)
-        
+
+        # Title
         pdf.cell(200, 10, txt="ClarityAI Conversation Export", ln=True, align='C')
-        pdf.cell(200, 10, txt=f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ln=True, align='C')
+        pdf.cell(200, 10, txt=f"Date: {self.exported_at.strftime('%Y-%m-%d %H:%M:%S')}", ln=True, align='C')
         pdf.ln(10)
-        
+
+        # Conversation
+        pdf.set_font("Arial", size=12, style='B')
+        pdf.cell(200, 10, txt="Conversation", ln=True)
+        pdf.set_font("Arial", size=12)
+
         for message in chat_history:
+            content = _as_text(message['content'])
             if message["role"] == "user":
                 pdf.set_font("Arial", size=12, style='B')
-                pdf.cell(200, 10, txt=f"You: {message['content']}", ln=True)
+                pdf.cell(200, 10, txt=f"You: {content}", ln=True)
                 pdf.set_font("Arial", size=12)
             else:
                 pdf.set_font("Arial", size=12, style='B')
                 pdf.cell(200, 10, txt="ClarityAI:", ln=True)
                 pdf.set_font("Arial", size=12)
-                pdf.multi_cell(0, 10, txt=message['content'])
+                pdf.multi_cell(0, 10, txt=content)
                 pdf.ln(5)
-        
-        # Save to a temporary file and read as bytes
-        temp_path = os.path.join("temp", f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
-        os.makedirs("temp", exist_ok=True)
-        pdf.output(temp_path)
-        
-        with open(temp_path, "rb") as f:
-            pdf_bytes = f.read()
-        
-        os.remove(temp_path)
-        return pdf_bytes
-    
+
+        if self.analytics is not None and chat_history:
+            self._write_analytics(pdf, chat_history)
+
+        return bytes(pdf.output())
+
+    def _write_analytics(self, pdf, chat_history: List[Dict]):
+        # Charts come from the aggregator's cache and are only redrawn if the conversation changed
+        analytics_data = self.analytics.generate_analytics(chat_history)
+
+        pdf.add_page()
+        pdf.set_font("Arial", size=14, style='B')
+        pdf.cell(200, 10, txt="Conversation Analytics", ln=True, align='C')
+        pdf.ln(10)
+
+        # Basic Statistics
+        pdf.set_font("Arial", size=12, style='B')
+        pdf.cell(200, 10, txt="Basic Statistics", ln=True)
+        pdf.set_font("Arial", size=12)
+
+        stats = analytics_data['stats']
+        pdf.cell(200, 10, txt=f"Total Questions: {stats['total_questions']}", ln=True)
+        pdf.cell(200, 10, txt=f"Total Answers: {stats['total_answers']}", ln=True)
+        pdf.cell(200, 10, txt=f"Average Question Length: {stats['avg_question_length']:.2f} characters", ln=True)
+        pdf.cell(200, 10, txt=f"Average Answer Length: {stats['avg_answer_length']:.2f} characters", ln=True)
+        pdf.cell(200, 10, txt=f"Average Question Complexity: {analytics_data['avg_complexity']:.2f}/1.0", ln=True)
+        pdf.ln(10)
+
+        # Top Keywords
+        for title, key in (("Top Keywords in Questions", 'top_question_keywords'),
+                           ("Top Keywords in Answers", 'top_answer_keywords')):
+            pdf.set_font("Arial", size=12, style='B')
+            pdf.cell(200, 10, txt=title, ln=True)
+            pdf.set_font("Arial", size=12)
+            for item in analytics_data[key]:
+                pdf.cell(200, 10, txt=f"{item['word']}: {item['count']} occurrences", ln=True)
+            pdf.ln(5)
+        pdf.ln(5)
+
+        # Topic Distribution
+        pdf.set_font("Arial", size=12, style='B')
+        pdf.cell(200, 10, txt="Topic Distribution", ln=True)
+        pdf.set_font("Arial", size=12)
+        for topic in analytics_data['topics']:
+            pdf.cell(200, 10, txt=f"{topic['topic']}: {topic['percentage']}%", ln=True)
+
+        # Charts and word clouds
+        for name in CHART_NAMES:
+            image = analytics_data.get(name)
+            if image:
+                pdf.add_page()
+                pdf.set_font("Arial", size=12, style='B')
+                pdf.cell(200, 10, txt=CHART_TITLES[name], ln=True, align='C')
+                pdf.image(io.BytesIO(base64.b64decode(image)), x=10, w=190)
+
     @staticmethod
-    def export_as_csv(chat_history: List[Dict]) -> bytes:
-        """Export conversation as CSV file."""
-        data = []
-        for message in chat_history:
-            data.append({
-                "Role": message["role"],
-                "Content": message["content"],
-                "Timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
-        
-        df = pd.DataFrame(data)
-        return df.to_csv(index=False).encode('utf-8')
\ No newline at end of file
+    def _chunks(data: bytes) -> Iterator[bytes]:
+        view = memoryview(data)
+        for start in range(0, len(view), STREAM_CHUNK_BYTES):
+            yield bytes(view[start:start + STREAM_CHUNK_BYTES])
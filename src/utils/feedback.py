@@ -1,51 +1,180 @@
 import os
 import json
+import sqlite3
+import threading
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List
+from src.utils.config import Config
+
+# Rows fetched per round trip by the streaming reader
+READ_BATCH_SIZE = 1000
+
+def _source_to_json(source):
+    # Sources are usually retrieved Documents; their metadata identifies them
+    metadata = getattr(source, "metadata", None)
+    return metadata if metadata is not None else str(source)
 
 class FeedbackCollector:
-    def __init__(self):
-        self.feedback_file = os.path.join("data", "feedback.json")
-        os.makedirs("data", exist_ok=True)
-        
-        # Initialize feedback file if it doesn't exist
-        if not os.path.exists(self.feedback_file):
-            with open(self.feedback_file, "w") as f:
-                json.dump([], f)
-    
+    """Append-only feedback store in SQLite (WAL mode).
+
+    Each record is a single-row insert, so collecting feedback costs the same
+    however many records exist, and concurrent sessions or processes never
+    overwrite each other. Per-type counts are updated in the same transaction,
+    so the summary does not scan the records. Records from the old
+    data/feedback.json file are imported once.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.FEEDBACK_DB_PATH
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS feedback (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                feedback_type TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                sources TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS feedback_counts (
+                feedback_type TEXT PRIMARY KEY,
+                count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS legacy_imports (
+                name TEXT PRIMARY KEY
+            );
+        """)
+        self._conn.commit()
+        self._import_legacy_file(os.path.join(os.path.dirname(self.db_path) or ".", "feedback.json"))
+
     def collect_feedback(self, feedback_type: str, question: str, answer: str, sources: List = None):
         """Collect user feedback on AI responses."""
-        feedback_data = {
-            "timestamp": datetime.now().isoformat(),
-            "feedback_type": feedback_type,  # "positive" or "negative"
-            "question": question,
-            "answer": answer,
-            "sources": sources if sources else []
-        }
-        
-        # Load existing feedback
-        with open(self.feedback_file, "r") as f:
-            feedback_list = json.load(f)
-        
-        # Add new feedback
-        feedback_list.append(feedback_data)
-        
-        # Save updated feedback
-        with open(self.feedback_file, "w") as f:
-            json.dump(feedback_list, f, indent=2)
-    
+        self._insert([(
+            datetime.now().isoformat(),
+            feedback_type,  # "positive" or "negative"
+            question,
+            answer,
+            json.dumps(sources if sources else [], default=_source_to_json, ensure_ascii=False)
+        )])
+
     def get_feedback_summary(self) -> Dict:
         """Get a summary of collected feedback."""
-        with open(self.feedback_file, "r") as f:
-            feedback_list = json.load(f)
-        
-        total_feedback = len(feedback_list)
-        positive_feedback = sum(1 for f in feedback_list if f["feedback_type"] == "positive")
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT feedback_type, count FROM feedback_counts"))
+
+        total_feedback = sum(counts.values())
+        positive_feedback = counts.get("positive", 0)
         negative_feedback = total_feedback - positive_feedback
-        
+
         return {
             "total_feedback": total_feedback,
             "positive_feedback": positive_feedback,
             "negative_feedback": negative_feedback,
             "positive_percentage": (positive_feedback / total_feedback * 100) if total_feedback > 0 else 0
-        }
\ No newline at end of file
+        }
+
+    def iter_feedback(self, after_id: int = 0, batch_size: int = READ_BATCH_SIZE) -> Iterator[Dict]:
+        """Stream records in insertion order, holding one batch in memory at a time.
+
+        Reads through a separate connection, so writers are not blocked.
+        Pass the last seen "id" as after_id to resume.
+        """
+        conn = self._connect()
+        try:
+            while True:
+                rows = conn.execute(
+                    "SELECT id, timestamp, feedback_type, question, answer, sources FROM feedback "
+                    "WHERE id > ? ORDER BY id LIMIT ?",
+                    (after_id, batch_size)
+                ).fetchall()
+                if not rows:
+                    return
+                for row_id, timestamp, feedback_type, question, answer, sources in rows:
+                    yield {
+                        "id": row_id,
+                        "timestamp": timestamp,
+                        "feedback_type": feedback_type,
+                        "question": question,
+                        "answer": answer,
+                        "sources": json.loads(sources)
+                    }
+                after_id = rows[-1][0]
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA busy_timeout=30000")  # Wait for writers in other processes
+        return conn
+
+    def _insert(self, rows: List[tuple], import_name: str = None):
+        """Insert rows in one transaction; with import_name, raise IntegrityError if that import already ran."""
+        with self._lock:
+            with self._conn:
+                if import_name is not None:
+                    self._conn.execute("INSERT INTO legacy_imports (name) VALUES (?)", (import_name,))
+                self._conn.executemany(
+                    "INSERT INTO feedback (timestamp, feedback_type, question, answer, sources) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                counts: Dict[str, int] = {}
+                for row in rows:
+                    counts[row[1]] = counts.get(row[1], 0) + 1
+                self._conn.executemany(
+                    "INSERT INTO feedback_counts (feedback_type, count) VALUES (?, ?) "
+                    "ON CONFLICT (feedback_type) DO UPDATE SET count = count + excluded.count",
+                    list(counts.items())
+                )
+
+    def _import_legacy_file(self, path: str):
+        """Move records from the JSON file the collector used to rewrite on every click.
+
+        Several processes may start at once. The first claims the file by
+        renaming it; the import is recorded in the same transaction as the
+        records, so a claimed file left behind by a crash is retried without
+        importing anything twice.
+        """
+        claimed = path + ".importing"
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            if not os.path.exists(claimed):
+                return
+        try:
+            with open(claimed, "r") as f:
+                feedback_list = json.load(f)
+        except FileNotFoundError:
+            return  # Another process finished the import meanwhile
+
+        try:
+            self._insert([
+                (
+                    item.get("timestamp", ""),
+                    item.get("feedback_type", ""),
+                    item.get("question", ""),
+                    item.get("answer", ""),
+                    json.dumps(item.get("sources", []), default=_source_to_json, ensure_ascii=False)
+                )
+                for item in feedback_list
+            ], import_name=os.path.basename(path))
+        except sqlite3.IntegrityError:
+            pass  # Already imported by another process
+
+        try:
+            os.replace(claimed, path + ".imported")
+        except FileNotFoundError:
+            pass
+
+_default_collector = None
+_default_collector_lock = threading.Lock()
+
+def get_default_feedback_collector() -> FeedbackCollector:
+    """Return the process-wide feedback collector."""
+    global _default_collector
+    with _default_collector_lock:
+        if _default_collector is None:
+            _default_collector = FeedbackCollector()
+        return _default_collector
@@ -1,31 +1,120 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import multiprocessing
 import os
-from datetime import datetime
+import queue
+import threading
+from src.utils.config import Config
+
+LOGGER_NAME = "ClarityAI"
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_setup_lock = threading.Lock()
+_configured = False
+_listener = None
+_worker_listener = None
+_worker_queue = None  # Records from worker processes, written by _worker_listener in the parent
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "process": record.process,
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
 
 def setup_logger():
-    # Create logs directory if it doesn't exist
-    os.makedirs("logs", exist_ok=True)
-    
-    # Create logger
-    logger = logging.getLogger("ClarityAI")
-    logger.setLevel(logging.INFO)
-    
-    # Create file handler
-    log_file = os.path.join("logs", f"clarityai_{datetime.now().strftime('%Y%m%d')}.log")
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.INFO)
-    
-    # Create console handler
+    """Return the ClarityAI logger, configuring it on first use only.
+
+    Records go onto an unbounded in-memory queue and a background listener
+    thread writes them to the console and a size-rotated log file, so callers
+    never wait on log I/O. Worker processes send their records back over a
+    multiprocessing queue, so only the parent writes the log file.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    with _setup_lock:
+        if not _configured:
+            _configure(logger)
+    return logger
+
+def worker_log_queue():
+    """Queue worker processes log to; pass it to init_worker_logging in a pool initializer."""
+    setup_logger()
+    return _worker_queue
+
+def init_worker_logging(log_queue):
+    """Send this process's records to the parent's log queue instead of writing them itself."""
+    global _configured
+    with _setup_lock:
+        _stop_listener()
+        _forward_to(logging.getLogger(LOGGER_NAME), log_queue)
+        _configured = True
+
+def _configure(logger: logging.Logger):
+    global _configured, _listener, _worker_listener, _worker_queue
+
+    os.makedirs(Config.LOG_DIR, exist_ok=True)
+    formatter = JsonFormatter() if Config.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(Config.LOG_DIR, "clarityai.log"),
+        maxBytes=Config.LOG_MAX_BYTES,
+        backupCount=Config.LOG_BACKUP_COUNT,
+        encoding="utf-8"
+    )
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    
-    # Create formatter and add it to the handlers
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    # Add the handlers to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
-    return logger
\ No newline at end of file
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler)
+    _listener.start()
+    _worker_queue = multiprocessing.Queue()
+    _worker_listener = logging.handlers.QueueListener(_worker_queue, file_handler, console_handler)
+    _worker_listener.start()
+
+    _forward_to(logger, log_queue)
+    logger.setLevel(Config.LOG_LEVEL)
+    logger.propagate = False
+    _configured = True
+
+def _forward_to(logger: logging.Logger, log_queue):
+    # Replace rather than add, so repeated setup never duplicates output
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+def _stop_listener():
+    """Flush queued records and close the handlers."""
+    global _listener, _worker_listener
+    if _listener is not None:
+        _listener.stop()
+        _worker_listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _worker_listener = None
+
+def _reset_after_fork():
+    # Listener threads do not survive fork; forked workers log through the parent's worker queue instead
+    global _listener, _worker_listener, _setup_lock
+    _setup_lock = threading.Lock()
+    if _listener is not None:
+        _listener = None
+        _worker_listener = None
+        _forward_to(logging.getLogger(LOGGER_NAME), _worker_queue)
+
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
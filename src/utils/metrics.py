@@ -0,0 +1,236 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from src.utils.config import Config
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = "clarityai"
+
+class StageMetrics:
+    """Call count, error count, latency histogram and recent samples of one stage."""
+
+    def __init__(self, window: int = None):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)  # Non-cumulative; +Inf is count - sum(buckets)
+        self.recent = deque(maxlen=window or Config.METRICS_WINDOW)
+
+    def observe(self, seconds: float, error: bool = False):
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        self.recent.append(seconds)
+
+    def merge(self, other: "StageMetrics"):
+        self.count += other.count
+        self.errors += other.errors
+        self.total += other.total
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.recent.extend(other.recent)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile over the recent samples."""
+        if not self.recent:
+            return None
+        samples = sorted(self.recent)
+        return samples[min(len(samples) - 1, max(0, round(q / 100 * len(samples)) - 1))]
+
+class MetricsRegistry:
+    """Thread-safe per-stage latency metrics with Prometheus text export."""
+
+    def __init__(self):
+        self._stages: Dict[str, StageMetrics] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, error: bool = False):
+        with self._lock:
+            metrics = self._stages.get(stage)
+            if metrics is None:
+                metrics = self._stages[stage] = StageMetrics()
+            metrics.observe(seconds, error)
+
+    def summary(self) -> List[Dict]:
+        """Per-stage count, errors, mean, p50 and p95 (seconds), sorted by stage."""
+        with self._lock:
+            return [
+                {
+                    "stage": stage,
+                    "count": metrics.count,
+                    "errors": metrics.errors,
+                    "mean": metrics.total / metrics.count if metrics.count else None,
+                    "p50": metrics.percentile(50),
+                    "p95": metrics.percentile(95)
+                }
+                for stage, metrics in sorted(self._stages.items())
+            ]
+
+    def drain(self) -> Dict[str, StageMetrics]:
+        """Return and clear everything recorded so far, e.g. to ship it out of a worker process."""
+        with self._lock:
+            stages, self._stages = self._stages, {}
+            return stages
+
+    def merge(self, stages: Dict[str, StageMetrics]):
+        """Add metrics drained from another registry."""
+        with self._lock:
+            for stage, other in stages.items():
+                metrics = self._stages.get(stage)
+                if metrics is None:
+                    metrics = self._stages[stage] = StageMetrics()
+                metrics.merge(other)
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        duration = f"{METRIC_PREFIX}_stage_duration_seconds"
+        errors = f"{METRIC_PREFIX}_stage_errors_total"
+        lines = [
+            f"# HELP {duration} Time spent in each pipeline stage.",
+            f"# TYPE {duration} histogram"
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for stage, metrics in stages:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, metrics.buckets):
+                    cumulative += count
+                    lines.append(f'{duration}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{duration}_bucket{{stage="{stage}",le="+Inf"}} {metrics.count}')
+                lines.append(f'{duration}_sum{{stage="{stage}"}} {metrics.total}')
+                lines.append(f'{duration}_count{{stage="{stage}"}} {metrics.count}')
+
+            lines.append(f"# HELP {errors} Calls of each pipeline stage that raised.")
+            lines.append(f"# TYPE {errors} counter")
+            for stage, metrics in stages:
+                lines.append(f'{errors}{{stage="{stage}"}} {metrics.errors}')
+        return "\n".join(lines) + "\n"
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+def get_default_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = MetricsRegistry()
+        return _default_metrics
+
+def _reset_after_fork():
+    # Forked workers inherit the parent's observations; start empty so drain() only ships their own.
+    # Reset in place, since @timed wrappers hold on to the registry object.
+    global _default_metrics_lock
+    _default_metrics_lock = threading.Lock()
+    if _default_metrics is not None:
+        _default_metrics._lock = threading.Lock()  # May have been held by another thread at fork time
+        _default_metrics._stages = {}
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def timed(stage: str):
+    """Record the duration and failures of every call under the given stage.
+
+    Works for plain functions, coroutine functions and generator functions;
+    for generators only the time spent producing items counts. When
+    METRICS_ENABLED is off the function is returned unwrapped, so disabled
+    metrics cost nothing per call.
+    """
+    def decorator(func):
+        if not Config.METRICS_ENABLED:
+            return func
+        metrics = get_default_metrics()
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                error = False
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    error = True
+                    raise
+                finally:
+                    metrics.observe(stage, time.perf_counter() - start, error)
+            return async_wrapper
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                generator = func(*args, **kwargs)
+                elapsed = 0.0
+                error = False
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            elapsed += time.perf_counter() - start
+                            return
+                        elapsed += time.perf_counter() - start
+                        yield item
+                except Exception:
+                    error = True
+                    raise
+                finally:
+                    generator.close()
+                    metrics.observe(stage, elapsed, error)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            error = False
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                metrics.observe(stage, time.perf_counter() - start, error)
+        return wrapper
+    return decorator
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_default_metrics().to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the console
+
+_metrics_server = None
+
+def start_metrics_server(port: int = None) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics on the given port (METRICS_PORT by default) in a background thread, once."""
+    global _metrics_server
+    port = Config.METRICS_PORT if port is None else port
+    with _default_metrics_lock:
+        if _metrics_server is None and port and Config.METRICS_ENABLED:
+            _metrics_server = ThreadingHTTPServer((Config.METRICS_HOST, port), _MetricsHandler)
+            threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+        return _metrics_server
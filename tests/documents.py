@@ -0,0 +1,20 @@
+from docx import Document as WordDocument
+from fpdf import FPDF
+
+def make_pdf(path, num_pages, lines_per_page=30):
+    pdf = FPDF()
+    pdf.set_font("Helvetica", size=10)
+    for page in range(num_pages):
+        pdf.add_page()
+        for line in range(lines_per_page):
+            pdf.cell(0, 8, text=f"Page {page + 1} line {line}: the quick brown fox jumps over the lazy dog.",
+                     new_x="LMARGIN", new_y="NEXT")
+    pdf.output(str(path))
+    return str(path)
+
+def make_docx(path, num_paragraphs):
+    doc = WordDocument()
+    for i in range(num_paragraphs):
+        doc.add_paragraph(f"Paragraph {i}: the quick brown fox jumps over the lazy dog. " * 3)
+    doc.save(str(path))
+    return str(path)
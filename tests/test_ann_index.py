@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from src.embedding.ann_index import measure_recall
+from src.embedding.embedder import DocumentEmbedder
+from src.embedding.index_manager import VectorIndexManager
+from src.retrieval.search_scope import SearchScope
+from src.utils.config import Config
+
+class _SelfOnlyIndex:
+    """Returns each query's own row and nothing else."""
+
+    def __init__(self, queries):
+        self.queries = queries
+
+    def search(self, query_vectors, k):
+        found = np.full((len(query_vectors), k), -1, dtype=np.int64)
+        found[:, 0] = self.queries
+        return None, found
+
+@pytest.fixture
+def offline_config(monkeypatch):
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "INDEX_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "FAKE_EMBEDDING_SIZE", 32)
+
+def _documents(name, count):
+    return [Document(page_content=f"{name} chunk {i}", metadata={"source": name, "page": i}) for i in range(count)]
+
+def test_recall_does_not_count_self_match():
+    vectors = np.random.default_rng(0).random((50, 8), dtype=np.float32)
+    queries = np.arange(5)
+    assert measure_recall(_SelfOnlyIndex(queries), vectors, queries, k=5) == 0.0
+
+def test_ivfpq_rebuilds_from_original_vectors(offline_config, monkeypatch):
+    monkeypatch.setattr(Config, "ANN_INDEX_TYPE", "ivfpq")
+    embedder = DocumentEmbedder(backend="fake")
+    manager = VectorIndexManager(embedder)
+    first, second = _documents("a.pdf", 300), _documents("b.pdf", 300)
+    manager.add_file("a" * 64, "a.pdf", first)
+    manager.add_file("b" * 64, "b.pdf", second)
+    assert manager.index_type == "ivfpq"
+    assert 0.0 <= manager.index_recall <= 1.0
+
+    manager.remove_file("a" * 64)
+    expected = np.asarray(embedder.embeddings.embed_documents([doc.page_content for doc in second]), dtype=np.float32)
+    np.testing.assert_array_equal(manager._vectors, expected)
+
+    # Small scopes are searched exactly, so a chunk's own text comes back first
+    query = expected[7:8]
+    (docs,) = manager.search_by_vectors(query, 1, SearchScope(["b" * 64], (7, 7)))
+    assert docs[0].page_content == "b.pdf chunk 7"
+
+def test_auto_index_type_is_resolved_in_cache_key(offline_config, monkeypatch):
+    monkeypatch.setattr(Config, "ANN_INDEX_TYPE", "auto")
+    embedder = DocumentEmbedder(backend="fake")
+    embedder.create_vector_store(_documents("a.pdf", 10), index_type="auto")
+    assert embedder.last_index_report["index_type"] == "flat"
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_removing_a_file_keeps_the_others_in_place(offline_config, monkeypatch, index_type):
+    monkeypatch.setattr(Config, "ANN_INDEX_TYPE", index_type)
+    manager = VectorIndexManager(DocumentEmbedder(backend="fake"))
+    for name in ("a", "b", "c"):
+        manager.add_file(name * 64, f"{name}.pdf", _documents(f"{name}.pdf", 4))
+    assert manager.index_type == index_type
+
+    assert manager.remove_file("b" * 64) == 4
+    assert manager.remove_file("b" * 64) == 0
+    remaining = [manager.vector_store.index_to_docstore_id[position] for position in range(8)]
+    assert remaining == manager.file_chunks["a" * 64] + manager.file_chunks["c" * 64]
+    (docs,) = manager.search_by_vectors(manager._vectors[5:6], 1)
+    assert docs[0].page_content == "c.pdf chunk 1"
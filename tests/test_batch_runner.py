@@ -0,0 +1,99 @@
+import json
+import pytest
+from src.document_processing.docx_processor import DocxProcessor
+from src.document_processing.pdf_processor import PDFProcessor
+from src.pipeline import batch_runner
+from src.retrieval import context_packer
+from src.utils.config import Config
+from tests.documents import make_docx, make_pdf
+
+class _WordEncoding:
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+FAKE_OPTIONS = ["--llm", "fake", "--translator", "fake", "--embedding-backend", "fake"]
+
+@pytest.fixture
+def offline(monkeypatch):
+    # build_runner switches the caches off on Config; monkeypatch puts them back afterwards
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "INDEX_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "TRANSLATION_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "FAKE_EMBEDDING_SIZE", 16)
+    monkeypatch.setattr(context_packer, "get_encoding", lambda model_name: _WordEncoding())
+
+def _runner(tmp_path):
+    return batch_runner.build_runner(batch_runner.parse_args([str(tmp_path), "questions.jsonl"] + FAKE_OPTIONS))
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_load_file_matches_the_pdf_processor(tmp_path, offline, monkeypatch, streaming):
+    monkeypatch.setattr(Config, "PDF_STREAMING", streaming)
+    path = make_pdf(tmp_path / "a.pdf", 3)
+    runner = _runner(tmp_path)
+
+    documents = runner.load_file(path)
+    expected = list(PDFProcessor().iter_documents(path)) if streaming else PDFProcessor().process_pdf(path)
+
+    assert [(doc.page_content, doc.metadata) for doc in documents] == [
+        (doc.page_content, doc.metadata) for doc in expected
+    ]
+    assert set(runner.timer.summary()) == {"extract", "split"}
+
+def test_load_file_matches_the_docx_processor(tmp_path, offline):
+    path = make_docx(tmp_path / "b.docx", 20)
+
+    documents = _runner(tmp_path).load_file(path)
+
+    assert [doc.page_content for doc in documents] == [doc.page_content for doc in DocxProcessor().process_docx(path)]
+    assert all(doc.metadata == {"source": "b.docx"} for doc in documents)
+
+def test_main_answers_every_question(tmp_path, offline):
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    make_pdf(documents / "a.pdf", 2)
+    make_docx(documents / "b.docx", 10)
+    questions = tmp_path / "questions.jsonl"
+    questions.write_text(
+        json.dumps({"id": "q1", "question": "What does the fox do?"}) + "\n\n"
+        + json.dumps({"question": "Was macht der Fuchs?", "language": "German", "sources": ["b.docx"]}) + "\n"
+    )
+    output = tmp_path / "answers.jsonl"
+    summary = tmp_path / "summary.json"
+
+    batch_runner.main([str(documents), str(questions), "--output", str(output), "--summary", str(summary)]
+                      + FAKE_OPTIONS)
+
+    first, second = [json.loads(line) for line in output.read_text().splitlines()]
+    assert first["id"] == "q1"
+    assert first["answer"] and first["sources"]
+    assert second["id"] == 3  # Line number, blank lines included
+    assert second["translated_question"] == "[en] Was macht der Fuchs?"
+    assert second["answer"].startswith("[de] ")
+    assert {source["source"] for source in second["sources"]} == {"b.docx"}
+    assert {"extract", "split", "embed", "retrieve", "generate", "translate"} <= set(json.loads(summary.read_text()))
+
+def test_second_run_with_caches_loads_every_file_from_the_index_cache(tmp_path, offline, monkeypatch):
+    monkeypatch.setattr(Config, "INDEX_CACHE_DIR", str(tmp_path / "indexes"))
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_PATH", str(tmp_path / "embeddings.sqlite3"))
+    monkeypatch.setattr(Config, "TRANSLATION_CACHE_PATH", str(tmp_path / "translations.sqlite3"))
+    monkeypatch.setattr(Config, "INDEX_CACHE_ENABLED", True)
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    make_pdf(documents / "a.pdf", 2)
+    make_docx(documents / "b.docx", 10)
+    questions = tmp_path / "questions.jsonl"
+    questions.write_text(json.dumps({"question": "What does the fox do?"}) + "\n")
+
+    def run(name):
+        output = tmp_path / f"{name}.jsonl"
+        summary = tmp_path / f"{name}.json"
+        batch_runner.main([str(documents), str(questions), "--output", str(output), "--summary", str(summary),
+                           "--use-caches"] + FAKE_OPTIONS)
+        return json.loads(output.read_text()), json.loads(summary.read_text())
+
+    cold_answer, cold_summary = run("cold")
+    warm_answer, warm_summary = run("warm")
+
+    assert "extract" in cold_summary
+    assert "extract" not in warm_summary and "embed" not in warm_summary
+    assert warm_answer["sources"] == cold_answer["sources"]
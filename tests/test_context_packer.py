@@ -0,0 +1,44 @@
+import pytest
+from langchain_core.documents import Document
+from src.retrieval import context_packer
+from src.retrieval.context_packer import ContextPacker
+
+class _WordEncoding:
+    """Whitespace tokenizer, so the tests need no tiktoken download."""
+
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+@pytest.fixture
+def packer(monkeypatch):
+    monkeypatch.setattr(context_packer, "get_encoding", lambda model_name: _WordEncoding())
+    return ContextPacker(model_name="gpt-3.5-turbo", token_budget=10000, redundancy_threshold=0.8)
+
+PAGE = "".join(chr(ord("a") + i % 26) for i in range(1000))
+
+def _chunk(start, end):
+    return Document(page_content=PAGE[start:end], metadata={"source": "a.pdf", "page": 1, "start_index": start})
+
+def test_nested_span_keeps_the_longer_uncovered_tail(packer):
+    packed = packer.pack([_chunk(100, 200), _chunk(50, 400)])
+
+    assert len(packed) == 2
+    assert packed[1].metadata["start_index"] == 200
+    assert packed[1].page_content == PAGE[200:400]
+
+def test_ranges_are_trimmed_regardless_of_selection_order(packer):
+    packed = packer.pack([_chunk(300, 400), _chunk(0, 100), _chunk(50, 500)])
+
+    assert packed[2].metadata["start_index"] == 100
+    assert packed[2].page_content == PAGE[100:300]
+
+def test_chunk_covered_by_several_others_is_dropped(packer):
+    # 170 of its 200 characters are covered, though no single chunk covers 80%
+    packed = packer.pack([_chunk(0, 220), _chunk(250, 500), _chunk(100, 300)])
+
+    assert [doc.metadata["start_index"] for doc in packed] == [0, 250]
+
+def test_partial_overlap_is_cut(packer):
+    packed = packer.pack([_chunk(0, 200), _chunk(150, 350)])
+
+    assert packed[1].page_content == PAGE[200:350]
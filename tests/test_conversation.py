@@ -0,0 +1,20 @@
+from src.utils.conversation import ConversationHistory, ConversationTurn
+
+def test_history_spills_and_reads_back_in_order(tmp_path):
+    history = ConversationHistory(memory_cap_mb=0.001, spill_dir=str(tmp_path))
+    for i in range(20):
+        history.append(ConversationTurn("user" if i % 2 == 0 else "assistant", f"message {i} " * 20))
+
+    assert history.num_spilled > 0
+    assert len(history) == 20
+    assert [turn.content for turn in history] == [f"message {i} " * 20 for i in range(20)]
+    assert history[3].content == "message 3 " * 20
+
+def test_exchange_starts_mark_every_question(tmp_path):
+    history = ConversationHistory(memory_cap_mb=0.001, spill_dir=str(tmp_path))
+    for role in ("user", "user", "assistant", "user", "assistant", "assistant"):
+        history.append(ConversationTurn(role, "text " * 50))
+
+    assert history.exchange_starts() == [0, 1, 3]
+    history.clear()
+    assert history.exchange_starts() == []
@@ -0,0 +1,53 @@
+import json
+import os
+import threading
+from src.utils.feedback import FeedbackCollector
+
+def _write_legacy_file(directory, count):
+    records = [
+        {"timestamp": f"2024-01-01T00:00:{i:02d}", "feedback_type": "positive" if i % 2 else "negative",
+         "question": f"q{i}", "answer": f"a{i}", "sources": []}
+        for i in range(count)
+    ]
+    path = os.path.join(directory, "feedback.json")
+    with open(path, "w") as f:
+        json.dump(records, f)
+    return path
+
+def test_collect_and_summarize(tmp_path):
+    collector = FeedbackCollector(str(tmp_path / "feedback.sqlite3"))
+    collector.collect_feedback("positive", "q", "a")
+    collector.collect_feedback("negative", "q", "a")
+    collector.collect_feedback("positive", "q", "a")
+
+    summary = collector.get_feedback_summary()
+    assert summary["total_feedback"] == 3
+    assert summary["positive_feedback"] == 2
+    assert [record["id"] for record in collector.iter_feedback(batch_size=2)] == [1, 2, 3]
+
+def test_legacy_file_is_imported_once_by_concurrent_collectors(tmp_path):
+    path = _write_legacy_file(str(tmp_path), 10)
+    db_path = str(tmp_path / "feedback.sqlite3")
+    FeedbackCollector(db_path)  # Create the schema up front, as an already deployed app would have
+
+    threads = [threading.Thread(target=FeedbackCollector, args=(db_path,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert FeedbackCollector(db_path).get_feedback_summary()["total_feedback"] == 10
+    assert not os.path.exists(path)
+    assert os.path.exists(path + ".imported")
+
+def test_claimed_file_left_by_a_crash_is_imported_once(tmp_path):
+    path = _write_legacy_file(str(tmp_path), 4)
+    os.rename(path, path + ".importing")  # The previous process crashed after claiming the file
+    db_path = str(tmp_path / "feedback.sqlite3")
+
+    assert FeedbackCollector(db_path).get_feedback_summary()["total_feedback"] == 4
+
+    # A crash after the insert but before the rename must not import the records again
+    os.rename(path + ".imported", path + ".importing")
+    assert FeedbackCollector(db_path).get_feedback_summary()["total_feedback"] == 4
+    assert os.path.exists(path + ".imported")
@@ -0,0 +1,105 @@
+import types
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from src.document_processing.docx_processor import DocxProcessor
+from src.document_processing.parallel_ingest import ParallelIngestor
+from src.embedding.embedder import DocumentEmbedder
+from src.embedding.index_manager import VectorIndexManager
+from src.utils.config import Config
+from tests.documents import make_docx, make_pdf
+
+class _CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.model = DeterministicFakeEmbedding(size=16)
+        self.batch_sizes = []
+
+    def embed_documents(self, texts):
+        self.batch_sizes.append(len(texts))
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.model.embed_query(text)
+
+@pytest.fixture
+def offline_config(monkeypatch):
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "INDEX_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "FAKE_EMBEDDING_SIZE", 16)
+
+def test_streamed_pdf_is_yielded_lazily(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "PDF_STREAMING", True)
+    path = make_pdf(tmp_path / "small.pdf", 3)
+    ((key, documents),) = list(ParallelIngestor(max_workers=1).iter_documents([("small", path)]))
+
+    assert key == "small"
+    assert isinstance(documents, types.GeneratorType)
+    assert [doc.metadata["page"] for doc in documents][-1] == 3
+
+def test_add_file_embeds_streamed_chunks_in_batches(offline_config, monkeypatch):
+    monkeypatch.setattr(Config, "INGEST_EMBED_BATCH", 4)
+    embeddings = _CountingEmbeddings()
+    manager = VectorIndexManager(DocumentEmbedder(backend="fake", embeddings=embeddings))
+    documents = (Document(page_content=f"chunk {i}", metadata={"page": 1}) for i in range(10))
+
+    assert manager.add_file("a" * 64, "a.pdf", documents) == 10
+    assert embeddings.batch_sizes == [4, 4, 2]
+    assert [doc.metadata["chunk_id"] for doc in manager.get_documents(manager.file_chunks["a" * 64])] == [
+        VectorIndexManager.chunk_id("a" * 64, i) for i in range(10)
+    ]
+
+def test_docx_chunks_have_no_page_number(tmp_path):
+    documents = DocxProcessor(chunk_size=200, chunk_overlap=20).process_docx(make_docx(tmp_path / "a.docx", 30))
+
+    assert len(documents) > 10
+    assert all("page" not in doc.metadata for doc in documents)
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_parallel_ingest_matches_the_serial_path(tmp_path, monkeypatch, streaming):
+    monkeypatch.setattr(Config, "PDF_STREAMING", streaming)
+    monkeypatch.setattr(Config, "INGEST_PAGES_PER_TASK", 2)  # Split the large PDF into page ranges
+    files = [
+        ("large", make_pdf(tmp_path / "large.pdf", 5)),
+        ("word", make_docx(tmp_path / "word.docx", 30)),
+        ("small", make_pdf(tmp_path / "small.pdf", 1))
+    ]
+
+    def ingest(max_workers):
+        ingestor = ParallelIngestor(max_workers=max_workers, chunk_size=300, chunk_overlap=30)
+        return [
+            (key, [(doc.page_content, doc.metadata) for doc in documents])
+            for key, documents in ingestor.iter_documents(files)
+        ]
+
+    serial = ingest(1)
+    assert [key for key, _ in serial] == ["large", "word", "small"]
+    assert all(len(documents) > 1 for _, documents in serial)
+    assert ingest(3) == serial
+
+def test_cached_file_takes_the_name_it_is_uploaded_under(tmp_path, offline_config, monkeypatch):
+    monkeypatch.setattr(Config, "INDEX_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "INDEX_CACHE_DIR", str(tmp_path / "indexes"))
+    documents = [Document(page_content=f"chunk {i}", metadata={"source": "old.pdf", "page": 1}) for i in range(3)]
+    VectorIndexManager(DocumentEmbedder(backend="fake")).add_file("a" * 64, "old.pdf", documents)
+
+    manager = VectorIndexManager(DocumentEmbedder(backend="fake"))
+    assert manager.add_cached_file("a" * 64, "new.pdf")
+    assert {doc.metadata["source"] for doc in manager.get_documents(manager.file_chunks["a" * 64])} == {"new.pdf"}
+    assert {doc.metadata["source"] for doc in manager.similarity_search("chunk", 3, None)} == {"new.pdf"}
+
+def test_add_file_merges_a_store_found_in_the_index_cache(tmp_path, offline_config, monkeypatch):
+    monkeypatch.setattr(Config, "INDEX_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "INDEX_CACHE_DIR", str(tmp_path / "indexes"))
+
+    def add():
+        manager = VectorIndexManager(DocumentEmbedder(backend="fake"))
+        documents = (Document(page_content=f"chunk {i}", metadata={"source": "a.pdf"}) for i in range(3))
+        return manager, manager.add_file("a" * 64, "a.pdf", documents)
+
+    assert add()[1] == 3
+    manager, num_added = add()  # Warm cache: the documents are never read
+    assert num_added == 3
+    assert manager.num_chunks == 3
+    assert [doc.page_content for doc in manager.get_documents(manager.file_chunks["a" * 64])] == [
+        f"chunk {i}" for i in range(3)
+    ]
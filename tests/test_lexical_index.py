@@ -0,0 +1,96 @@
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+from src.retrieval.lexical_index import LexicalIndex, tokenize
+from src.retrieval.retriever import reciprocal_rank_fusion
+from src.utils.config import Config
+
+TEXTS = {
+    "c1": "Payment is due within thirty days of the invoice.",
+    "c2": "The invoice number is AB-1234 under regulation EU/2016/679.",
+    "c3": "Termination requires thirty days written notice.",
+    "c4": "Nothing relevant here."
+}
+
+def _index():
+    index = LexicalIndex()
+    index.add(list(TEXTS), list(TEXTS.values()))
+    return index
+
+def test_tokenize_keeps_identifiers_whole():
+    assert tokenize("See AB-1234, section 4.2.1 and EU/2016/679.") == [
+        "see", "ab-1234", "section", "4.2.1", "and", "eu/2016/679"
+    ]
+
+def test_search_ranks_by_bm25():
+    hits = _index().search("thirty days invoice", k=10)
+
+    assert [chunk_id for chunk_id, _ in hits] == ["c1", "c3", "c2"]
+    assert hits[0][1] > hits[1][1] > hits[2][1] > 0
+
+def test_search_returns_at_most_k_hits():
+    assert [chunk_id for chunk_id, _ in _index().search("thirty days invoice", k=1)] == ["c1"]
+    assert _index().search("unknown words", k=5) == []
+
+def test_search_can_be_limited_to_chunk_ids():
+    hits = _index().search("thirty days invoice", k=10, chunk_ids=["c2", "c3", "missing"])
+
+    assert [chunk_id for chunk_id, _ in hits] == ["c3", "c2"]
+
+def test_removed_chunks_are_not_returned():
+    index = _index()
+    index.search("invoice", k=10)  # Compact before removing
+    index.remove(["c1", "missing"])
+
+    assert len(index) == 3
+    assert {chunk_id for chunk_id, _ in index.search("invoice thirty", k=10)} == {"c2", "c3"}
+
+def test_chunks_added_after_a_search_are_found():
+    index = _index()
+    index.search("invoice", k=10)
+    index.add(["c5", "c1"], ["A second invoice reminder.", "Duplicate IDs are ignored."])
+
+    assert {chunk_id for chunk_id, _ in index.search("invoice", k=10)} == {"c1", "c2", "c5"}
+    assert index.search("duplicate", k=10) == []
+
+def _doc(chunk_id):
+    return Document(page_content=TEXTS[chunk_id], metadata={"chunk_id": chunk_id})
+
+def test_fusion_rewards_chunks_found_by_both_searches(monkeypatch):
+    monkeypatch.setattr(Config, "RRF_K", 60)
+    docstore = InMemoryDocstore({chunk_id: _doc(chunk_id) for chunk_id in TEXTS})
+
+    fused = reciprocal_rank_fusion(
+        [_doc("c4"), _doc("c3")], [("c3", 5.0), ("c2", 4.0), ("missing", 1.0)], docstore, k=3
+    )
+
+    # c3 is second and first; c4 is only first; c2, fetched from the docstore, is only second
+    assert [doc.metadata["chunk_id"] for doc in fused] == ["c3", "c4", "c2"]
+
+def test_fusion_keeps_at_most_k_documents():
+    docstore = InMemoryDocstore({})
+    fused = reciprocal_rank_fusion([_doc("c1"), _doc("c2"), _doc("c3")], [], docstore, k=2)
+
+    assert [doc.metadata["chunk_id"] for doc in fused] == ["c1", "c2"]
+
+def test_compaction_forgets_removed_chunks():
+    index = _index()
+    index.remove(["c1", "c2"])
+    index.search("invoice", k=10)
+
+    assert index.chunk_ids == ["c3", "c4"]
+    assert "ab-1234" not in index.vocabulary  # Only c2 used it
+    assert len(index._doc_lengths) == 2
+
+    # Scores match an index that never held the removed chunks, average length included
+    fresh = LexicalIndex()
+    fresh.add(["c3", "c4"], [TEXTS["c3"], TEXTS["c4"]])
+    assert index.search("thirty days relevant", k=10) == fresh.search("thirty days relevant", k=10)
+    assert index.search("thirty", k=10, chunk_ids=["c3"]) == fresh.search("thirty", k=10, chunk_ids=["c3"])
+
+def test_removed_chunk_can_be_added_again():
+    index = _index()
+    index.remove(["c1"])
+    index.search("invoice", k=10)
+    index.add(["c1"], [TEXTS["c1"]])
+
+    assert [chunk_id for chunk_id, _ in index.search("payment", k=10)] == ["c1"]
@@ -0,0 +1,47 @@
+import os
+import time
+import uuid
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from src.utils import logger as logger_module
+from src.utils.config import Config
+from src.utils.logger import init_worker_logging, setup_logger, worker_log_queue
+
+def _log_in_worker(message):
+    setup_logger().info(message)
+    return os.getpid(), logger_module._listener is None
+
+def _wait_for_line(path, message, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with open(path, encoding="utf-8") as f:
+            if any(message in line for line in f):
+                return True
+        time.sleep(0.05)
+    return False
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """Configure logging afresh to write under tmp_path, and back to the usual directory afterwards."""
+    def reconfigure():
+        with logger_module._setup_lock:
+            logger_module._stop_listener()
+            logger_module._configured = False
+        setup_logger()
+
+    monkeypatch.setattr(Config, "LOG_DIR", str(tmp_path))
+    reconfigure()
+    yield str(tmp_path)
+    monkeypatch.undo()
+    reconfigure()
+
+def test_worker_records_are_written_by_the_parent(log_dir):
+    # Same pool setup as ParallelIngestor, in the platform's default start method
+    message = f"worker record {uuid.uuid4().hex}"
+    with ProcessPoolExecutor(max_workers=1, initializer=init_worker_logging,
+                             initargs=(worker_log_queue(),)) as pool:
+        pid, without_listener = pool.submit(_log_in_worker, message).result()
+
+    assert pid != os.getpid()
+    assert without_listener  # The worker has no file writer of its own
+    assert _wait_for_line(os.path.join(log_dir, "clarityai.log"), message)
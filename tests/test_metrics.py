@@ -0,0 +1,56 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from src.document_processing.parallel_ingest import run_task
+from src.utils.metrics import MetricsRegistry, get_default_metrics, timed
+
+@timed("test_child_stage")
+def _record_in_child(value):
+    return value * 2
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    get_default_metrics().reset()
+    yield
+    get_default_metrics().reset()
+
+def test_observe_and_summary():
+    registry = MetricsRegistry()
+    for seconds in (0.01, 0.02, 0.03):
+        registry.observe("retrieve", seconds)
+    registry.observe("retrieve", 0.5, error=True)
+
+    (summary,) = registry.summary()
+    assert summary["stage"] == "retrieve"
+    assert summary["count"] == 4
+    assert summary["errors"] == 1
+    assert summary["p50"] == 0.02
+
+def test_drain_and_merge():
+    worker = MetricsRegistry()
+    worker.observe("embed", 0.1)
+    parent = MetricsRegistry()
+    parent.observe("embed", 0.2)
+
+    parent.merge(worker.drain())
+
+    assert worker.summary() == []
+    assert parent.summary()[0]["count"] == 2
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_forked_workers_only_drain_their_own_observations():
+    metrics = get_default_metrics()
+    for _ in range(10):
+        metrics.observe("retrieve", 0.01)
+
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=4, mp_context=context) as pool:
+        results = list(pool.map(run_task, [_record_in_child] * 8, range(8)))
+
+    for _, drained in results:
+        assert "retrieve" not in drained
+    for _, drained in results:
+        metrics.merge(drained)
+
+    counts = {row["stage"]: row["count"] for row in metrics.summary()}
+    assert counts == {"retrieve": 10, "test_child_stage": 8}
@@ -0,0 +1,132 @@
+import threading
+import time
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from src.pipeline.registry import ComponentRegistry
+from src.retrieval.retrieval_client import RemoteIndexManager, RetrievalClient
+from src.retrieval.retrieval_server import RetrievalService, create_server
+from src.retrieval.search_scope import SearchScope
+from src.utils.config import Config
+
+FILE_A = "a" * 64
+FILE_B = "b" * 64
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(Config, "EMBEDDING_BACKEND", "fake")
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "INDEX_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "FAKE_EMBEDDING_SIZE", 16)
+    service = RetrievalService(ComponentRegistry(), session_ttl=60)
+    yield service
+    service.stop()
+
+def _documents(name, count=3):
+    return [Document(page_content=f"{name} chunk {i}", metadata={"source": name, "page": 1}) for i in range(count)]
+
+def _add(service, session, content_hash, name):
+    return service.add_file(session, content_hash, name, _documents(name), RetrievalClient._settings())
+
+class _GatedEmbeddings(Embeddings):
+    """Blocks document embedding at a barrier, so a test can act while a file is being embedded."""
+
+    def __init__(self, model, parties):
+        self.model = model
+        self.barrier = threading.Barrier(parties, timeout=10)
+
+    def embed_documents(self, texts):
+        self.barrier.wait()
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.model.embed_query(text)
+
+def test_file_is_removed_with_its_last_holder(service):
+    assert _add(service, "s1", FILE_A, "a.pdf") == 3
+    assert _add(service, "s2", FILE_A, "a.pdf") == 3
+
+    assert service.release_file("s1", FILE_A) == 0
+    assert service.index_manager.has_file(FILE_A)
+    assert service.release_file("s2", FILE_A) == 3
+    assert not service.index_manager.has_file(FILE_A)
+
+def test_concurrent_hold_and_release_keep_held_files(service):
+    _add(service, "s1", FILE_A, "a.pdf")
+
+    def churn(session):
+        for _ in range(20):
+            _add(service, session, FILE_A, "a.pdf")
+            service.release_file(session, FILE_A)
+
+    threads = [threading.Thread(target=churn, args=(f"worker-{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # s1 never let go, so the file must still be indexed and held by s1 alone
+    assert service.index_manager.has_file(FILE_A)
+    assert service.holders[FILE_A] == {"s1"}
+
+def test_expired_sessions_release_their_files(service):
+    _add(service, "idle", FILE_A, "a.pdf")
+    _add(service, "active", FILE_B, "b.pdf")
+
+    later = time.monotonic() + 30
+    service.leases["active"] = later + 60  # As if it sent a heartbeat in the meantime
+    assert service.expire_sessions(now=later + 31) == ["idle"]
+    assert not service.index_manager.has_file(FILE_A)
+    assert service.index_manager.has_file(FILE_B)
+    assert service.heartbeat("active") == 1
+
+def test_remote_manager_close_releases_files(service):
+    server = create_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = RetrievalClient(f"http://127.0.0.1:{server.server_address[1]}")
+        manager = RemoteIndexManager(client)
+        manager.add_file(FILE_A, "a.pdf", _documents("a.pdf"))
+        assert service.holders[FILE_A] == {manager.session}
+
+        manager.close()
+        assert not service.index_manager.has_file(FILE_A)
+        assert manager.session not in service.leases
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_searches_and_heartbeats_do_not_wait_for_an_upload(service):
+    _add(service, "s1", FILE_A, "a.pdf")
+    embedder = service.index_manager.embedder
+    embedder.embeddings = _GatedEmbeddings(embedder.embeddings, parties=2)
+    uploader = threading.Thread(target=_add, args=(service, "s2", FILE_B, "b.pdf"))
+    uploader.start()
+    try:
+        # The upload now waits inside the embedding call until this test joins the barrier
+        assert service.heartbeat("s1") == 1
+        assert len(service.search("a.pdf chunk", 2, SearchScope([FILE_A]), hybrid=True)) == 2
+    finally:
+        embedder.embeddings.barrier.wait()
+        uploader.join()
+
+    assert service.holders[FILE_B] == {"s2"}
+
+def test_file_embedded_by_two_sessions_at_once_is_indexed_once(service):
+    embedder = service.index_manager.embedder
+    embedder.embeddings = _GatedEmbeddings(embedder.embeddings, parties=2)
+    results = []
+    uploaders = [
+        threading.Thread(target=lambda session: results.append(_add(service, session, FILE_A, "a.pdf")), args=(s,))
+        for s in ("s1", "s2")
+    ]
+    for uploader in uploaders:
+        uploader.start()
+    for uploader in uploaders:
+        uploader.join()
+
+    assert results == [3, 3]
+    assert service.index_manager.num_chunks == 3
+    assert service.index_manager.vector_store.index.ntotal == 3
+    assert service.holders[FILE_A] == {"s1", "s2"}
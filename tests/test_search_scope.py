@@ -0,0 +1,33 @@
+import pytest
+from langchain_core.documents import Document
+from src.embedding.embedder import DocumentEmbedder
+from src.embedding.index_manager import VectorIndexManager
+from src.retrieval.search_scope import SearchScope
+from src.utils.config import Config
+
+PDF = "a" * 64
+DOCX = "b" * 64
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "INDEX_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "FAKE_EMBEDDING_SIZE", 16)
+    manager = VectorIndexManager(DocumentEmbedder(backend="fake"))
+    manager.add_file(PDF, "a.pdf", [
+        Document(page_content=f"pdf page {page}", metadata={"source": "a.pdf", "page": page}) for page in (1, 2, 3)
+    ])
+    manager.add_file(DOCX, "b.docx", [
+        Document(page_content=f"docx chunk {i}", metadata={"source": "b.docx"}) for i in range(3)
+    ])
+    return manager
+
+def _pages(manager, scope):
+    return [doc.metadata.get("page") for doc in manager.get_documents(manager.scope_chunk_ids(scope))]
+
+def test_page_range_is_one_based_and_inclusive(manager):
+    assert _pages(manager, SearchScope(pages=(1, 2))) == [1, 2]
+
+def test_word_documents_fall_outside_page_ranges(manager):
+    assert _pages(manager, SearchScope([DOCX], pages=(1, 3))) == []
+    assert len(manager.scope_chunk_ids(SearchScope([DOCX]))) == 3
@@ -0,0 +1,64 @@
+import sqlite3
+import threading
+import pytest
+from src.translation.backends import FakeTranslationBackend, GoogleTranslationBackend, TranslationBackend
+from src.translation.translation_cache import TranslationCache
+from src.translation.translator import DocumentTranslator
+
+class _EchoTranslator:
+    def __init__(self, created):
+        created.append(threading.current_thread().name)
+
+    def translate(self, text):
+        return text.upper()
+
+class _OfflineGoogleBackend(GoogleTranslationBackend):
+    """Google backend with the network call replaced, counting translators created."""
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers)
+        self.created = []
+
+    def _translator(self, source, target):
+        translator = getattr(self._local, "translator", None)
+        if translator is None:
+            translator = self._local.translator = _EchoTranslator(self.created)
+        return translator
+
+class _UpperBackend(TranslationBackend):
+    name = "upper"
+
+    def translate_batch(self, texts, source, target):
+        return [text.upper() for text in texts]
+
+def test_backend_must_implement_translate_batch():
+    with pytest.raises(TypeError):
+        TranslationBackend()
+
+def test_cached_translations_are_kept_per_backend(tmp_path):
+    cache = TranslationCache(str(tmp_path / "translations.sqlite3"))
+    assert DocumentTranslator(FakeTranslationBackend(), cache).translate("hallo", "en", "de") == "[en] hallo"
+
+    translator = DocumentTranslator(_UpperBackend(), cache)
+    assert translator.translate("hallo", "en", "de") == "HALLO"
+    assert translator.misses == 1
+
+def test_old_cache_without_backend_is_dropped(tmp_path):
+    path = str(tmp_path / "translations.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE translations (source TEXT, target TEXT, text_hash TEXT, translation TEXT, "
+                 "PRIMARY KEY (source, target, text_hash))")
+    conn.execute("INSERT INTO translations VALUES ('de', 'en', 'x', '[en] hallo')")
+    conn.commit()
+    conn.close()
+
+    assert TranslationCache(path).get_many("fake", "de", "en", ["x"]) == {}
+
+def test_google_backend_reuses_its_threads_across_batches():
+    backend = _OfflineGoogleBackend(max_workers=2)
+    try:
+        for _ in range(5):
+            assert backend.translate_batch(["a", "b", "c"], "de", "en") == ["A", "B", "C"]
+        assert len(backend.created) <= 2
+    finally:
+        backend.close()
@@ -0,0 +1,72 @@
+from streamlit.testing.v1 import AppTest
+
+def _analytics_app():
+    import streamlit as st
+    from src.ui.components import render_analytics
+    from src.utils.analytics import ConversationAnalytics
+
+    class RecordingAnalytics(ConversationAnalytics):
+        def chart(self, name):
+            st.session_state.drawn.append(name)
+            return ""
+
+    if "conversation_analytics" not in st.session_state:
+        st.session_state.conversation_analytics = RecordingAnalytics()
+    st.session_state.drawn = []
+    render_analytics([
+        {"role": "user", "content": "What does the contract say about payment?"},
+        {"role": "assistant", "content": "Payment is due within thirty days."}
+    ])
+
+def test_analytics_charts_are_drawn_only_on_demand():
+    app = AppTest.from_function(_analytics_app).run()
+    assert not app.exception
+    assert app.session_state.drawn == []
+
+    app.checkbox(key="analytics_question_wordcloud").check().run()
+    assert app.session_state.drawn == ["question_wordcloud", "answer_wordcloud"]
+
+def _chat_app():
+    import streamlit as st
+    from langchain_core.documents import Document
+    from src.ui.components import render_chat_history
+
+    history = [{"role": "user", "content": "Q0"}]  # Q0 never got an answer
+    for i in range(1, st.session_state.get("questions", 5)):
+        history += [{"role": "user", "content": f"Q{i}"},
+                    {"role": "assistant", "content": f"A{i}", "source_ids": ["c1"]}]
+    render_chat_history(
+        history,
+        resolve_sources=lambda ids: [Document(page_content="x" * 1000, metadata={"source": "a.pdf", "page": 2})],
+        page_size=2
+    )
+
+def _shown(app):
+    return [element.value for element in app.markdown if element.value.startswith(("**You:**", "**ClarityAI:**"))]
+
+def test_chat_history_pages_hold_whole_exchanges_from_the_start():
+    app = AppTest.from_function(_chat_app).run()
+    assert not app.exception
+    assert _shown(app) == ["**You:** Q4", "**ClarityAI:** A4"]  # Newest page first
+
+    app.number_input(key="chat_history_page").set_value(1).run()
+    assert _shown(app) == ["**You:** Q0", "**You:** Q1", "**ClarityAI:** A1"]
+
+    # New questions leave an older page where it was
+    app.session_state.questions = 7
+    app.run()
+    assert _shown(app) == ["**You:** Q0", "**You:** Q1", "**ClarityAI:** A1"]
+
+def test_full_source_text_is_sent_only_on_request():
+    app = AppTest.from_function(_chat_app).run()
+    app.checkbox(key="sources_8").check().run()
+    assert not any(element.value == "x" * 1000 for element in app.markdown)
+
+    app.checkbox(key="sources_8_full_0").check().run()
+    assert any(element.value == "x" * 1000 for element in app.markdown)
+
+def test_chat_history_follows_new_pages_from_the_newest_page():
+    app = AppTest.from_function(_chat_app).run()
+    app.session_state.questions = 7
+    app.run()
+    assert _shown(app) == ["**You:** Q6", "**ClarityAI:** A6"]